@@ -0,0 +1,273 @@
+"""
+Benchmarks de los caminos críticos del organizador.
+
+    python -m benchmarks.run_benchmarks --files 5000 --seed 42
+    python -m benchmarks.run_benchmarks --compare antes.json despues.json
+
+Cada benchmark se ejecuta en un proceso propio para medir su pico de memoria
+(RSS) de forma aislada, con un home temporal: no lee las reglas ni los
+límites de E/S del usuario ni escribe en su caché (resultados de la última
+sesión, checkpoints, miniaturas). Los resultados se guardan en JSON para
+comparar runs.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.tree_generator import add_arguments, generate_tree, options_from_args
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def _tree_files(path):
+    files = []
+    for root, _, names in os.walk(path):
+        files.extend(os.path.join(root, name) for name in names)
+    return files
+
+
+def _tree_bytes(files):
+    return sum(os.path.getsize(file) for file in files)
+
+
+def bench_hash_scan(tree):
+    from core.file_hash_scanner import FileHashScanWorker
+
+    from core.scan_metrics import ScanMetrics
+
+    files = _tree_files(tree)
+    worker = FileHashScanWorker(tree)
+    # Solo se leen los archivos cuyo tamaño coincide con el de otro: los MB/s son de los bytes leídos
+    worker.metrics = ScanMetrics(enabled=True)
+    start = time.perf_counter()
+    worker.run()
+    return time.perf_counter() - start, len(files), worker.metrics.counters.get('bytes_read', 0)
+
+
+def bench_hash_read(tree):
+    # Un solo hilo leyendo todos los archivos: MB/s por núcleo del motor de lectura
+    from core.hash_reader import HashReader
+
+    files = _tree_files(tree)
+    reader = HashReader()
+    start = time.perf_counter()
+    for file in files:
+        reader.hash_file(file)
+    return time.perf_counter() - start, len(files), _tree_bytes(files)
+
+
+def bench_date_scan(tree):
+    from core.file_scanner import FileScanWorker
+
+    files = _tree_files(tree)
+    worker = FileScanWorker(tree)
+    start = time.perf_counter()
+    worker.run()
+    return time.perf_counter() - start, len(files), 0
+
+
+def bench_get_file_date(tree):
+    from core.file_metadata import FileMetadata
+
+    files = _tree_files(tree)
+    start = time.perf_counter()
+    for file in files:
+        FileMetadata.get_file_date(file)
+    return time.perf_counter() - start, len(files), 0
+
+
+def bench_reorganize_by_date(tree):
+    from core.file_organizer import FileOrganizer
+    from core.scan_engine import DateScanner
+
+    files = _tree_files(tree)
+    files_by_date = DateScanner(tree).run()
+    start = time.perf_counter()
+    FileOrganizer.reorganize_by_date(files_by_date, tree)
+    return time.perf_counter() - start, len(files), 0
+
+
+def bench_restore_original_structure(tree):
+    from core.file_organizer import FileOrganizer
+    from core.scan_engine import DateScanner
+
+    files = _tree_files(tree)
+    FileOrganizer.reorganize_by_date(DateScanner(tree).run(), tree)
+    start = time.perf_counter()
+    FileOrganizer.restore_original_structure(tree)
+    return time.perf_counter() - start, len(files), 0
+
+
+def bench_populate_table(tree):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    from core.scan_engine import DuplicateFinder
+    from gui.widgets.duplicates_view import DuplicatesView
+
+    app = QApplication.instance() or QApplication([])
+    duplicates = DuplicateFinder(tree).run()
+    rows = sum(len(data['files']) for data in duplicates.values())
+    view = DuplicatesView()
+    start = time.perf_counter()
+    view.populate_table(duplicates)
+    app.processEvents()
+    return time.perf_counter() - start, rows, 0
+
+
+# Nombre -> (función, modifica el árbol)
+BENCHMARKS = {
+    'hash_scan': (bench_hash_scan, False),
+    'hash_read': (bench_hash_read, False),
+    'date_scan': (bench_date_scan, False),
+    'get_file_date': (bench_get_file_date, False),
+    'reorganize_by_date': (bench_reorganize_by_date, True),
+    'restore_original_structure': (bench_restore_original_structure, True),
+    'populate_table': (bench_populate_table, False),
+}
+
+
+def peak_rss_bytes():
+    # En Linux ru_maxrss se hereda del proceso padre; VmHWM se reinicia con exec
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+    except ImportError:  # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+
+
+def run_single(name, tree):
+    """Ejecuta un benchmark en el proceso actual e imprime el resultado en JSON."""
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull  # Los módulos del proyecto informan errores con print
+        try:
+            seconds, files, total_bytes = BENCHMARKS[name][0](tree)
+        finally:
+            sys.stdout = stdout
+    print(json.dumps({
+        'seconds': seconds,
+        'files': files,
+        'bytes': total_bytes,
+        'peak_rss': peak_rss_bytes(),
+    }))
+
+
+def run_isolated(name, tree, work_dir):
+    # get_app_dir usa el home del usuario: USERPROFILE en Windows, HOME en el resto
+    home = tempfile.mkdtemp(prefix='home_', dir=work_dir)
+    try:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.run_benchmarks', '--run-single', name, tree],
+            check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=dict(os.environ, HOME=home, USERPROFILE=home)
+        ).stdout
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmarks(tree, names, repeat, work_dir):
+    results = {}
+    for name in names:
+        mutates = BENCHMARKS[name][1]
+        runs = []
+        for _ in range(repeat):
+            target = tree
+            if mutates:
+                target = os.path.join(work_dir, name)
+                shutil.rmtree(target, ignore_errors=True)
+                shutil.copytree(tree, target)
+            runs.append(run_isolated(name, target, work_dir))
+            if mutates:
+                shutil.rmtree(target, ignore_errors=True)
+
+        best = min(runs, key=lambda run: run['seconds'])
+        seconds = best['seconds']
+        results[name] = {
+            'seconds': seconds,
+            'runs': [run['seconds'] for run in runs],
+            'files': best['files'],
+            'files_per_second': best['files'] / seconds if seconds else None,
+            'mb_per_second': best['bytes'] / (1024 * 1024) / seconds if seconds and best['bytes'] else None,
+            'peak_rss_mb': max(run['peak_rss'] for run in runs) / (1024 * 1024),
+        }
+        print(f"{name:28s} {seconds:9.3f} s  {results[name]['files_per_second'] or 0:12.1f} files/s"
+              f"  {results[name]['mb_per_second'] or 0:9.1f} MB/s  {results[name]['peak_rss_mb']:8.1f} MB RSS")
+    return results
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)['results']
+    with open(new_path) as f:
+        new = json.load(f)['results']
+    for name in sorted(set(old) & set(new)):
+        ratio = old[name]['seconds'] / new[name]['seconds'] if new[name]['seconds'] else float('inf')
+        print(f"{name:28s} {old[name]['seconds']:9.3f} s -> {new[name]['seconds']:9.3f} s  x{ratio:.2f}"
+              f"  RSS {old[name]['peak_rss_mb']:.1f} -> {new[name]['peak_rss_mb']:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument('--benchmarks', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tree', help='Reutilizar un árbol ya generado')
+    parser.add_argument('--output', help='Archivo JSON de resultados')
+    parser.add_argument('--compare', nargs=2, metavar=('ANTES', 'DESPUES'))
+    parser.add_argument('--run-single', nargs=2, metavar=('NOMBRE', 'ARBOL'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_single:
+        run_single(*args.run_single)
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='organizador_bench_') as work_dir:
+        tree = args.tree
+        tree_info = None
+        if not tree:
+            tree = os.path.join(work_dir, 'tree')
+            tree_info = generate_tree(tree, **options_from_args(args))
+
+        results = run_benchmarks(tree, args.benchmarks, args.repeat, work_dir)
+
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'python': sys.version,
+        'platform': platform.platform(),
+        'tree': tree_info or {'path': args.tree},
+        'repeat': args.repeat,
+        'results': results,
+    }
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
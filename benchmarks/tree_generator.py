@@ -0,0 +1,127 @@
+"""
+Generador reproducible de árboles de archivos sintéticos para los benchmarks.
+
+    python -m benchmarks.tree_generator DESTINO --files 5000 --seed 42
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import random
+import shutil
+from typing import Dict
+
+
+DEFAULT_OPTIONS = {
+    'files': 2000,
+    'seed': 42,
+    'median_size': 64 * 1024,   # Mediana de la distribución log-normal de tamaños
+    'size_sigma': 1.5,
+    'max_size': 64 * 1024 * 1024,
+    'duplicate_ratio': 0.2,
+    'jpeg_ratio': 0.3,
+    'depth': 3,
+    'fanout': 4,
+}
+
+
+def _random_directory(rng: random.Random, depth: int, fanout: int) -> str:
+    parts = [f"dir_{rng.randrange(fanout)}" for _ in range(rng.randint(0, depth))]
+    return os.path.join(*parts) if parts else ''
+
+
+def _random_date(rng: random.Random) -> datetime.datetime:
+    start = datetime.datetime(2005, 1, 1)
+    return start + datetime.timedelta(seconds=rng.randrange(20 * 365 * 24 * 3600))
+
+
+def _jpeg_bytes(rng: random.Random, date: datetime.datetime) -> bytes:
+    from PIL import Image
+
+    image = Image.new('RGB', (rng.randint(64, 640), rng.randint(64, 480)),
+                      (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    exif = image.getexif()
+    exif[306] = date.strftime("%Y:%m:%d %H:%M:%S")  # DateTime
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def generate_tree(root: str, **options) -> Dict:
+    """
+    Crea en root un árbol sintético y devuelve un resumen (parámetros, archivos, bytes).
+    Con la misma semilla el árbol generado es siempre el mismo.
+    """
+    options = {**DEFAULT_OPTIONS, **options}
+    rng = random.Random(options['seed'])
+    os.makedirs(root, exist_ok=True)
+
+    originals = []  # Archivos ya escritos (ruta, extensión), para poder duplicarlos
+    total_bytes = 0
+    duplicates = 0
+    jpegs = 0
+
+    for index in range(options['files']):
+        directory = os.path.join(root, _random_directory(rng, options['depth'], options['fanout']))
+        os.makedirs(directory, exist_ok=True)
+        date = _random_date(rng)
+
+        if originals and rng.random() < options['duplicate_ratio']:
+            source, extension = rng.choice(originals)
+            path = os.path.join(directory, f"file_{index:07d}{extension}")
+            shutil.copyfile(source, path)
+            duplicates += 1
+        else:
+            if rng.random() < options['jpeg_ratio']:
+                data, extension = _jpeg_bytes(rng, date), '.jpg'
+                jpegs += 1
+            else:
+                size = int(min(rng.lognormvariate(0, options['size_sigma']) * options['median_size'],
+                               options['max_size']))
+                data, extension = rng.randbytes(size), '.bin'
+            path = os.path.join(directory, f"file_{index:07d}{extension}")
+            with open(path, 'wb') as f:
+                f.write(data)
+            originals.append((path, extension))
+
+        timestamp = date.timestamp()
+        os.utime(path, (timestamp, timestamp))
+        total_bytes += os.path.getsize(path)
+
+    return {
+        'options': options,
+        'files': options['files'],
+        'bytes': total_bytes,
+        'duplicates': duplicates,
+        'jpegs': jpegs,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--files', type=int, default=DEFAULT_OPTIONS['files'])
+    parser.add_argument('--seed', type=int, default=DEFAULT_OPTIONS['seed'])
+    parser.add_argument('--median-size', type=int, default=DEFAULT_OPTIONS['median_size'])
+    parser.add_argument('--size-sigma', type=float, default=DEFAULT_OPTIONS['size_sigma'])
+    parser.add_argument('--max-size', type=int, default=DEFAULT_OPTIONS['max_size'])
+    parser.add_argument('--duplicate-ratio', type=float, default=DEFAULT_OPTIONS['duplicate_ratio'])
+    parser.add_argument('--jpeg-ratio', type=float, default=DEFAULT_OPTIONS['jpeg_ratio'])
+    parser.add_argument('--depth', type=int, default=DEFAULT_OPTIONS['depth'])
+    parser.add_argument('--fanout', type=int, default=DEFAULT_OPTIONS['fanout'])
+
+
+def options_from_args(args) -> Dict:
+    return {name: getattr(args, name) for name in DEFAULT_OPTIONS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    print(json.dumps(generate_tree(args.root, **options_from_args(args)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
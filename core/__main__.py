@@ -0,0 +1,304 @@
+"""
+Interfaz de línea de comandos sin Qt para servidores sin pantalla.
+
+    python -m core scan RUTA        Archivos agrupados por año/mes
+    python -m core dupes RUTA...    Grupos de archivos duplicados (varias raíces)
+    python -m core organize RUTA    Ordena los archivos por fecha
+    python -m core restore RUTA     Restaura la estructura original
+    python -m core manifest RUTA... -o ARCHIVO
+                                    Exporta el manifiesto de hashes
+    python -m core merge MANIFIESTO...
+                                    Duplicados entre varios manifiestos
+    python -m core chunks RUTA...   Contenido compartido entre archivos grandes
+
+Los resultados se escriben en stdout como JSON Lines (un objeto por línea).
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+
+from .scan_engine import DateScanner, DuplicateFinder
+from .file_organizer import FileOrganizer
+from .reorganization_planner import ReorganizationPlanner
+from .scan_metrics import ScanMetrics
+from .scan_profiler import PROFILE_ENV_VAR, ScanProfiler
+from .hash_manifest import HashManifest
+from .duplicate_stats import DuplicateStats
+from .chunk_analyzer import ChunkAnalyzer
+from .scan_rules import ScanRules
+from .io_governor import IOGovernor
+
+
+def _default(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def emit(record: dict):
+    sys.stdout.write(json.dumps(record, default=_default, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def emit_progress(percent: int):
+    emit({'type': 'progress', 'percent': percent})
+
+
+def emit_status(status: dict):
+    emit({'type': 'progress', **status})
+
+
+def progress_callback(args):
+    return emit_progress if args.progress else None
+
+
+def status_callback(args):
+    """El hashing informa en bytes, con velocidad, tiempo restante y archivo actual."""
+    return emit_status if args.progress else None
+
+
+def build_rules(args):
+    """Reglas del usuario con las opciones de la línea de comandos aplicadas encima."""
+    rules = ScanRules.load(args.rules)
+    if args.exclude_common:
+        rules.exclude_common = True
+    rules.exclude += args.exclude
+    rules.include += args.include
+    rules.extensions += ScanRules(extensions=args.ext).extensions
+    if args.min_size is not None:
+        rules.min_size = args.min_size
+    if args.max_size is not None:
+        rules.max_size = args.max_size
+    if args.skip_hidden:
+        rules.skip_hidden = rules.skip_system = True
+    if args.archives:
+        rules.scan_archives = True
+    return rules
+
+
+def build_governor(args):
+    """Límites de E/S del usuario con las opciones de la línea de comandos aplicadas encima."""
+    governor = IOGovernor.load(args.io_limits)
+    settings = governor.to_dict()
+    if args.max_mbps is not None:
+        settings['max_mb_per_second'] = args.max_mbps
+    if args.max_iops is not None:
+        settings['max_iops'] = args.max_iops
+    if args.idle_io:
+        settings['io_class'] = 'idle'
+    if args.nice is not None:
+        settings['nice'] = args.nice
+    if args.backoff:
+        settings['latency_backoff'] = True
+    if args.latency_target is not None:
+        settings['latency_target_ms'] = args.latency_target
+    return IOGovernor(**settings)
+
+
+def emit_skipped(scanner):
+    if scanner.skip_counts:
+        emit({'type': 'skipped', **scanner.skip_counts})
+
+
+def build_metrics(args):
+    if args.metrics:
+        return ScanMetrics(enabled=True)
+    return ScanMetrics.from_environment()
+
+
+def finish_metrics(args, metrics):
+    """Emite las métricas del run y las guarda en la carpeta de logs."""
+    if metrics.enabled:
+        emit({'type': 'metrics', 'file': metrics.dump_json(args.command), **metrics.snapshot()})
+
+
+def cmd_scan(args):
+    metrics = build_metrics(args)
+    scanner = DateScanner(args.path, progress_callback(args), metrics, build_rules(args))
+    total_files = 0
+    for year_month, rel_path, file_info in scanner.iter_files():
+        emit({'type': 'file', 'year_month': year_month, 'directory': rel_path, **file_info})
+        total_files += 1
+    emit_skipped(scanner)
+    emit({'type': 'summary', 'files': total_files})
+    finish_metrics(args, metrics)
+
+
+def cmd_dupes(args):
+    metrics = build_metrics(args)
+    finder = DuplicateFinder(args.path, metrics=metrics, rules=build_rules(args),
+                             status_callback=status_callback(args), use_mmap=args.mmap,
+                             resumable=args.resume)
+    duplicates = finder.run()
+    emit_skipped(finder)
+    # Primero las carpetas idénticas enteras, que suelen ser las que más espacio recuperan
+    for group in finder.folder_duplicates:
+        emit({'type': 'folder_group', **group})
+    # Grupos de más a menos espacio recuperable, con sus agregados
+    groups = DuplicateStats.by_reclaimable(duplicates)
+    for hash_val, group_stats in groups:
+        emit({'type': 'group', 'hash': hash_val, **duplicates[hash_val], **group_stats})
+    emit({'type': 'summary', **DuplicateStats.totals(dict(groups))})
+    finish_metrics(args, metrics)
+
+
+def cmd_manifest(args):
+    metrics = build_metrics(args)
+    finder = DuplicateFinder(args.path, metrics=metrics, hash_all=True, rules=build_rules(args),
+                             status_callback=status_callback(args), use_mmap=args.mmap,
+                             resumable=args.resume)
+    finder.run()
+    emit_skipped(finder)
+    records = HashManifest.write(finder.manifest_records, args.output, args.source)
+    emit({'type': 'summary', 'manifest': args.output, 'records': records})
+    finish_metrics(args, metrics)
+
+
+def cmd_chunks(args):
+    metrics = build_metrics(args)
+    analyzer = ChunkAnalyzer(args.path, metrics=metrics, rules=build_rules(args),
+                             status_callback=status_callback(args), min_file_size=args.min_file_size)
+    result = analyzer.run()
+    for pair in result.pop('pairs'):
+        emit({'type': 'pair', **pair})
+    emit({'type': 'summary', **result})
+    finish_metrics(args, metrics)
+
+
+def cmd_merge(args):
+    groups = 0
+    wasted_bytes = 0
+    for group in HashManifest.merge_duplicates(args.manifests):
+        size, file_hash = group[0][:2]
+        emit({'type': 'group', 'hash': file_hash, 'size': size,
+              'files': [{'path': path, 'mtime': mtime, 'source': source}
+                        for _, _, mtime, path, source in group]})
+        groups += 1
+        wasted_bytes += size * (len(group) - 1)
+    emit({'type': 'summary', 'groups': groups, 'wasted_bytes': wasted_bytes})
+
+
+def cmd_organize(args):
+    metrics = build_metrics(args)
+    scanner = DateScanner(args.path, progress_callback(args), metrics, build_rules(args))
+    files_by_date = scanner.run()
+    emit_skipped(scanner)
+    if args.dry_run:
+        emit({'type': 'plan', **ReorganizationPlanner.plan(files_by_date, args.path)})
+        return
+    FileOrganizer.reorganize_by_date(files_by_date, args.path, args.workers, args.verify, metrics)
+    emit({'type': 'summary', 'organized': sum(
+        len(files) for directories in files_by_date.values() for files in directories.values())})
+    finish_metrics(args, metrics)
+
+
+def cmd_restore(args):
+    metrics = build_metrics(args)
+    FileOrganizer.restore_original_structure(args.path, args.workers, args.verify, metrics)
+    emit({'type': 'summary', 'restored': args.path})
+    finish_metrics(args, metrics)
+
+
+def add_rule_arguments(parser):
+    group = parser.add_argument_group('reglas de escaneo')
+    group.add_argument('--rules', help='Archivo JSON de reglas (por defecto, el de la aplicación)')
+    group.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                       help='Excluir archivos o carpetas que coincidan (repetible)')
+    group.add_argument('--include', action='append', default=[], metavar='GLOB',
+                       help='Incluir solo archivos que coincidan (repetible)')
+    group.add_argument('--ext', action='append', default=[], metavar='EXT',
+                       help='Extensión permitida (repetible)')
+    group.add_argument('--min-size', type=int, default=None, help='Tamaño mínimo en bytes')
+    group.add_argument('--max-size', type=int, default=None, help='Tamaño máximo en bytes')
+    group.add_argument('--skip-hidden', action='store_true',
+                       help='Omitir archivos ocultos y de sistema')
+    group.add_argument('--exclude-common', action='store_true',
+                       help='Excluir .git, node_modules, cachés, papeleras, etc.')
+    group.add_argument('--archives', action='store_true',
+                       help='Recorrer también las entradas de los archivos ZIP y TAR')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m core', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--progress', action='store_true', help='Emitir registros de progreso')
+    parser.add_argument('--metrics', action='store_true', help='Medir fases y contadores del run')
+    parser.add_argument('--profile', action='store_true',
+                        help='Perfilar el run con cProfile y tracemalloc')
+    group = parser.add_argument_group('límites de E/S')
+    group.add_argument('--io-limits', help='Archivo JSON de límites (por defecto, el de la aplicación)')
+    group.add_argument('--max-mbps', type=float, default=None, help='Máximo de MB/s leídos o copiados')
+    group.add_argument('--max-iops', type=float, default=None, help='Máximo de operaciones por segundo')
+    group.add_argument('--idle-io', action='store_true',
+                       help='Prioridad de E/S ociosa: solo usar el disco cuando nadie más lo usa (Linux)')
+    group.add_argument('--nice', type=int, default=None, help='Nivel nice de los hilos de trabajo (Linux)')
+    group.add_argument('--backoff', action='store_true',
+                       help='Frenar cuando la latencia de E/S sube respecto a la habitual')
+    group.add_argument('--latency-target', type=float, default=None, metavar='MS',
+                       help='Frenar cuando la latencia media supere estos milisegundos')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan_parser = subparsers.add_parser('scan', help='Agrupar archivos por fecha')
+    scan_parser.add_argument('path')
+    add_rule_arguments(scan_parser)
+    scan_parser.set_defaults(func=cmd_scan)
+
+    dupes_parser = subparsers.add_parser('dupes', help='Buscar archivos duplicados')
+    dupes_parser.add_argument('path', nargs='+', help='Una o varias raíces')
+    add_rule_arguments(dupes_parser)
+    dupes_parser.add_argument('--mmap', action='store_true', help='Leer los archivos muy grandes con mmap')
+    dupes_parser.add_argument('--resume', action='store_true',
+                              help='Guardar el progreso y reanudar un escaneo interrumpido')
+    dupes_parser.set_defaults(func=cmd_dupes)
+
+    manifest_parser = subparsers.add_parser('manifest', help='Exportar el manifiesto de hashes')
+    manifest_parser.add_argument('path', nargs='+', help='Una o varias raíces')
+    manifest_parser.add_argument('-o', '--output', required=True, help='Archivo del manifiesto')
+    manifest_parser.add_argument('--source', help='Nombre de la máquina o volumen (por defecto, el host)')
+    add_rule_arguments(manifest_parser)
+    manifest_parser.add_argument('--mmap', action='store_true', help='Leer los archivos muy grandes con mmap')
+    manifest_parser.add_argument('--resume', action='store_true',
+                                 help='Guardar el progreso y reanudar un escaneo interrumpido')
+    manifest_parser.set_defaults(func=cmd_manifest)
+
+    chunks_parser = subparsers.add_parser('chunks', help='Contenido compartido entre archivos grandes')
+    chunks_parser.add_argument('path', nargs='+', help='Una o varias raíces')
+    chunks_parser.add_argument('--min-file-size', type=int, default=None,
+                               help='Tamaño mínimo de los archivos analizados (por defecto, 1 MB)')
+    add_rule_arguments(chunks_parser)
+    chunks_parser.set_defaults(func=cmd_chunks)
+
+    merge_parser = subparsers.add_parser('merge', help='Buscar duplicados entre manifiestos')
+    merge_parser.add_argument('manifests', nargs='+')
+    merge_parser.set_defaults(func=cmd_merge)
+
+    for name, func, help_text in (('organize', cmd_organize, 'Ordenar por fecha'),
+                                  ('restore', cmd_restore, 'Restaurar la estructura original')):
+        move_parser = subparsers.add_parser(name, help=help_text)
+        move_parser.add_argument('path')
+        move_parser.add_argument('--workers', type=int, default=None,
+                                 help='Copias simultáneas entre dispositivos')
+        move_parser.add_argument('--verify', action='store_true',
+                                 help='Verificar el hash antes de borrar el origen')
+        move_parser.set_defaults(func=func)
+    subparsers.choices['organize'].add_argument('--dry-run', action='store_true',
+                                                help='Solo estimar el coste, sin mover archivos')
+    add_rule_arguments(subparsers.choices['organize'])
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        os.environ[PROFILE_ENV_VAR] = "1"
+    governor = build_governor(args)
+    IOGovernor.set_default(governor)
+    governor.apply_priority()
+    with ScanProfiler.from_environment(args.command):
+        args.func(args)
+
+
+if __name__ == '__main__':
+    main()
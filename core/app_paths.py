@@ -0,0 +1,24 @@
+import os
+
+APP_DIR_NAME = ".organizador_archivos"
+
+
+def get_app_dir() -> str:
+    """Carpeta de datos de la aplicación en el home del usuario."""
+    path = os.path.join(os.path.expanduser("~"), APP_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_logs_dir() -> str:
+    """Carpeta donde se guardan métricas, perfiles y demás registros."""
+    path = os.path.join(get_app_dir(), "logs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_cache_dir() -> str:
+    """Carpeta para cachés y resultados persistentes."""
+    path = os.path.join(get_app_dir(), "cache")
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,133 @@
+import datetime
+import os
+import tarfile
+import zipfile
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+# Las entradas de un archivo comprimido se identifican como "copia.zip!/fotos/img.jpg"
+ARCHIVE_SEPARATOR = '!/'
+
+ZIP_EXTENSIONS = ('.zip',)
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+class ArchiveMember(NamedTuple):
+    path: str   # Ruta virtual: archivo!/entrada
+    name: str
+    size: int
+    mtime: float
+
+
+class ArchiveReader:
+    """
+    Lectura en streaming de las entradas de archivos ZIP y TAR, sin
+    extraerlas a disco. Los TAR comprimidos solo se pueden leer en orden,
+    así que todas las operaciones recorren el archivo una sola vez.
+    """
+
+    @staticmethod
+    def is_archive(path: str) -> bool:
+        lower_path = path.lower()
+        return lower_path.endswith(ZIP_EXTENSIONS) or lower_path.endswith(TAR_EXTENSIONS)
+
+    @staticmethod
+    def is_virtual(path: str) -> bool:
+        """
+        True si path es una entrada de un archivo comprimido existente. Un
+        nombre de carpeta o de archivo normal también puede contener "!/".
+        """
+        return ArchiveReader._archive_prefix(path) is not None
+
+    @staticmethod
+    def _archive_prefix(path: str) -> Optional[int]:
+        """Posición del separador que sigue a un archivo comprimido existente, o None."""
+        index = path.find(ARCHIVE_SEPARATOR)
+        while index != -1:
+            archive_path = path[:index]
+            if ArchiveReader.is_archive(archive_path) and os.path.isfile(archive_path):
+                return index
+            index = path.find(ARCHIVE_SEPARATOR, index + 1)
+        return None
+
+    @staticmethod
+    def virtual_path(archive_path: str, member_name: str) -> str:
+        return f"{archive_path}{ARCHIVE_SEPARATOR}{ArchiveReader._member_key(member_name)}"
+
+    @staticmethod
+    def _member_key(member_name: str) -> str:
+        return member_name.lstrip('/')
+
+    @staticmethod
+    def split_virtual_path(path: str) -> Tuple[str, str]:
+        """(archivo, entrada) de una ruta virtual."""
+        index = ArchiveReader._archive_prefix(path)
+        if index is None:
+            raise ValueError(f"Not an archive member: {path}")
+        return path[:index], path[index + len(ARCHIVE_SEPARATOR):]
+
+    @staticmethod
+    def iter_members(archive_path: str) -> Iterator[ArchiveMember]:
+        """Entradas de tipo archivo, sin leer su contenido."""
+        for member, _ in ArchiveReader.iter_streams(archive_path, open_streams=False):
+            yield member
+
+    @staticmethod
+    def iter_streams(archive_path: str, wanted: Optional[Iterable[str]] = None,
+                     open_streams: bool = True) -> Iterator[Tuple[ArchiveMember, Optional[BinaryIO]]]:
+        """
+        Devuelve (entrada, flujo de lectura) en el orden del archivo. Si se
+        indica wanted (nombres de entrada, como en la ruta virtual), solo esas.
+        Cada flujo debe leerse antes de pedir la siguiente entrada.
+        """
+        wanted = {ArchiveReader._member_key(name) for name in wanted} if wanted is not None else None
+        if archive_path.lower().endswith(ZIP_EXTENSIONS):
+            yield from ArchiveReader._iter_zip(archive_path, wanted, open_streams)
+        else:
+            yield from ArchiveReader._iter_tar(archive_path, wanted, open_streams)
+
+    @staticmethod
+    def _iter_zip(archive_path: str, wanted, open_streams: bool):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or (wanted is not None and ArchiveReader._member_key(info.filename) not in wanted):
+                    continue
+                member = ArchiveMember(
+                    ArchiveReader.virtual_path(archive_path, info.filename),
+                    os.path.basename(info.filename.rstrip('/')),
+                    info.file_size,
+                    datetime.datetime(*info.date_time).timestamp())
+                if not open_streams:
+                    yield member, None
+                    continue
+                with archive.open(info) as stream:
+                    yield member, stream
+
+    @staticmethod
+    def _iter_tar(archive_path: str, wanted, open_streams: bool):
+        # Modo "r|*": lectura secuencial, también para tar.gz/bz2/xz
+        with tarfile.open(archive_path, mode='r|*') as archive:
+            for info in archive:
+                if not info.isfile() or (wanted is not None and ArchiveReader._member_key(info.name) not in wanted):
+                    continue
+                member = ArchiveMember(
+                    ArchiveReader.virtual_path(archive_path, info.name),
+                    os.path.basename(info.name),
+                    info.size,
+                    float(info.mtime))
+                if not open_streams:
+                    yield member, None
+                    continue
+                stream = archive.extractfile(info)
+                try:
+                    yield member, stream
+                finally:
+                    stream.close()
+
+    @staticmethod
+    def open_member(path: str) -> Iterator[Tuple[ArchiveMember, BinaryIO]]:
+        """
+        (entrada, flujo) de una ruta virtual, para consultas sueltas como la
+        fecha. Para muchas entradas del mismo archivo es mejor iter_streams.
+        """
+        archive_path, member_name = ArchiveReader.split_virtual_path(path)
+        return ArchiveReader.iter_streams(archive_path, [member_name])
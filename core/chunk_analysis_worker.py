@@ -0,0 +1,28 @@
+import sys
+from PyQt5.QtCore import QThread, pyqtSignal
+from .chunk_analyzer import ChunkAnalyzer
+from .io_governor import IOGovernor
+from .scan_metrics import ScanMetrics
+from .scan_profiler import ScanProfiler
+
+class ChunkAnalysisWorker(QThread):
+    finished = pyqtSignal(dict)
+    progress = pyqtSignal(int)
+    status = pyqtSignal(dict)  # Bytes, velocidad, tiempo restante y archivo actual
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.metrics = ScanMetrics.from_environment()
+
+    def run(self):
+        IOGovernor.default().apply_priority()
+        analyzer = ChunkAnalyzer(self.path, self.progress.emit, self.metrics,
+                                 status_callback=self.status.emit)
+        with ScanProfiler.from_environment('chunk_analysis'):
+            try:
+                result = analyzer.run()
+            except OSError as e:
+                print(f"Error analyzing shared chunks: {e}", file=sys.stderr)
+                result = {}
+        self.finished.emit(result)
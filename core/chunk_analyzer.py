@@ -0,0 +1,230 @@
+import hashlib
+import heapq
+import itertools
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .io_governor import IOGovernor, IOSession
+from .progress import ProgressCallback, ProgressTracker, StatusCallback
+from .scan_metrics import ScanMetrics
+from .scan_rules import ScanRules
+
+# hash del bloque, id del archivo, tamaño del bloque
+CHUNK_RECORD = struct.Struct("<16sII")
+
+KB = 1024
+
+
+class ContentChunker:
+    """
+    Troceado definido por el contenido: los cortes dependen de los bytes
+    cercanos y no de la posición, así que insertar o quitar datos solo
+    cambia los bloques afectados. Un hash rodante byte a byte es demasiado
+    lento en Python puro, así que se buscan bytes ancla con bytes.find (en C)
+    y solo en ellos se evalúa el hash de la ventana anterior.
+    """
+    MIN_SIZE = 16 * KB
+    MAX_SIZE = 256 * KB
+    WINDOW = 48
+    ANCHOR = b'\x8f'  # ~1/256 en datos binarios; en texto ASCII no aparece y se corta por MAX_SIZE
+    MASK = 0xff       # Tamaño medio de bloque de unos 64 KB en datos binarios
+    READ_SIZE = 1024 * KB
+
+    @staticmethod
+    def _find_cut(data: bytearray, start: int, final: bool) -> Optional[int]:
+        """Posición de corte del bloque que empieza en start, o None si faltan datos."""
+        limit = start + ContentChunker.MAX_SIZE
+        end = min(limit, len(data))
+        position = start + ContentChunker.MIN_SIZE
+        view = memoryview(data)
+        try:
+            while position < end:
+                anchor = data.find(ContentChunker.ANCHOR, position, end)
+                if anchor == -1:
+                    break
+                window = view[anchor - ContentChunker.WINDOW:anchor]
+                if zlib.crc32(window) & ContentChunker.MASK == 0:
+                    return anchor + 1
+                position = anchor + 1
+        finally:
+            view.release()
+        if len(data) >= limit:
+            return limit
+        return len(data) if final and len(data) > start else None
+
+    @staticmethod
+    def iter_chunks(filepath: str, on_block=None, io: Optional[IOSession] = None) -> Iterator[Tuple[bytes, int]]:
+        """Devuelve (hash, tamaño) de cada bloque, leyendo el archivo por tramos."""
+        data = bytearray()
+        start = 0
+        final = False
+        with open(filepath, 'rb') as f:
+            while not final:
+                read_start = time.perf_counter()
+                block = f.read(ContentChunker.READ_SIZE)
+                if io is not None:
+                    io.observe(time.perf_counter() - read_start, len(block))
+                    io.acquire(len(block))
+                final = not block
+                data += block
+                if on_block and block:
+                    on_block(len(block))
+                while True:
+                    cut = ContentChunker._find_cut(data, start, final)
+                    if cut is None:
+                        break
+                    yield hashlib.blake2b(memoryview(data)[start:cut], digest_size=16).digest(), cut - start
+                    start = cut
+                # Se descartan los bloques ya emitidos para no acumular el archivo en memoria
+                del data[:start]
+                start = 0
+
+
+class ChunkAnalyzer:
+    """
+    Analiza cuánto contenido comparten archivos grandes que no son
+    duplicados exactos (imágenes de máquinas virtuales, logs ampliados,
+    vídeos reexportados). El índice de bloques se ordena en disco por
+    tramos, de modo que la memoria no crece con el tamaño del árbol.
+    """
+    MIN_FILE_SIZE = 1024 * KB
+    SORT_CHUNK_RECORDS = 500_000  # Registros por tramo al ordenar en disco (~12 MB)
+    MAX_GROUP_FILES = 32          # Bloques repetidos en más archivos no cuentan por parejas
+    TOP_PAIRS = 100
+
+    def __init__(self, path: Union[str, Iterable[str]], progress_callback: ProgressCallback = None,
+                 metrics: Optional[ScanMetrics] = None, rules: Optional[ScanRules] = None,
+                 status_callback: StatusCallback = None, min_file_size: Optional[int] = None,
+                 governor: Optional[IOGovernor] = None):
+        self.roots = [path] if isinstance(path, str) else list(path)
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        self.metrics = metrics or ScanMetrics()
+        self.io = (governor or IOGovernor.default()).session(self.metrics)
+        self.matcher = (rules or ScanRules.load()).compile()
+        self.min_file_size = self.MIN_FILE_SIZE if min_file_size is None else min_file_size
+
+    def list_files(self) -> List[Tuple[str, int]]:
+        files = []
+        with self.metrics.phase('list'):
+            for root in self.roots:
+                for _, entries in self.matcher.walk(root, io=self.io):
+                    for entry in entries:
+                        try:
+                            size = entry.stat().st_size
+                        except OSError as e:
+                            print(f"Error accessing {entry.path}: {e}", file=sys.stderr)
+                            continue
+                        if size >= self.min_file_size:
+                            files.append((entry.path, size))
+        return files
+
+    def run(self) -> Dict:
+        """
+        Devuelve {'files', 'total_bytes', 'unique_bytes', 'saved_bytes', 'chunks', 'pairs'}.
+        saved_bytes es lo que ahorraría un almacén que guardara cada bloque una vez;
+        pairs, las parejas de archivos que más bytes comparten.
+        """
+        files = self.list_files()
+        tracker = ProgressTracker(sum(size for _, size in files), len(files),
+                                  self.progress_callback, self.status_callback)
+        runs = []
+        try:
+            total_chunks = self._index_chunks(files, tracker, runs)
+            tracker.finish()
+            with self.metrics.phase('index'):
+                result = self._merge_runs(runs, files)
+        finally:
+            for run in runs:
+                os.unlink(run)
+        result['chunks'] = total_chunks
+        self.io.record_metrics()
+        return result
+
+    def _index_chunks(self, files: List[Tuple[str, int]], tracker: ProgressTracker, runs: List[str]) -> int:
+        records = []
+        total_chunks = 0
+        for file_id, (path, _) in enumerate(files):
+            tracker.start_file(path)
+            try:
+                with self.metrics.phase('chunk'):
+                    for digest, size in ContentChunker.iter_chunks(path, tracker.advance, self.io):
+                        records.append((digest, file_id, size))
+                        total_chunks += 1
+                        if len(records) >= self.SORT_CHUNK_RECORDS:
+                            runs.append(ChunkAnalyzer._write_run(records))
+                            records = []
+            except OSError as e:
+                print(f"Error reading {path}: {e}", file=sys.stderr)
+            tracker.finish_file()
+        if records:
+            runs.append(ChunkAnalyzer._write_run(records))
+        self.metrics.count('chunks', total_chunks)
+        return total_chunks
+
+    @staticmethod
+    def _write_run(records: List[tuple]) -> str:
+        records.sort()
+        fd, run_path = tempfile.mkstemp(prefix='chunk_run_', suffix='.bin')
+        with os.fdopen(fd, 'wb') as f:
+            for record in records:
+                f.write(CHUNK_RECORD.pack(*record))
+        return run_path
+
+    @staticmethod
+    def _read_run(run_path: str) -> Iterator[tuple]:
+        with open(run_path, 'rb') as f:
+            while True:
+                block = f.read(CHUNK_RECORD.size * 4096)
+                if not block:
+                    return
+                yield from CHUNK_RECORD.iter_unpack(block)
+
+    def _merge_runs(self, runs: List[str], files: List[Tuple[str, int]]) -> Dict:
+        """Recorre el índice ordenado por hash y acumula el contenido compartido."""
+        total_bytes = 0
+        unique_bytes = 0
+        shared_by_pair = {}
+        merged = heapq.merge(*(ChunkAnalyzer._read_run(run) for run in runs))
+        for _, group in itertools.groupby(merged, key=lambda record: record[0]):
+            counts = {}
+            size = 0
+            for _, file_id, size in group:
+                counts[file_id] = counts.get(file_id, 0) + 1
+                total_bytes += size
+            unique_bytes += size
+            if 1 < len(counts) <= self.MAX_GROUP_FILES:
+                for a, b in itertools.combinations(sorted(counts), 2):
+                    shared_by_pair[(a, b)] = shared_by_pair.get((a, b), 0) + size * min(counts[a], counts[b])
+
+        top_pairs = heapq.nlargest(self.TOP_PAIRS, shared_by_pair.items(), key=lambda item: item[1])
+        return {
+            'files': len(files),
+            'total_bytes': total_bytes,
+            'unique_bytes': unique_bytes,
+            'saved_bytes': total_bytes - unique_bytes,
+            'pairs': [{
+                'a': files[a][0],
+                'b': files[b][0],
+                'a_size': files[a][1],
+                'b_size': files[b][1],
+                'shared_bytes': shared,
+            } for (a, b), shared in top_pairs],
+        }
+
+    @staticmethod
+    def format_report(result: Dict, max_pairs: int = 10) -> str:
+        mb = 1024 * 1024
+        lines = [
+            f"Archivos analizados: {result['files']} ({result['total_bytes'] / mb:.1f} MB)",
+            f"Ahorro con deduplicación por bloques: {result['saved_bytes'] / mb:.1f} MB",
+        ]
+        for pair in result['pairs'][:max_pairs]:
+            ratio = pair['shared_bytes'] * 100 / max(min(pair['a_size'], pair['b_size']), 1)
+            lines.append(f"{pair['shared_bytes'] / mb:.1f} MB ({ratio:.0f}%): "
+                         f"{os.path.basename(pair['a'])} ↔ {os.path.basename(pair['b'])}")
+        return "\n".join(lines)
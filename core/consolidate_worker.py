@@ -0,0 +1,32 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from .file_consolidator import FileConsolidator
+from .hash_reader import HashReader
+from .io_governor import IOGovernor
+
+class ConsolidateWorker(QThread):
+    finished = pyqtSignal(dict)
+    progress = pyqtSignal(int)
+
+    def __init__(self, groups, mode="auto"):
+        super().__init__()
+        self.groups = groups
+        self.mode = mode
+
+    def run(self):
+        governor = IOGovernor.default()
+        governor.apply_priority()
+        io = governor.session()
+        reader = HashReader(io=io)
+        result = {'linked': [], 'changed': [], 'cross_device': [], 'reclaimed_bytes': 0, 'errors': {}}
+        total_groups = len(self.groups)
+
+        for processed_groups, group in enumerate(self.groups, start=1):
+            group_result = FileConsolidator.consolidate([group], self.mode, io, reader)
+            result['linked'].extend(group_result['linked'])
+            result['changed'].extend(group_result['changed'])
+            result['cross_device'].extend(group_result['cross_device'])
+            result['reclaimed_bytes'] += group_result['reclaimed_bytes']
+            result['errors'].update(group_result['errors'])
+            self.progress.emit(int(processed_groups * 100 / total_groups))
+
+        self.finished.emit(result)
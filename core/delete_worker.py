@@ -0,0 +1,20 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from .file_deleter import FileDeleter
+from .io_governor import IOGovernor
+
+class DeleteWorker(QThread):
+    finished = pyqtSignal(dict)
+    progress = pyqtSignal(int)
+
+    def __init__(self, file_paths, use_trash=True):
+        super().__init__()
+        self.file_paths = file_paths
+        self.use_trash = use_trash
+
+    def run(self):
+        governor = IOGovernor.default()
+        governor.apply_priority()
+        result = FileDeleter.delete(self.file_paths, self.use_trash,
+                                    progress_callback=self.progress.emit,
+                                    io=governor.session())
+        self.finished.emit(result)
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+from .file_metadata import FileMetadata
+from .io_governor import IOGovernor
+from .scan_metrics import ScanMetrics
+from .scan_rules import ScanRules
+
+# Devuelve True cuando hay que dejar de precargar (la interfaz vuelve a necesitar el disco)
+StopCallback = Optional[Callable[[], bool]]
+
+
+class DirectoryPrefetcher:
+    """
+    Precarga especulativa de las carpetas a las que probablemente irá el
+    usuario: las de Atrás y Adelante en el historial y las subcarpetas de la
+    actual, de la modificada más recientemente a la más antigua. Listar y
+    hacer stat deja las entradas en la caché del sistema, y las fechas EXIF
+    quedan en la caché de FileMetadata, así que la vista por fechas o de
+    duplicados de la siguiente carpeta empieza con los datos calientes.
+    Trabaja con prioridad de E/S ociosa y dentro de un presupuesto de
+    carpetas, archivos y tiempo. No depende de Qt.
+    """
+    MAX_DIRECTORIES = 64
+    MAX_FILES = 20_000
+    MAX_SECONDS = 10.0
+    MAX_CHILDREN = 16      # Subcarpetas de la carpeta actual que se toman como candidatas
+    MAX_WARM = 4096        # Carpetas recordadas como ya precargadas
+    IDLE_MB_PER_SECOND = 8
+    IDLE_IOPS = 300
+
+    def __init__(self, rules: Optional[ScanRules] = None, governor: Optional[IOGovernor] = None):
+        self.matcher = (rules or ScanRules.load()).compile()
+        self.governor = governor or DirectoryPrefetcher.idle_governor()
+        self._warm: Dict[str, float] = {}  # carpeta -> mtime cuando se precargó
+
+    @staticmethod
+    def idle_governor() -> IOGovernor:
+        """Prioridad ociosa y un presupuesto propio, nunca mayor que los límites del usuario."""
+        limits = IOGovernor.default()
+        return IOGovernor(
+            max_mb_per_second=min(filter(None, (limits.max_mb_per_second,
+                                                DirectoryPrefetcher.IDLE_MB_PER_SECOND))),
+            max_iops=min(filter(None, (limits.max_iops, DirectoryPrefetcher.IDLE_IOPS))),
+            io_class='idle', nice=19, latency_backoff=True)
+
+    def candidates(self, current: str, neighbours: Iterable[str]) -> List[str]:
+        """Carpetas por orden de probabilidad: primero el historial, luego las subcarpetas."""
+        candidates = [path for path in neighbours if path and path != current]
+        children = []
+        try:
+            with os.scandir(current) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False) and self.matcher.allow_directory(entry):
+                            children.append((entry.stat(follow_symlinks=False).st_mtime, entry.path))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Error listing {current}: {e}", file=sys.stderr)
+        children.sort(reverse=True)
+        candidates.extend(path for _, path in children[:self.MAX_CHILDREN])
+        return candidates
+
+    def run(self, current: str, neighbours: Iterable[str] = (), metrics: Optional[ScanMetrics] = None,
+            should_stop: StopCallback = None) -> Dict:
+        """
+        Precarga las candidatas en anchura hasta agotar el presupuesto o hasta
+        que should_stop lo pida. Devuelve las carpetas y archivos precargados.
+        """
+        metrics = metrics or ScanMetrics()
+        io = self.governor.session(metrics)
+        deadline = time.monotonic() + self.MAX_SECONDS
+        pending = deque(self.candidates(current, neighbours))
+        directories = files = 0
+
+        while pending and directories < self.MAX_DIRECTORIES and files < self.MAX_FILES:
+            if time.monotonic() > deadline or (should_stop and should_stop()):
+                break
+            directory = pending.popleft()
+            io.acquire()
+            try:
+                directory_mtime = os.stat(directory).st_mtime
+                if self._warm.get(directory) == directory_mtime:
+                    metrics.count('prefetch_already_warm')
+                    continue
+                with metrics.phase('prefetch_list'):
+                    with os.scandir(directory) as iterator:
+                        entries = list(iterator)
+            except OSError:
+                continue
+            directories += 1
+
+            for entry in entries:
+                if should_stop and should_stop():
+                    break
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.matcher.allow_directory(entry):
+                            pending.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    io.acquire()
+                    stat = entry.stat()
+                    files += 1
+                    if (entry.name.lower().endswith(('.jpg', '.jpeg')) and
+                            self.matcher.allow_file(entry, stat.st_size)):
+                        # Solo se lee la cabecera, pero se cobra entera por no saber cuánto lee PIL
+                        io.acquire(min(stat.st_size, FileMetadata.EXIF_HEADER_BYTES))
+                        with metrics.phase('prefetch_date'):
+                            FileMetadata.get_file_date(entry.path, metrics)
+                except OSError:
+                    continue
+            else:
+                if len(self._warm) >= self.MAX_WARM:
+                    self._warm.clear()
+                self._warm[directory] = directory_mtime
+
+        metrics.count('prefetch_dirs', directories)
+        metrics.count('prefetch_files', files)
+        io.record_metrics()
+        return {'directories': directories, 'files': files}
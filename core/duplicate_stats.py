@@ -0,0 +1,46 @@
+from typing import Dict, List, Tuple
+
+
+class DuplicateStats:
+    """
+    Datos agregados de cada grupo de duplicados, calculados una sola vez por
+    resultado: copias, espacio desperdiciado (tamaño × (copias − 1), sin
+    contar las copias ya consolidadas en enlaces) y fechas del archivo más
+    antiguo y más reciente.
+    """
+
+    @staticmethod
+    def group_stats(data: Dict) -> Dict:
+        files = data['files']
+        dates = [file_info['date'] for file_info in files]
+        copies = len(files)
+        linked = sum(1 for file_info in files if file_info.get('linked'))
+        return {
+            'size': data['size'],
+            'copies': copies,
+            'wasted': data['size'] * max(copies - 1 - linked, 0),
+            'oldest': min(dates) if dates else None,
+            'newest': max(dates) if dates else None,
+        }
+
+    @staticmethod
+    def summarize(duplicates: Dict) -> Dict[str, Dict]:
+        """{hash: estadísticas} para todos los grupos con al menos dos archivos."""
+        return {
+            file_hash: DuplicateStats.group_stats(data)
+            for file_hash, data in duplicates.items() if len(data['files']) > 1
+        }
+
+    @staticmethod
+    def by_reclaimable(duplicates: Dict) -> List[Tuple[str, Dict]]:
+        """Grupos ordenados de más a menos espacio recuperable."""
+        return sorted(DuplicateStats.summarize(duplicates).items(),
+                      key=lambda item: item[1]['wasted'], reverse=True)
+
+    @staticmethod
+    def totals(stats: Dict[str, Dict]) -> Dict:
+        return {
+            'groups': len(stats),
+            'copies': sum(group['copies'] for group in stats.values()),
+            'wasted_bytes': sum(group['wasted'] for group in stats.values()),
+        }
@@ -0,0 +1,203 @@
+import os
+import uuid
+from typing import Dict, List, Optional, Tuple
+from .hash_reader import HashReader
+from .io_governor import IOSession
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# (inodo, tamaño, mtime en ns): si cambia, el archivo ya no es el que se comparó
+FileSignature = Tuple[int, int, int]
+
+
+class FileChangedError(OSError):
+    """El archivo cambió desde que se comprobó que era un duplicado."""
+
+
+class FileConsolidator:
+    """
+    Sustituye los archivos duplicados por enlaces a una única copia,
+    liberando espacio sin romper las rutas existentes.
+    """
+    FICLONE = 0x40049409  # _IOW(0x94, 9, int), reflink en btrfs/XFS
+
+    @staticmethod
+    def signature(path: str) -> FileSignature:
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def link_file(kept_path: str, duplicate_path: str, mode: str = "auto",
+                  expected: Optional[Dict[str, FileSignature]] = None) -> str:
+        """
+        Reemplaza duplicate_path por un reflink o un hardlink de kept_path.
+        El reemplazo es atómico: se crea un nombre temporal y luego se renombra.
+        Si se indica expected ({ruta: firma}), justo antes de renombrar se
+        comprueba que ninguno de los dos archivos ha cambiado y, si lo ha
+        hecho, se lanza FileChangedError sin tocar el duplicado.
+        Devuelve el tipo de enlace utilizado ("reflink" o "hardlink").
+        """
+        if os.path.samefile(kept_path, duplicate_path):
+            return "hardlink"  # Ya comparten el mismo inodo
+
+        directory = os.path.dirname(duplicate_path)
+        temp_path = os.path.join(directory, f".{os.path.basename(duplicate_path)}.{uuid.uuid4().hex}.tmp")
+
+        try:
+            link_type = None
+            if mode in ("auto", "reflink"):
+                if FileConsolidator._reflink(kept_path, temp_path):
+                    link_type = "reflink"
+                elif mode == "reflink":
+                    raise OSError(f"Reflink no soportado para {duplicate_path}")
+            if link_type is None:
+                os.link(kept_path, temp_path)
+                link_type = "hardlink"
+
+            for path, path_signature in (expected or {}).items():
+                if FileConsolidator.signature(path) != path_signature:
+                    raise FileChangedError(f"El archivo ha cambiado: {path}")
+            os.replace(temp_path, duplicate_path)
+            return link_type
+        except BaseException:
+            if os.path.lexists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    @staticmethod
+    def consolidate(groups: List[Dict], mode: str = "auto", io: Optional[IOSession] = None,
+                    reader: Optional[HashReader] = None) -> Dict:
+        """
+        Consolida una lista de grupos {'keep': ruta, 'duplicates': [rutas],
+        'hash': SHA-256}. Un enlace no puede cruzar dispositivos: los grupos
+        se separan por dispositivo y en cada uno se conserva el primero de la
+        lista; los archivos sin otra copia en su dispositivo se devuelven en
+        'cross_device'. Antes de enlazar se vuelve a calcular el hash de
+        cada archivo; los que ya no coinciden con el del grupo, o cambian
+        mientras se enlazan, se dejan como están y se devuelven en 'changed'.
+        Devuelve los archivos enlazados, los bytes recuperados y los errores.
+        """
+        linked = []
+        changed = []
+        errors = {}
+        reclaimed_bytes = 0
+        reader = reader or HashReader(io=io)
+        groups, cross_device = FileConsolidator.split_by_device(groups, errors)
+
+        for group in groups:
+            kept_path = group['keep']
+            expected_hash = group.get('hash')
+            try:
+                kept_signature = FileConsolidator._verified_signature(kept_path, expected_hash, reader)
+            except OSError as e:
+                errors[kept_path] = str(e)
+                continue
+            if kept_signature is None:
+                changed.extend(group['duplicates'])  # El que se conserva ya no es una copia
+                continue
+
+            for duplicate_path in group['duplicates']:
+                if io is not None:
+                    io.acquire(ops=3)  # stat, enlace temporal y renombrado
+                try:
+                    stat = os.stat(duplicate_path)
+                    duplicate_signature = FileConsolidator._verified_signature(
+                        duplicate_path, expected_hash, reader)
+                    if duplicate_signature is None:
+                        changed.append(duplicate_path)
+                        continue
+                    FileConsolidator.link_file(kept_path, duplicate_path, mode, {
+                        kept_path: kept_signature,
+                        duplicate_path: duplicate_signature
+                    })
+                    linked.append(duplicate_path)
+                    # Solo se libera espacio si el duplicado no tenía otros enlaces
+                    if stat.st_nlink == 1:
+                        reclaimed_bytes += stat.st_size
+                except FileChangedError:
+                    changed.append(duplicate_path)
+                except Exception as e:
+                    errors[duplicate_path] = str(e)
+
+        return {
+            'linked': linked,
+            'changed': changed,
+            'cross_device': cross_device,
+            'reclaimed_bytes': reclaimed_bytes,
+            'errors': errors
+        }
+
+    @staticmethod
+    def split_by_device(groups: List[Dict], errors: Dict[str, str]) -> Tuple[List[Dict], List[str]]:
+        """
+        Divide cada grupo en uno por dispositivo (st_dev), conservando el
+        orden de sus archivos. Devuelve los grupos con al menos dos archivos
+        y las rutas que se quedan solas en su dispositivo; las que no se
+        pueden consultar se añaden a errors.
+        """
+        split_groups = []
+        alone = []
+        for group in groups:
+            by_device = {}
+            for path in [group['keep']] + list(group['duplicates']):
+                try:
+                    device = os.stat(path).st_dev
+                except OSError as e:
+                    errors[path] = str(e)
+                    continue
+                by_device.setdefault(device, []).append(path)
+            for paths in by_device.values():
+                if len(paths) < 2:
+                    alone.extend(paths)
+                else:
+                    split_groups.append({**group, 'keep': paths[0], 'duplicates': paths[1:]})
+        return split_groups, alone
+
+    @staticmethod
+    def _verified_signature(path: str, expected_hash: Optional[str],
+                            reader: HashReader) -> Optional[FileSignature]:
+        """
+        Firma del archivo si su contenido sigue teniendo expected_hash (o si
+        no se indica hash); None si cambió antes o durante el cálculo.
+        """
+        signature = FileConsolidator.signature(path)
+        if expected_hash is None:
+            return signature
+        if reader.hash_file(path) != expected_hash or FileConsolidator.signature(path) != signature:
+            return None
+        return signature
+
+    @staticmethod
+    def _reflink(source: str, target: str) -> bool:
+        """
+        Intenta crear target como reflink de source mediante FICLONE.
+        """
+        if fcntl is None:
+            return False
+
+        src_fd = os.open(source, os.O_RDONLY)
+        try:
+            dst_fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except OSError:
+            os.close(src_fd)
+            raise
+
+        try:
+            fcntl.ioctl(dst_fd, FileConsolidator.FICLONE, src_fd)
+            cloned = True
+        except OSError:
+            cloned = False
+        finally:
+            os.close(src_fd)
+            os.close(dst_fd)
+
+        if cloned:
+            stat = os.stat(source)
+            os.chmod(target, stat.st_mode & 0o7777)
+            os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        else:
+            os.unlink(target)
+        return cloned
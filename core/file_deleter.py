@@ -0,0 +1,96 @@
+import os
+import platform
+from typing import Callable, Dict, List, Optional
+from .io_governor import IOSession
+
+
+class FileDeleter:
+    """
+    Elimina archivos por lotes, enviándolos a la papelera o borrándolos.
+    """
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def delete(file_paths: List[str], use_trash: bool = True, batch_size: Optional[int] = None,
+               progress_callback: Optional[Callable[[int], None]] = None,
+               io: Optional[IOSession] = None) -> Dict:
+        """
+        Elimina file_paths en lotes de batch_size.
+        Devuelve las rutas eliminadas y los errores por ruta.
+        Con io, cada borrado cuenta como una operación del presupuesto de E/S.
+        """
+        batch_size = batch_size or FileDeleter.BATCH_SIZE
+        deleted = []
+        errors = {}
+        total_files = len(file_paths)
+
+        for start in range(0, total_files, batch_size):
+            batch = []
+            for file_path in file_paths[start:start + batch_size]:
+                if os.path.lexists(file_path):
+                    batch.append(file_path)
+                else:
+                    errors[file_path] = 'El archivo no existe'
+
+            if io is not None and batch:
+                io.acquire(ops=len(batch))
+            if use_trash:
+                batch_deleted, batch_errors = FileDeleter._trash_batch(batch)
+            else:
+                batch_deleted, batch_errors = FileDeleter._unlink_batch(batch)
+            deleted.extend(batch_deleted)
+            errors.update(batch_errors)
+
+            if progress_callback:
+                progress_callback(int(min(start + batch_size, total_files) * 100 / total_files))
+
+        return {'deleted': deleted, 'errors': errors}
+
+    @staticmethod
+    def _trash_batch(batch: List[str]):
+        from send2trash import send2trash
+
+        if not batch:
+            return [], {}
+
+        paths = [FileDeleter._normalize_path(file_path) for file_path in batch]
+        try:
+            send2trash(paths)  # Un único viaje a la papelera para todo el lote
+            return list(batch), {}
+        except Exception:
+            pass
+
+        # Si el lote falla se reintenta archivo por archivo para aislar el error
+        deleted = []
+        errors = {}
+        for file_path, normalized_path in zip(batch, paths):
+            if not os.path.lexists(file_path):
+                deleted.append(file_path)  # Ya se envió en el intento por lotes
+                continue
+            try:
+                send2trash(normalized_path)
+                deleted.append(file_path)
+            except Exception as e:
+                errors[file_path] = str(e)
+        return deleted, errors
+
+    @staticmethod
+    def _unlink_batch(batch: List[str]):
+        deleted = []
+        errors = {}
+        for file_path in batch:
+            try:
+                os.remove(file_path)
+                deleted.append(file_path)
+            except Exception as e:
+                errors[file_path] = str(e)
+        return deleted, errors
+
+    @staticmethod
+    def _normalize_path(file_path: str) -> str:
+        normalized_path = os.path.abspath(os.path.normpath(file_path))
+
+        # Agregar prefijo para rutas largas en Windows
+        if platform.system() == "Windows" and len(normalized_path) > 260:
+            normalized_path = f"\\\\?\\{normalized_path}"
+        return normalized_path
@@ -1,63 +1,66 @@
-from PyQt5.QtCore import QThread, pyqtSignal
 import os
-import hashlib
-from .file_metadata import FileMetadata
+import sys
+from PyQt5.QtCore import QThread, pyqtSignal
+from .scan_engine import DuplicateFinder
+from .io_governor import IOGovernor
+from .scan_scheduler import ScanScheduler
+from .scan_metrics import ScanMetrics
+from .scan_profiler import ScanProfiler
+from .hash_manifest import HashManifest
+from .result_store import LAST_DUPLICATES_FILE, ResultStore, last_session_path
 
 class FileHashScanWorker(QThread):
     finished = pyqtSignal(dict)
     progress = pyqtSignal(int)
-    
-    def __init__(self, path):
+    metrics_updated = pyqtSignal(dict)  # Instantánea de ScanMetrics, como mucho una por segundo
+    status = pyqtSignal(dict)  # Bytes, velocidad, tiempo restante y archivo actual
+
+    def __init__(self, path, manifest_path=None):
         super().__init__()
         self.path = path
-        
-    def calculate_file_hash(self, filepath: str, block_size=65536) -> str:
+        self.manifest_path = manifest_path  # Si se indica, se exporta el manifiesto de hashes
+        self.metrics = ScanMetrics.from_environment()
+        self.folder_duplicates = []  # Carpetas idénticas del último escaneo
+        self.scheduler = ScanScheduler()
+
+    def promote(self, directory):
+        """Recorre y lee antes la carpeta que se está mostrando; se llama desde el hilo de la interfaz."""
+        # DuplicateFinder trabaja con rutas resueltas
+        self.scheduler.promote(os.path.realpath(directory))
+
+    def calculate_file_hash(self, filepath: str, block_size=None) -> str:
         """Calcula SHA-256 hash de los archivos."""
-        sha256_hash = hashlib.sha256()
-        try:
-            with open(filepath, "rb") as f:
-                for block in iter(lambda: f.read(block_size), b""):
-                    sha256_hash.update(block)
-            return sha256_hash.hexdigest()
-        except Exception as e:
-            print(f"Error al calcular el hash del archivo {filepath}: {e}")
-            return None
+        return DuplicateFinder.calculate_file_hash(filepath, block_size)
+
+    def _on_progress(self, value):
+        self.progress.emit(value)
+        snapshot = self.metrics.snapshot_if_due()
+        if snapshot is not None:
+            self.metrics_updated.emit(snapshot)
 
     def run(self):
-        files_by_hash = {}  # Diccionario para agrupar los archivos por su hash
-        duplicates = {}     # Diccionario para guardar solo los archivos duplicados
-        
-        # Total de archivos a procesar
-        total_files = sum([len(files) for _, _, files in os.walk(self.path)])
-        processed_files = 0
-        
-        # Procesa los archivos y calcula los hashes
-        for root, _, files in os.walk(self.path):
-            for file in files:
-                full_path = os.path.join(root, file)
-                file_hash = self.calculate_file_hash(full_path)
-                
-                if file_hash:
-                    file_info = {
-                        'name': file,
-                        'path': full_path,
-                        'size': os.path.getsize(full_path),
-                        'date': FileMetadata.get_file_date(full_path)
-                    }
-                    
-                    if file_hash in files_by_hash:
-                        # If we find a duplicate, ensure it's in the duplicates dict
-                        if file_hash not in duplicates:
-                            duplicates[file_hash] = {
-                                'files': [files_by_hash[file_hash]],
-                                'size': file_info['size']
-                            }
-                        duplicates[file_hash]['files'].append(file_info)
-                    else:
-                        files_by_hash[file_hash] = file_info
-                
-                # Update progress
-                processed_files += 1
-                if processed_files % 100 == 0:
-                    self.progress.emit(int(processed_files * 100 / total_files))
+        IOGovernor.default().apply_priority()
+        finder = DuplicateFinder(self.path, self._on_progress, self.metrics,
+                                 hash_all=self.manifest_path is not None,
+                                 status_callback=self.status.emit, scheduler=self.scheduler,
+                                 resumable=True)
+        with ScanProfiler.from_environment('hash_scan'):
+            duplicates = finder.run()
+        self.folder_duplicates = finder.folder_duplicates
+        if finder.resumed:
+            print("Escaneo reanudado desde el último checkpoint", file=sys.stderr)
+        if self.manifest_path:
+            try:
+                HashManifest.write(finder.manifest_records, self.manifest_path)
+            except OSError as e:
+                print(f"Error writing manifest {self.manifest_path}: {e}", file=sys.stderr)
+        # Guardar el resultado para mostrarlo al instante en la próxima sesión
+        try:
+            ResultStore.write_duplicates(duplicates, last_session_path(LAST_DUPLICATES_FILE), finder.path)
+        except OSError as e:
+            print(f"Error saving duplicate results: {e}", file=sys.stderr)
+        if finder.skip_counts:
+            print(f"Omitidos por las reglas de escaneo: {finder.skip_counts}", file=sys.stderr)
+        if self.metrics.enabled:
+            self.metrics_updated.emit(self.metrics.snapshot())
         self.finished.emit(duplicates)
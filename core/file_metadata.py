@@ -1,23 +1,85 @@
+import io
 import os
 import datetime
-from PIL import Image
+import threading
+from collections import OrderedDict
+from typing import Optional
+from .archive_reader import ArchiveReader
+from .scan_metrics import ScanMetrics
 
 class FileMetadata:
+    EXIF_HEADER_BYTES = 256 * 1024  # Los datos EXIF van en la cabecera del JPEG
+    MAX_CACHED_DATES = 200_000
+
+    # ruta -> (tamaño, mtime en ns, fecha EXIF o de modificación); se descarta lo usado hace más tiempo
+    _date_cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
     @staticmethod
-    def get_file_date(file_path):
-        if file_path.lower().endswith(('.jpg', '.jpeg')):
-            try:
-                with Image.open(file_path) as img:
-                    exif = img.getexif()
-                    if exif:
-                        for tag_id in (36867, 306, 36868):
-                            if tag_id in exif:
-                                date_str = exif[tag_id]
-                                try:
-                                    return datetime.datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
-                                except ValueError:
-                                    pass
-            except Exception:
-                pass
-        return datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
+    def get_file_date(file_path, metrics: Optional[ScanMetrics] = None):
+        """
+        Fecha EXIF de los JPEG o, si no tienen, la de modificación. La fecha
+        EXIF se guarda en memoria mientras el archivo no cambie, de modo que
+        volver a escanear una carpeta (o una precargada por DirectoryPrefetcher)
+        no relee las cabeceras.
+        """
+        if ArchiveReader.is_virtual(file_path):
+            return FileMetadata.get_member_date(file_path)
+        stat = os.stat(file_path)
+        if not file_path.lower().endswith(('.jpg', '.jpeg')):
+            return datetime.datetime.fromtimestamp(stat.st_mtime)
+
+        key = (stat.st_size, stat.st_mtime_ns)
+        with FileMetadata._cache_lock:
+            cached = FileMetadata._date_cache.get(file_path)
+            if cached is not None and cached[:2] == key:
+                FileMetadata._date_cache.move_to_end(file_path)
+            else:
+                cached = None
+        if cached is not None:
+            if metrics is not None:
+                metrics.count('date_cache_hits')
+            return cached[2]
 
+        if metrics is not None:
+            metrics.count('date_cache_misses')
+        date = FileMetadata._exif_date(file_path) or datetime.datetime.fromtimestamp(stat.st_mtime)
+        with FileMetadata._cache_lock:
+            FileMetadata._date_cache[file_path] = key + (date,)
+            FileMetadata._date_cache.move_to_end(file_path)
+            if len(FileMetadata._date_cache) > FileMetadata.MAX_CACHED_DATES:
+                FileMetadata._date_cache.popitem(last=False)
+        return date
+
+    @staticmethod
+    def get_stream_date(name, stream, mtime):
+        """Fecha de una entrada de un archivo comprimido leyendo solo su cabecera."""
+        if name.lower().endswith(('.jpg', '.jpeg')):
+            date = FileMetadata._exif_date(io.BytesIO(stream.read(FileMetadata.EXIF_HEADER_BYTES)))
+            if date:
+                return date
+        return datetime.datetime.fromtimestamp(mtime)
+
+    @staticmethod
+    def get_member_date(virtual_path):
+        for member, stream in ArchiveReader.open_member(virtual_path):
+            return FileMetadata.get_stream_date(member.name, stream, member.mtime)
+        raise FileNotFoundError(virtual_path)
+
+    @staticmethod
+    def _exif_date(source):
+        try:
+            from PIL import Image  # Import diferido: PIL solo se carga al leer el primer JPEG
+            with Image.open(source) as img:
+                exif = img.getexif()
+                if exif:
+                    for tag_id in (36867, 306, 36868):
+                        if tag_id in exif:
+                            date_str = exif[tag_id]
+                            try:
+                                return datetime.datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+                            except ValueError:
+                                pass
+        except Exception:
+            pass
+        return None
@@ -1,7 +1,11 @@
 import os
-import shutil
 import re
-from typing import Dict, List
+import sys
+from typing import Dict, List, Optional, Tuple
+from .archive_reader import ArchiveReader
+from .file_transfer import FileTransfer
+from .io_governor import IOGovernor
+from .scan_metrics import ScanMetrics
 
 
 class FileOrganizer:
@@ -27,50 +31,72 @@ class FileOrganizer:
             #print(dirs[0])
             if re.search(date_pattern_check, dirs[0])!=None:
                 try:
-                    print(dirs[0])
+                    print(dirs[0], file=sys.stderr)
                     return True
                 except Exception as e:
-                    print('error')
+                    print('error', file=sys.stderr)
                     pass
         return False
 
     @staticmethod
-    def reorganize_by_date(files_by_date: Dict, base_path: str):
+    def get_target_folder(base_path: str, year_month: str, directory: str) -> str:
+        """
+        Devuelve la carpeta año/mes de destino para un directorio de files_by_date.
+        """
+        year, month = map(int, year_month.split('/'))
+        month_name = FileOrganizer.MONTH_NAMES[month - 1]
+
+        target_folder = os.path.join(
+            base_path, 
+            str(year), 
+            f"{month:02d}-{month_name}"
+        )
+
+        if directory:
+            target_folder = os.path.join(target_folder, directory)
+        return target_folder
+
+    @staticmethod
+    def reorganize_by_date(files_by_date: Dict, base_path: str,
+                           max_workers: Optional[int] = None, verify: bool = False,
+                           metrics: Optional[ScanMetrics] = None):
         """
         Reorganiza los archivos según su fecha en una estructura de carpetas año/mes.
+        Los movimientos entre dispositivos se copian en paralelo (max_workers) y,
+        si verify es True, se comprueba el hash antes de borrar el origen.
         """
+        metrics = metrics or ScanMetrics()
+        moves = []
+        with metrics.phase('plan'):
+            for year_month, directories in files_by_date.items():
+                for directory, files in directories.items():
+                    # Las entradas de archivos comprimidos solo se muestran; no se extraen
+                    files = [file_info for file_info in files
+                             if not ArchiveReader.is_virtual(file_info['path'])]
+                    if not files:
+                        continue
+                    target_folder = FileOrganizer.get_target_folder(
+                        base_path, year_month, directory)
+
+                    if not os.path.exists(target_folder):
+                        os.makedirs(target_folder)
+                    
+                    for file_info in files:
+                        moves.append((file_info['path'], target_folder))
+
+        FileOrganizer._move_files(moves, max_workers, verify, metrics)
 
-        for year_month, directories in files_by_date.items():
-            year, month = map(int, year_month.split('/'))
-            month_name = FileOrganizer.MONTH_NAMES[month - 1]
-            
-            for directory, files in directories.items():
-                target_folder = os.path.join(
-                    base_path, 
-                    str(year), 
-                    f"{month:02d}-{month_name}"
-                )
-                
-                if directory:
-                    target_folder = os.path.join(target_folder, directory)
-
-                if not os.path.exists(target_folder):
-                    os.makedirs(target_folder)
-                
-                for file_info in files:
-                    try:
-                        shutil.move(file_info['path'], target_folder)
-                    except Exception as e:
-                        print(f"Error moving {file_info['path']}: {e}")
-
-            # Limpiar carpetas vacías
+        # Limpiar carpetas vacías
+        with metrics.phase('clean'):
             FileOrganizer._clean_empty_directories(base_path)
 
     @staticmethod
-    def restore_original_structure(base_path: str):
+    def restore_original_structure(base_path: str, max_workers: Optional[int] = None,
+                                   verify: bool = False, metrics: Optional[ScanMetrics] = None):
         """
         Restaura la estructura original de los archivos.
         """
+        metrics = metrics or ScanMetrics()
         date_pattern = r'(?:(\d{4}\\\d{2}-(Enero|Febrero|Marzo|Abril|Mayo|Junio|Julio|Agosto|' \
                       r'Septiembre|Octubre|Noviembre|Diciembre))|(\d{2}\\\d{2}\\)|' \
                       r'(\d{2}\\(Enero|Febrero|Marzo|Abril|Mayo|Junio|Julio|Agosto|' \
@@ -82,45 +108,48 @@ class FileOrganizer:
         folder_map = {}
         files_without_subfolder = []
 
-        for root, _, files in os.walk(base_path):
-            for file in files:
-                relative_path = os.path.relpath(root, base_path)
-                file_path = os.path.join(root, file)
-
-                # Verificar si el archivo está en una estructura de fecha
-                match = re.search(date_pattern, relative_path)
-                
-                if match:
-                    if os.sep in relative_path:  # Tiene una subcarpeta
-                        subfolder_name = os.path.basename(root)
-                        if subfolder_name not in folder_map:
-                            folder_map[subfolder_name] = []
-                        folder_map[subfolder_name].append(file_path)
-                else:
-                    files_without_subfolder.append(file_path)
+        with metrics.phase('plan'):
+            for root, _, files in os.walk(base_path):
+                for file in files:
+                    relative_path = os.path.relpath(root, base_path)
+                    file_path = os.path.join(root, file)
+
+                    # Verificar si el archivo está en una estructura de fecha
+                    match = re.search(date_pattern, relative_path)
+                    
+                    if match:
+                        if os.sep in relative_path:  # Tiene una subcarpeta
+                            subfolder_name = os.path.basename(root)
+                            if subfolder_name not in folder_map:
+                                folder_map[subfolder_name] = []
+                            folder_map[subfolder_name].append(file_path)
+                    else:
+                        files_without_subfolder.append(file_path)
 
         # Mover archivos a sus ubicaciones originales
         FileOrganizer._move_files_to_original_locations(
             base_path, 
             folder_map, 
-            files_without_subfolder
+            files_without_subfolder,
+            max_workers,
+            verify,
+            metrics
         )
 
     @staticmethod
     def _move_files_to_original_locations(
         base_path: str, 
         folder_map: Dict[str, List[str]], 
-        files_without_subfolder: List[str]
+        files_without_subfolder: List[str],
+        max_workers: Optional[int] = None,
+        verify: bool = False,
+        metrics: Optional[ScanMetrics] = None
     ):
         """
         Mueve los archivos a sus ubicaciones originales.
         """
         # Mover archivos sin subcarpeta
-        for file_path in files_without_subfolder:
-            try:
-                shutil.move(file_path, base_path)
-            except Exception as e:
-                print(f"Error moving {file_path}: {e}")
+        moves = [(file_path, base_path) for file_path in files_without_subfolder]
 
         # Mover archivos con subcarpeta
         for subfolder, files in folder_map.items():
@@ -129,13 +158,30 @@ class FileOrganizer:
                 os.makedirs(target_folder)
             
             for file_path in files:
-                try:
-                    shutil.move(file_path, target_folder)
-                except Exception as e:
-                    print(f"Error moving {file_path}: {e}")
+                moves.append((file_path, target_folder))
+
+        metrics = metrics or ScanMetrics()
+        FileOrganizer._move_files(moves, max_workers, verify, metrics)
 
         # Limpiar carpetas vacías
-        FileOrganizer._clean_empty_directories(base_path)
+        with metrics.phase('clean'):
+            FileOrganizer._clean_empty_directories(base_path)
+
+    @staticmethod
+    def _move_files(moves: List[Tuple[str, str]], max_workers: Optional[int], verify: bool,
+                    metrics: Optional[ScanMetrics] = None):
+        """
+        Mueve los pares (origen, carpeta destino) e informa de los errores.
+        """
+        metrics = metrics or ScanMetrics()
+        io = IOGovernor.default().session(metrics)
+        with metrics.phase('move'):
+            errors = FileTransfer.move_many(moves, max_workers=max_workers, verify=verify, io=io)
+        io.record_metrics()
+        metrics.count('moves', len(moves) - len(errors))
+        metrics.count('move_errors', len(errors))
+        for file_path, e in errors.items():
+            print(f"Error moving {file_path}: {e}", file=sys.stderr)
         
 
     @staticmethod
@@ -148,4 +194,4 @@ class FileOrganizer:
                 try:
                     os.rmdir(root)
                 except Exception as e:
-                    print(f"Error removing empty directory {root}: {e}")
+                    print(f"Error removing empty directory {root}: {e}", file=sys.stderr)
@@ -1,52 +1,54 @@
-from PyQt5.QtCore import QThread, pyqtSignal
 import os
-from .file_metadata import FileMetadata
+import sys
+from PyQt5.QtCore import QThread, pyqtSignal
+from .scan_engine import DateScanner
+from .io_governor import IOGovernor
+from .scan_scheduler import ScanScheduler
+from .scan_metrics import ScanMetrics
+from .scan_profiler import ScanProfiler
+from .result_store import LAST_DATES_FILE, ResultStore, last_session_path
 
 class FileScanWorker(QThread):
     finished = pyqtSignal(dict)
     progress = pyqtSignal(int)
+    metrics_updated = pyqtSignal(dict)  # Instantánea de ScanMetrics, como mucho una por segundo
+    partial = pyqtSignal(str, dict)  # Raíz y resultados de las carpetas promovidas
 
     def __init__(self, path):
         super().__init__()
         self.path = path
+        self.metrics = ScanMetrics.from_environment()
+        self.scheduler = ScanScheduler()
 
-    def run(self):
-        files_by_date = {}
-        total_files = sum([len(files) for _, _, files in os.walk(self.path)])
-        processed_files = 0
+    def promote(self, directory):
+        """Procesa antes la carpeta que se está mostrando; se llama desde el hilo de la interfaz."""
+        self.scheduler.promote(os.path.abspath(directory))
 
-        for root, _, files in os.walk(self.path):
-            rel_path = os.path.relpath(root, self.path)
-            if rel_path == '.':
-                rel_path = ''
+    def _on_partial(self, files_by_date):
+        self.partial.emit(self.path, files_by_date)
 
-            for file in files:
-                self.process_file(root, rel_path, file, files_by_date)
-                processed_files += 1
-                if processed_files % 100 == 0:
-                    self.progress.emit(int(processed_files * 100 / total_files))
-
-        self.finished.emit(files_by_date)
+    def _on_progress(self, value):
+        self.progress.emit(value)
+        snapshot = self.metrics.snapshot_if_due()
+        if snapshot is not None:
+            self.metrics_updated.emit(snapshot)
 
-    def process_file(self, root: str, rel_path: str, file: str, files_by_date: dict):
+    def run(self):
+        IOGovernor.default().apply_priority()
+        scanner = DateScanner(self.path, self._on_progress, self.metrics,
+                              scheduler=self.scheduler, partial_callback=self._on_partial)
+        with ScanProfiler.from_environment('date_scan'):
+            files_by_date = scanner.run()
+        # Guardar el resultado para mostrarlo al instante en la próxima sesión
         try:
-            full_path = os.path.join(root, file)
-            date = FileMetadata.get_file_date(full_path)
-            year_month = f"{date.year}/{date.month:02d}"
-
-            if year_month not in files_by_date:
-                files_by_date[year_month] = {}
-
-            if rel_path not in files_by_date[year_month]:
-                files_by_date[year_month][rel_path] = []
-
-            files_by_date[year_month][rel_path].append({
-                'name': file,
-                'path': full_path,
-                'date': date
-            })
-        except Exception as e:
-            print(f"Error processing {full_path}: {e}")
+            ResultStore.write_dates(files_by_date, last_session_path(LAST_DATES_FILE), self.path)
+        except OSError as e:
+            print(f"Error saving date results: {e}", file=sys.stderr)
+        if scanner.skip_counts:
+            print(f"Omitidos por las reglas de escaneo: {scanner.skip_counts}", file=sys.stderr)
+        if self.metrics.enabled:
+            self.metrics_updated.emit(self.metrics.snapshot())
+        self.finished.emit(files_by_date)
 
 class FileScanManager:
     def scan_date_view(self, directory, progress_callback, finished_callback):
@@ -0,0 +1,163 @@
+import os
+import errno
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .hash_reader import HashReader
+from .io_governor import IOSession
+
+
+class FileTransfer:
+    """
+    Mueve archivos usando rename cuando origen y destino están en el mismo
+    dispositivo y una copia en el kernel (copy_file_range/sendfile) cuando no.
+    """
+    MAX_WORKERS = 4
+    CHUNK_SIZE = 8 * 1024 * 1024
+
+    @staticmethod
+    def move(source: str, target_folder: str, verify: bool = False, io: Optional[IOSession] = None) -> str:
+        """
+        Mueve source dentro de target_folder y devuelve la ruta final.
+        Igual que shutil.move, falla si el destino ya existe.
+        """
+        target = os.path.join(target_folder, os.path.basename(source))
+        if os.path.exists(target):
+            raise FileExistsError(f"Destination path '{target}' already exists")
+
+        if io is not None:
+            io.acquire()
+        try:
+            os.rename(source, target)
+            return target
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+        if not os.path.isfile(source) or os.path.islink(source):
+            # Directorios y enlaces: se mantiene el comportamiento de shutil
+            return shutil.move(source, target)
+
+        FileTransfer._copy_across_devices(source, target, verify, io)
+        os.unlink(source)
+        return target
+
+    @staticmethod
+    def move_many(moves: List[Tuple[str, str]], max_workers: Optional[int] = None,
+                  verify: bool = False, io: Optional[IOSession] = None) -> Dict[str, Exception]:
+        """
+        Mueve en paralelo una lista de pares (origen, carpeta destino).
+        Devuelve los errores por ruta de origen. Con io, las copias respetan
+        el presupuesto de E/S y los hilos trabajan con prioridad reducida.
+        """
+        errors = {}
+        if not moves:
+            return errors
+
+        # Dos orígenes con el mismo destino no pueden moverse a la vez sin pisarse
+        pending = []
+        targets = set()
+        for source, target_folder in moves:
+            target = os.path.normcase(os.path.abspath(
+                os.path.join(target_folder, os.path.basename(source))))
+            if target in targets:
+                errors[source] = FileExistsError(f"Destination path '{target}' already exists")
+                continue
+            targets.add(target)
+            pending.append((source, target_folder))
+
+        max_workers = max_workers or FileTransfer.MAX_WORKERS
+        initializer = io.governor.apply_priority if io is not None else None
+        with ThreadPoolExecutor(max_workers=max_workers, initializer=initializer) as executor:
+            futures = {
+                executor.submit(FileTransfer.move, source, target_folder, verify, io): source
+                for source, target_folder in pending
+            }
+            for future, source in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[source] = e
+        return errors
+
+    @staticmethod
+    def _copy_across_devices(source: str, target: str, verify: bool, io: Optional[IOSession] = None):
+        """
+        Copia source en target dentro del kernel cuando es posible.
+        Si verify es True, compara el SHA-256 antes de dar la copia por buena.
+        """
+        try:
+            with open(source, 'rb') as src, open(target, 'xb') as dst:
+                size = os.fstat(src.fileno()).st_size
+                FileTransfer._kernel_copy(src, dst, size, io)
+            shutil.copystat(source, target)
+
+            if verify and FileTransfer._file_hash(source) != FileTransfer._file_hash(target):
+                raise IOError(f"Checksum mismatch copying {source} to {target}")
+        except BaseException:
+            try:
+                os.unlink(target)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _kernel_copy(src, dst, size: int, io: Optional[IOSession] = None):
+        src_fd = src.fileno()
+        dst_fd = dst.fileno()
+        offset = 0
+        # Cada tramo se cobra al presupuesto cuando termina, con lo que realmente se copió
+        throttle = io.acquire if io is not None else lambda n_bytes: None
+        observe = io.observe if io is not None else lambda seconds, n_bytes: None
+
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while offset < size:
+                    chunk_start = time.perf_counter()
+                    copied = os.copy_file_range(src_fd, dst_fd, min(FileTransfer.CHUNK_SIZE, size - offset))
+                    observe(time.perf_counter() - chunk_start, copied)
+                    throttle(copied)
+                    if copied == 0:
+                        break
+                    offset += copied
+                if offset >= size:
+                    return
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                    raise
+
+        if hasattr(os, 'sendfile'):
+            try:
+                while offset < size:
+                    chunk_start = time.perf_counter()
+                    sent = os.sendfile(dst_fd, src_fd, offset, min(FileTransfer.CHUNK_SIZE, size - offset))
+                    observe(time.perf_counter() - chunk_start, sent)
+                    throttle(sent)
+                    if sent == 0:
+                        break
+                    offset += sent
+                if offset >= size:
+                    return
+            except OSError as e:
+                if e.errno not in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+
+        # Copia en espacio de usuario desde donde se haya quedado
+        src.seek(offset)
+        dst.seek(offset)
+        if io is None:
+            shutil.copyfileobj(src, dst, FileTransfer.CHUNK_SIZE)
+            return
+        while True:
+            chunk_start = time.perf_counter()
+            block = src.read(FileTransfer.CHUNK_SIZE)
+            if not block:
+                break
+            dst.write(block)
+            observe(time.perf_counter() - chunk_start, len(block))
+            throttle(len(block))
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        return HashReader.default().hash_file(path)
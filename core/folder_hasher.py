@@ -0,0 +1,134 @@
+import hashlib
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (ruta, tamaño, hash o None si no se calculó)
+FileEntry = Tuple[str, int, Optional[str]]
+
+
+class FolderHasher:
+    """
+    Detecta carpetas duplicadas con hashes de Merkle: el hash de una carpeta
+    se calcula a partir de los nombres y hashes de sus archivos y de los
+    hashes de sus subcarpetas, de abajo arriba y en una sola pasada. Dos
+    carpetas con el mismo hash tienen exactamente el mismo contenido, aunque
+    ellas mismas se llamen distinto.
+    """
+
+    @staticmethod
+    def build_tree(files: Iterable[FileEntry], roots: List[str]) -> Dict[str, Dict]:
+        """Agrupa los archivos por carpeta y enlaza cada carpeta con su padre hasta la raíz."""
+        root_set = set(roots)
+        folders = {}
+        for path, size, file_hash in files:
+            folder = os.path.dirname(path)
+            folders.setdefault(folder, FolderHasher._new_folder())['files'].append(
+                (os.path.basename(path), size, file_hash))
+
+        for folder in list(folders):
+            while folder not in root_set:
+                parent = os.path.dirname(folder)
+                if parent == folder:
+                    break
+                parent_entry = folders.setdefault(parent, FolderHasher._new_folder())
+                if folder in parent_entry['subfolders']:
+                    break  # El resto del camino ya está enlazado
+                parent_entry['subfolders'].add(folder)
+                folder = parent
+        return folders
+
+    @staticmethod
+    def _new_folder() -> Dict:
+        return {'files': [], 'subfolders': set(), 'hash': None, 'size': 0, 'count': 0}
+
+    @staticmethod
+    def compute_hashes(folders: Dict[str, Dict]):
+        """
+        Calcula el hash de cada carpeta empezando por las más profundas. Si
+        algún archivo de la carpeta o de sus subcarpetas no tiene hash (su
+        tamaño era único, luego no puede estar duplicado), la carpeta tampoco.
+        """
+        for folder in sorted(folders, key=lambda path: path.count(os.sep), reverse=True):
+            entry = folders[folder]
+            merkle = hashlib.sha256()
+            complete = True
+            for name, size, file_hash in sorted(entry['files']):
+                if file_hash is None:
+                    complete = False
+                    break
+                merkle.update(f"f\0{name}\0{file_hash}\n".encode('utf-8', 'surrogateescape'))
+                entry['size'] += size
+                entry['count'] += 1
+
+            for subfolder in sorted(entry['subfolders']):
+                if not complete:
+                    break
+                child = folders[subfolder]
+                if child['hash'] is None:
+                    complete = False
+                    break
+                merkle.update(f"d\0{os.path.basename(subfolder)}\0{child['hash']}\n"
+                              .encode('utf-8', 'surrogateescape'))
+                entry['size'] += child['size']
+                entry['count'] += child['count']
+
+            entry['hash'] = merkle.hexdigest() if complete else None
+
+    @staticmethod
+    def find_duplicate_folders(files: Iterable[FileEntry], roots: List[str]) -> List[Dict]:
+        """
+        Devuelve los grupos de carpetas idénticas, de más a menos espacio
+        recuperable: [{'hash', 'folders', 'size', 'files', 'reclaimable'}].
+        Las subcarpetas de carpetas ya duplicadas no se repiten.
+        """
+        folders = FolderHasher.build_tree(files, roots)
+        FolderHasher.compute_hashes(folders)
+
+        by_hash = {}
+        for folder, entry in folders.items():
+            if entry['hash'] is not None and entry['count'] > 0:
+                by_hash.setdefault(entry['hash'], []).append(folder)
+        duplicate_hashes = {folder_hash for folder_hash, paths in by_hash.items() if len(paths) > 1}
+
+        def covered(folder):
+            parent = folders.get(os.path.dirname(folder))
+            return parent is not None and parent['hash'] in duplicate_hashes
+
+        groups = []
+        for folder_hash in duplicate_hashes:
+            paths = sorted(by_hash[folder_hash])
+            # Solo se informa de la carpeta más alta: si todas están dentro de carpetas duplicadas, sobra
+            if all(covered(path) for path in paths):
+                continue
+            entry = folders[paths[0]]
+            groups.append({
+                'hash': folder_hash,
+                'folders': paths,
+                'size': entry['size'],
+                'files': entry['count'],
+                'reclaimable': entry['size'] * (len(paths) - 1),
+            })
+        groups.sort(key=lambda group: group['reclaimable'], reverse=True)
+        return groups
+
+    @staticmethod
+    def outside_folders(duplicates: Dict, folder_groups: List[Dict]) -> Dict:
+        """Grupos de archivos duplicados que no están enteros dentro de carpetas duplicadas."""
+        duplicate_folders = {path for group in folder_groups for path in group['folders']}
+        if not duplicate_folders:
+            return duplicates
+
+        def inside(path):
+            folder = os.path.dirname(path)
+            while True:
+                if folder in duplicate_folders:
+                    return True
+                parent = os.path.dirname(folder)
+                if parent == folder:
+                    return False
+                folder = parent
+
+        return {
+            file_hash: data for file_hash, data in duplicates.items()
+            if not all(inside(file_info['path']) for file_info in data['files'])
+        }
@@ -0,0 +1,156 @@
+import datetime
+import heapq
+import json
+import os
+import socket
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# (tamaño, hash, mtime, ruta)
+ManifestRecord = Tuple[int, str, float, str]
+# (tamaño, hash, mtime, ruta, origen): registro de merge_duplicates con el manifiesto del que viene
+MergedRecord = Tuple[int, str, float, str, str]
+
+MANIFEST_HEADER = "# organizador-manifest v1"
+SOURCE_PREFIX = "# source: "
+
+
+class HashManifest:
+    """
+    Manifiestos de hashes (tamaño, hash, mtime, ruta) ordenados por
+    (tamaño, hash). Al estar ordenados, varios manifiestos generados en
+    máquinas o volúmenes distintos se combinan con una mezcla k-way en
+    streaming, sin volver a leer los datos y con memoria acotada.
+    """
+    SORT_CHUNK_SIZE = 200_000  # Registros por tramo al ordenar en disco
+
+    @staticmethod
+    def write(records: Iterable[ManifestRecord], manifest_path: str, source: Optional[str] = None) -> int:
+        """
+        Escribe los registros ordenados en manifest_path y devuelve cuántos escribió.
+        Los registros se ordenan por tramos en archivos temporales para no
+        tenerlos todos en memoria.
+        """
+        source = source or socket.gethostname()
+        runs = []
+        chunk = []
+        total_records = 0
+        try:
+            for record in records:
+                chunk.append(record)
+                total_records += 1
+                if len(chunk) >= HashManifest.SORT_CHUNK_SIZE:
+                    runs.append(HashManifest._write_run(chunk))
+                    chunk = []
+
+            chunk.sort()
+            if runs:
+                if chunk:
+                    runs.append(HashManifest._write_run(chunk))
+                sorted_records = heapq.merge(*(HashManifest._read_lines(run) for run in runs))
+            else:
+                sorted_records = chunk
+
+            with open(manifest_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(f"{MANIFEST_HEADER}\n")
+                f.write(f"{SOURCE_PREFIX}{source}\n")
+                for record in sorted_records:
+                    f.write(HashManifest._format(record))
+        finally:
+            for run in runs:
+                os.unlink(run)
+        return total_records
+
+    @staticmethod
+    def read(manifest_path: str) -> Iterator[ManifestRecord]:
+        """Devuelve los registros de un manifiesto en orden."""
+        with open(manifest_path, encoding='utf-8') as f:
+            header = f.readline().rstrip('\n')
+            if header != MANIFEST_HEADER:
+                raise ValueError(f"{manifest_path} no es un manifiesto de hashes")
+            for line in f:
+                if not line.startswith('#'):
+                    yield HashManifest._parse(line)
+
+    @staticmethod
+    def read_source(manifest_path: str) -> str:
+        """Máquina o volumen de origen del manifiesto (su nombre de archivo si no lo indica)."""
+        with open(manifest_path, encoding='utf-8') as f:
+            for line in f:
+                if not line.startswith('#'):
+                    break
+                if line.startswith(SOURCE_PREFIX):
+                    return line[len(SOURCE_PREFIX):].rstrip('\n')
+        return os.path.basename(manifest_path)
+
+    @staticmethod
+    def merge_duplicates(manifest_paths: List[str]) -> Iterator[List[MergedRecord]]:
+        """
+        Mezcla varios manifiestos y devuelve, uno a uno, los grupos de
+        registros con el mismo tamaño y hash; cada registro lleva al final el
+        origen de su manifiesto, ya que la misma ruta puede existir en varias
+        máquinas. Solo se guarda en memoria el grupo actual.
+        """
+        merged = heapq.merge(*(HashManifest._read_with_source(path) for path in manifest_paths))
+        group = []
+        for record in merged:
+            if group and record[:2] != group[0][:2]:
+                if len(group) > 1:
+                    yield group
+                group = []
+            group.append(record)
+        if len(group) > 1:
+            yield group
+
+    @staticmethod
+    def _read_with_source(manifest_path: str) -> Iterator[MergedRecord]:
+        source = HashManifest.read_source(manifest_path)
+        for record in HashManifest.read(manifest_path):
+            yield record + (source,)
+
+    @staticmethod
+    def to_duplicates(groups: Iterable[List[MergedRecord]]) -> Dict:
+        """
+        Convierte los grupos mezclados al formato de FileHashScanWorker
+        ({hash: {'files': [...], 'size': bytes}}) para DuplicatesView. Cada
+        archivo incluye además 'source', el origen de su manifiesto.
+        """
+        duplicates = {}
+        for group in groups:
+            size, file_hash = group[0][:2]
+            files = [{
+                'name': os.path.basename(path),
+                'path': path,
+                'size': size,
+                'date': datetime.datetime.fromtimestamp(mtime),
+                'source': source
+            } for _, _, mtime, path, source in group]
+            duplicates[file_hash] = {'files': files, 'size': size}
+        return duplicates
+
+    @staticmethod
+    def _format(record: ManifestRecord) -> str:
+        size, file_hash, mtime, path = record
+        # La ruta va en JSON para que tabuladores y saltos de línea no rompan el formato; con
+        # ensure_ascii los bytes no UTF-8 de la ruta (surrogateescape) se guardan como \udcXX
+        return f"{size}\t{file_hash}\t{mtime!r}\t{json.dumps(path, ensure_ascii=True)}\n"
+
+    @staticmethod
+    def _parse(line: str) -> ManifestRecord:
+        size, file_hash, mtime, path = line.rstrip('\n').split('\t', 3)
+        return int(size), file_hash, float(mtime), json.loads(path)
+
+    @staticmethod
+    def _write_run(chunk: List[ManifestRecord]) -> str:
+        chunk.sort()
+        fd, run_path = tempfile.mkstemp(prefix='manifest_run_', suffix='.tsv')
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+            for record in chunk:
+                f.write(HashManifest._format(record))
+        return run_path
+
+    @staticmethod
+    def _read_lines(run_path: str) -> Iterator[ManifestRecord]:
+        with open(run_path, encoding='utf-8') as f:
+            for line in f:
+                yield HashManifest._parse(line)
@@ -0,0 +1,184 @@
+import hashlib
+import mmap
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+from .io_governor import IOGovernor, IOSession
+
+BlockCallback = Optional[Callable[[int], None]]
+
+KB = 1024
+MB = 1024 * KB
+
+
+class _DeviceTuning:
+    """Velocidad medida con cada tamaño de bloque en un dispositivo."""
+
+    def __init__(self, candidates):
+        self.samples = {block_size: [0, 0.0, 0] for block_size in candidates}  # bytes, segundos, archivos
+        self.best = None
+
+    def record(self, block_size: int, n_bytes: int, seconds: float, samples_needed: int):
+        sample = self.samples[block_size]
+        sample[0] += n_bytes
+        sample[1] += seconds
+        sample[2] += 1
+        if self.best is None and all(files >= samples_needed for _, _, files in self.samples.values()):
+            self.best = max(self.samples,
+                            key=lambda size: self.samples[size][0] / max(self.samples[size][1], 1e-9))
+
+    def next_block_size(self) -> Optional[int]:
+        """Tamaño de bloque pendiente de medir, o None si ya se eligió el mejor."""
+        if self.best is not None:
+            return None
+        return min(self.samples, key=lambda size: self.samples[size][2])
+
+
+class HashReader:
+    """
+    Lectura de archivos para calcular hashes SHA-256 sin crear un objeto
+    bytes por bloque: cada hilo reutiliza su propio búfer con readinto. En los
+    archivos grandes avisa al kernel de que la lectura es secuencial y, al
+    terminar, de que no necesita conservar las páginas, para que un escaneo
+    grande no vacíe la caché del sistema. El tamaño de bloque se elige por dispositivo midiendo
+    la velocidad con los primeros archivos grandes; opcionalmente los
+    archivos muy grandes se leen con mmap.
+    """
+    BLOCK_SIZES = (64 * KB, 256 * KB, 1 * MB, 4 * MB)
+    DEFAULT_BLOCK_SIZE = 1 * MB
+    LARGE_FILE_BYTES = 8 * MB  # Por debajo no compensa medir ni avisar al kernel
+    TUNING_SAMPLES = 2         # Archivos medidos con cada tamaño antes de decidir
+    MMAP_THRESHOLD = 256 * MB
+
+    _default = None
+
+    def __init__(self, use_mmap: bool = False, drop_cache: bool = True, io: Optional[IOSession] = None):
+        self.use_mmap = use_mmap
+        self.drop_cache = drop_cache
+        self.io = io or IOGovernor.default().session()  # Presupuesto de E/S compartido
+        self._local = threading.local()
+        self._devices: Dict[int, _DeviceTuning] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> 'HashReader':
+        """Lector compartido para las llamadas sueltas (DuplicateFinder.calculate_file_hash)."""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def _buffer(self) -> memoryview:
+        view = getattr(self._local, 'view', None)
+        if view is None:
+            view = self._local.view = memoryview(bytearray(max(self.BLOCK_SIZES)))
+        return view
+
+    def _tuning(self, device: int) -> _DeviceTuning:
+        with self._lock:
+            tuning = self._devices.get(device)
+            if tuning is None:
+                tuning = self._devices[device] = _DeviceTuning(self.BLOCK_SIZES)
+            return tuning
+
+    def block_size(self, device: int) -> int:
+        """Tamaño de bloque elegido para el dispositivo (el de por defecto mientras se mide)."""
+        tuning = self._devices.get(device)
+        return tuning.best if tuning is not None and tuning.best else self.DEFAULT_BLOCK_SIZE
+
+    @staticmethod
+    def _advise(fd: int, advice_name: str):
+        advice = getattr(os, advice_name, None)
+        if advice is not None and hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(fd, 0, 0, advice)
+            except OSError:
+                pass  # Solo es una pista para el kernel
+
+    def hash_file(self, filepath: str, on_block: BlockCallback = None,
+                  block_size: Optional[int] = None) -> str:
+        """Devuelve el SHA-256 en hexadecimal. Los errores de lectura se propagan."""
+        sha256_hash = hashlib.sha256()
+        with open(filepath, 'rb', buffering=0) as f:
+            fd = f.fileno()
+            stat = os.fstat(fd)
+            if stat.st_size < self.LARGE_FILE_BYTES:
+                # Los archivos pequeños caben en una o pocas lecturas y sus páginas apenas pesan
+                self._hash_read(f, stat, sha256_hash, on_block, block_size)
+                return sha256_hash.hexdigest()
+
+            HashReader._advise(fd, 'POSIX_FADV_SEQUENTIAL')
+            try:
+                if self.use_mmap and stat.st_size >= self.MMAP_THRESHOLD:
+                    self._hash_mmap(fd, stat.st_size, sha256_hash, on_block)
+                else:
+                    self._hash_read(f, stat, sha256_hash, on_block, block_size)
+            finally:
+                if self.drop_cache:
+                    HashReader._advise(fd, 'POSIX_FADV_DONTNEED')
+        return sha256_hash.hexdigest()
+
+    def hash_stream(self, stream, on_block: BlockCallback = None, prefix: bytes = b'') -> str:
+        """
+        SHA-256 de un flujo ya abierto (una entrada de un ZIP o TAR). prefix son
+        los bytes que el llamador ya leyó del principio del flujo.
+        """
+        sha256_hash = hashlib.sha256(prefix)
+        if prefix and on_block:
+            on_block(len(prefix))
+        view = self._buffer()[:self.DEFAULT_BLOCK_SIZE]
+        while True:
+            read_start = time.perf_counter()
+            n_bytes = stream.readinto(view)
+            self.io.observe(time.perf_counter() - read_start, n_bytes or 0)
+            self.io.acquire(n_bytes or 0)  # Se cobra lo leído; si hay deuda, se espera aquí
+            if not n_bytes:
+                break
+            sha256_hash.update(view[:n_bytes])
+            if on_block:
+                on_block(n_bytes)
+        return sha256_hash.hexdigest()
+
+    def _hash_read(self, f, stat, sha256_hash, on_block: BlockCallback, block_size: Optional[int]):
+        tuning = None
+        if block_size is None:
+            block_size = self.block_size(stat.st_dev)
+            if stat.st_size >= self.LARGE_FILE_BYTES:
+                tuning = self._tuning(stat.st_dev)
+                block_size = tuning.next_block_size() or tuning.best
+        view = self._buffer()[:block_size]
+
+        start = time.perf_counter()
+        total = 0
+        while True:
+            read_start = time.perf_counter()
+            n_bytes = f.readinto(view)
+            self.io.observe(time.perf_counter() - read_start, n_bytes or 0)
+            self.io.acquire(n_bytes or 0)  # Se cobra lo leído; si hay deuda, se espera aquí
+            if not n_bytes:
+                break
+            sha256_hash.update(view[:n_bytes])
+            total += n_bytes
+            if on_block:
+                on_block(n_bytes)
+
+        if tuning is not None and tuning.best is None:
+            with self._lock:
+                tuning.record(block_size, total, time.perf_counter() - start, self.TUNING_SAMPLES)
+
+    def _hash_mmap(self, fd: int, size: int, sha256_hash, on_block: BlockCallback):
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapped)
+            try:
+                step = 4 * MB  # Trozos para poder informar del progreso
+                for offset in range(0, size, step):
+                    chunk = view[offset:offset + step]
+                    self.io.acquire(len(chunk))
+                    sha256_hash.update(chunk)
+                    if on_block:
+                        on_block(len(chunk))
+                    chunk.release()
+            finally:
+                view.release()
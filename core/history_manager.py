@@ -25,3 +25,12 @@ class HistoryManager:
             self.history_index += 1
             return self.history[self.history_index]
         return None
+
+    def neighbours(self):
+        """Rutas a las que llevarían Atrás y Adelante, sin moverse en el historial."""
+        neighbours = []
+        if self.history_index > 0:
+            neighbours.append(self.history[self.history_index - 1])
+        if self.history_index < len(self.history) - 1:
+            neighbours.append(self.history[self.history_index + 1])
+        return neighbours
@@ -0,0 +1,227 @@
+import ctypes
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Dict, Optional
+from .app_paths import get_app_dir
+from .scan_metrics import ScanMetrics
+
+LIMITS_FILE = "io_limits.json"
+
+MB = 1024 * 1024
+
+# Número de la llamada ioprio_set por arquitectura (Linux)
+_IOPRIO_SET = {'x86_64': 251, 'amd64': 251, 'i386': 289, 'i686': 289, 'aarch64': 30,
+               'armv7l': 314, 'ppc64le': 273, 's390x': 282, 'riscv64': 30}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_SHIFT = 13
+IO_CLASSES = {'realtime': 1, 'best-effort': 2, 'idle': 3}
+
+
+class IOGovernor:
+    """
+    Limita la E/S de los escaneos y movimientos para no saturar un servidor
+    compartido: presupuesto de MB/s y de operaciones por segundo (cubos de
+    tokens compartidos por todos los hilos), prioridad de E/S (ioprio) y
+    nice en Linux, y una espera adicional cuando la latencia medida sube
+    respecto a la habitual. Sin límites configurados no hace nada.
+    """
+    BURST_SECONDS = 0.5         # Ráfaga permitida por encima del presupuesto
+    LATENCY_UNIT = 256 * 1024   # Las lecturas grandes se comparan por cada 256 KB
+    MIN_LATENCY = 0.002         # Por debajo son aciertos de caché: no indican contención
+    BACKOFF_RATIO = 3.0         # Latencia reciente frente a la habitual que activa el freno
+    MIN_FACTOR = 0.1            # Como mucho se reduce la velocidad a la décima parte
+    ADJUST_INTERVAL = 0.5
+
+    _default = None
+
+    def __init__(self, max_mb_per_second: Optional[float] = None, max_iops: Optional[float] = None,
+                 io_class: Optional[str] = None, io_level: int = 7, nice: Optional[int] = None,
+                 latency_backoff: bool = False, latency_target_ms: Optional[float] = None):
+        self.max_mb_per_second = max_mb_per_second
+        self.max_iops = max_iops
+        self.io_class = io_class
+        self.io_level = io_level
+        self.nice = nice
+        self.latency_backoff = latency_backoff or latency_target_ms is not None
+        self.latency_target_ms = latency_target_ms
+        self.active = bool(max_mb_per_second or max_iops or self.latency_backoff)
+
+        self._lock = threading.Lock()
+        self._bytes_rate = max_mb_per_second * MB if max_mb_per_second else None
+        self._byte_tokens = (self._bytes_rate or 0) * self.BURST_SECONDS
+        self._op_tokens = (max_iops or 0) * self.BURST_SECONDS
+        self._last_refill = time.monotonic()
+        self._fast_latency = None  # Media móvil rápida (últimas operaciones)
+        self._slow_latency = None  # Media móvil lenta (latencia habitual)
+        self._last_adjust = 0.0
+        self.factor = 1.0          # Fracción del tiempo que se deja trabajar a la E/S
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'IOGovernor':
+        """Carga los límites del usuario; si no hay archivo, sin límites."""
+        path = path or os.path.join(get_app_dir(), LIMITS_FILE)
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, encoding='utf-8') as f:
+                return cls(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error loading I/O limits {path}: {e}", file=sys.stderr)
+            return cls()
+
+    def save(self, path: Optional[str] = None):
+        path = path or os.path.join(get_app_dir(), LIMITS_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_dict(self) -> Dict:
+        return {
+            'max_mb_per_second': self.max_mb_per_second,
+            'max_iops': self.max_iops,
+            'io_class': self.io_class,
+            'io_level': self.io_level,
+            'nice': self.nice,
+            'latency_backoff': self.latency_backoff,
+            'latency_target_ms': self.latency_target_ms,
+        }
+
+    @classmethod
+    def default(cls) -> 'IOGovernor':
+        """Gobernador compartido por todos los trabajos del proceso, para que el presupuesto sea global."""
+        if cls._default is None:
+            cls._default = cls.load()
+        return cls._default
+
+    @classmethod
+    def set_default(cls, governor: 'IOGovernor'):
+        cls._default = governor
+
+    def session(self, metrics: Optional[ScanMetrics] = None) -> 'IOSession':
+        return IOSession(self, metrics or ScanMetrics())
+
+    def apply_priority(self):
+        """
+        Baja la prioridad de CPU y de E/S del hilo que llama. En Linux ambas
+        son por hilo y las heredan los hilos que este cree después, así que se
+        llama al principio de cada trabajo en segundo plano, nunca desde el
+        hilo de la interfaz.
+        """
+        if platform.system() != 'Linux':
+            return
+        thread_id = threading.get_native_id()
+        if self.nice is not None:
+            try:
+                if self.nice > os.getpriority(os.PRIO_PROCESS, thread_id):
+                    os.setpriority(os.PRIO_PROCESS, thread_id, self.nice)
+            except OSError as e:
+                print(f"Error setting nice level: {e}", file=sys.stderr)
+        if self.io_class in IO_CLASSES:
+            syscall_number = _IOPRIO_SET.get(platform.machine().lower())
+            if syscall_number is None:
+                return
+            value = (IO_CLASSES[self.io_class] << _IOPRIO_CLASS_SHIFT) | (self.io_level & 7)
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.syscall(syscall_number, _IOPRIO_WHO_PROCESS, thread_id, value) != 0:
+                print(f"Error setting I/O priority: {os.strerror(ctypes.get_errno())}", file=sys.stderr)
+
+    def _reserve(self, n_bytes: int, ops: int) -> float:
+        """Descuenta los tokens y devuelve cuánto hay que esperar para saldar la deuda."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_refill
+            self._last_refill = now
+            wait = 0.0
+            if self._bytes_rate:
+                self._byte_tokens = min(self._byte_tokens + elapsed * self._bytes_rate,
+                                        self._bytes_rate * self.BURST_SECONDS) - n_bytes
+                if self._byte_tokens < 0:
+                    wait = -self._byte_tokens / self._bytes_rate
+            if self.max_iops:
+                self._op_tokens = min(self._op_tokens + elapsed * self.max_iops,
+                                      self.max_iops * self.BURST_SECONDS) - ops
+                if self._op_tokens < 0:
+                    wait = max(wait, -self._op_tokens / self.max_iops)
+            return wait
+
+    def _backoff(self, seconds: float, n_bytes: int) -> float:
+        """Actualiza las medias de latencia y devuelve la pausa que corresponde a esta operación."""
+        latency = seconds / max(n_bytes / self.LATENCY_UNIT, 1.0)
+        with self._lock:
+            if self._fast_latency is None:
+                self._fast_latency = self._slow_latency = latency
+            self._fast_latency += (latency - self._fast_latency) * 0.2
+            self._slow_latency += (latency - self._slow_latency) * 0.01
+
+            now = time.monotonic()
+            if now - self._last_adjust >= self.ADJUST_INTERVAL:
+                self._last_adjust = now
+                if self.latency_target_ms is not None:
+                    congested = self._fast_latency * 1000 > self.latency_target_ms
+                else:
+                    congested = (self._fast_latency > self.MIN_LATENCY and
+                                 self._fast_latency > self._slow_latency * self.BACKOFF_RATIO)
+                if congested:
+                    self.factor = max(self.factor * 0.7, self.MIN_FACTOR)
+                else:
+                    self.factor = min(self.factor + 0.05, 1.0)
+            factor = self.factor
+        # Con un factor f, la E/S solo ocupa esa fracción del tiempo
+        return seconds * (1.0 / factor - 1.0)
+
+    def budget(self) -> Dict:
+        return {
+            'budget_bytes_per_s': int(self._bytes_rate or 0),
+            'budget_iops': int(self.max_iops or 0),
+        }
+
+
+class IOSession:
+    """
+    Uso del gobernador durante un trabajo: aplica los límites compartidos y
+    anota en las métricas del trabajo los bytes, operaciones y esperas.
+    """
+
+    def __init__(self, governor: IOGovernor, metrics: ScanMetrics):
+        self.governor = governor
+        self.metrics = metrics
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.ops = 0
+
+    def acquire(self, n_bytes: int = 0, ops: int = 1):
+        """Se llama antes de cada operación; espera si se agotó el presupuesto."""
+        with self._lock:
+            self.bytes += n_bytes
+            self.ops += ops
+        if not self.governor.active:
+            return
+        wait = self.governor._reserve(n_bytes, ops)
+        if wait > 0:
+            time.sleep(wait)
+            self.metrics.count('io_throttled_ms', int(wait * 1000))
+
+    def observe(self, seconds: float, n_bytes: int = 0):
+        """Se llama después de cada operación con lo que tardó, para el freno por latencia."""
+        if not self.governor.latency_backoff:
+            return
+        pause = self.governor._backoff(seconds, n_bytes)
+        if pause > 0:
+            time.sleep(pause)
+            self.metrics.count('io_backoff_ms', int(pause * 1000))
+
+    def record_metrics(self):
+        """Rendimiento real frente al presupuesto, como contadores de ScanMetrics."""
+        elapsed = max(time.monotonic() - self._start, 1e-9)
+        self.metrics.count('io_bytes', self.bytes)
+        self.metrics.count('io_ops', self.ops)
+        self.metrics.count('io_actual_bytes_per_s', int(self.bytes / elapsed))
+        self.metrics.count('io_actual_iops', int(self.ops / elapsed))
+        for name, value in self.governor.budget().items():
+            self.metrics.count(f'io_{name}', value)
+        if self.governor.latency_backoff:
+            self.metrics.count('io_backoff_factor_pct', int(self.governor.factor * 100))
@@ -0,0 +1,19 @@
+import sys
+from PyQt5.QtCore import QThread, pyqtSignal
+from .hash_manifest import HashManifest
+
+class ManifestMergeWorker(QThread):
+    finished = pyqtSignal(dict)
+
+    def __init__(self, manifest_paths):
+        super().__init__()
+        self.manifest_paths = manifest_paths
+
+    def run(self):
+        try:
+            groups = HashManifest.merge_duplicates(self.manifest_paths)
+            duplicates = HashManifest.to_duplicates(groups)
+        except (OSError, ValueError) as e:
+            print(f"Error merging manifests: {e}", file=sys.stderr)
+            duplicates = {}
+        self.finished.emit(duplicates)
@@ -1,14 +1,23 @@
-from PyQt5.QtCore import QObject, pyqtSlot
+from PyQt5.QtCore import QCoreApplication, QObject, QTimer, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QIcon
 import os
+import sys
 from gui.widgets.navigation_bar import ViewMode
 from core.file_hash_scanner import FileHashScanWorker
+from core.chunk_analysis_worker import ChunkAnalysisWorker
 from core.file_scanner import FileScanManager
 from core.history_manager import HistoryManager
+from core.directory_prefetcher import DirectoryPrefetcher
+from core.prefetch_worker import PrefetchWorker
+from core.progress import ProgressTracker
+from core.scan_metrics import ScanMetrics
 
 
 
 class NavigationController(QObject):
+    date_scan_finished = pyqtSignal()  # La vista por fechas ya muestra el escaneo terminado
+    PREFETCH_IDLE_MS = 2000  # Tiempo sin navegar ni escanear antes de precargar
+    PREFETCH_QUIT_WAIT_MS = 2000  # Espera máxima a la precarga al cerrar la aplicación
 
     def __init__(self, navigation_bar, file_organizer_widget):
         super().__init__()
@@ -20,14 +29,30 @@ class NavigationController(QObject):
 
         self.actual_view = self.file_organizer.file_view
         self.hash_scan_thread = None
+        self.chunk_analysis_thread = None
         self.progress_bar = None
         self.duplicates_view = None
         self.stack_widget = None
+        self.extra_duplicate_roots = []  # Carpetas adicionales para buscar duplicados
+
+        # Precarga de las carpetas probables mientras la interfaz está ociosa
+        self.prefetcher = DirectoryPrefetcher()
+        self.prefetch_thread = None
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(self.PREFETCH_IDLE_MS)
+        self.prefetch_timer.timeout.connect(self._start_prefetch)
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self._shutdown_prefetch)
 
         # Conectar la señal de escaneo completado
         if self.actual_view.name == "FileView":
             self.file_organizer.file_view.scan_completed.connect(
                 self._handle_scan_completed)
+            self.file_organizer.file_view.scan_partial.connect(
+                self._merge_date_partial)
+            self.file_organizer.file_view.scan_metrics.connect(
+                self._update_metrics_panel)
 
         # Conectar señales de la barra de navegación
         self.navigation_bar.path_changed.connect(self.handle_path_change)
@@ -59,6 +84,10 @@ class NavigationController(QObject):
         # Duplicados
         self.navigation_bar.duplicates_button.clicked.connect(
             self.toggle_duplicate_view)
+        self.navigation_bar.add_root_button.clicked.connect(
+            self.add_duplicate_root)
+        self.navigation_bar.clear_roots_button.clicked.connect(
+            self.clear_duplicate_roots)
             
         # Conectar botones del sidebar
         self.file_organizer.sidebar.reorganize_button.clicked.connect(
@@ -71,6 +100,8 @@ class NavigationController(QObject):
         # File view connections
         self.file_organizer.file_view.file_list.doubleClicked.connect(
             self.navigate_directory)
+
+        self.prefetch_timer.start()
         
 
     def toggle_theme(self):
@@ -93,10 +124,12 @@ class NavigationController(QObject):
 
         if current_widget == self.file_organizer.file_view:
             # Cambiar a vista de fecha
+            self._cancel_prefetch()
             self.actual_view = self.file_organizer.date_view
             self.navigation_bar.update_view(ViewMode.DATE)
-            self.file_organizer.file_view.start_date_scan(
-                self.history_manager.history[self.history_manager.history_index])
+            current_directory = self.history_manager.history[self.history_manager.history_index]
+            self.file_organizer.file_view.start_date_scan(current_directory)
+            self._show_date_session(current_directory)
 
         else:
             # Cambiar a vista de archivos
@@ -120,7 +153,7 @@ class NavigationController(QObject):
         """Cambia a la vista de archivos duplicados"""
         current_widget = self.file_organizer.stack_widget.currentWidget()
 
-        if current_widget != self.file_organizer.duplicates_view:
+        if getattr(current_widget, 'name', None) != "DuplicatesView":
             # Cambiar a vista de archivos
             self.actual_view = self.file_organizer.duplicates_view
             self.file_organizer.change_view(
@@ -134,7 +167,7 @@ class NavigationController(QObject):
                                      self.file_organizer.duplicates_view,
                                      self.file_organizer.stack_widget)
 
-    def show_duplicate_view(self, progress_bar, duplicates_view, stack_widget):
+    def show_duplicate_view(self, progress_bar, duplicates_view, stack_widget, manifest_path=None):
         """
         Maneja la lógica de mostrar la vista de duplicados y ejecutar el escaneo.
         
@@ -142,6 +175,7 @@ class NavigationController(QObject):
             progress_bar: QProgressBar para mostrar el progreso
             duplicates_view: Vista de duplicados
             stack_widget: Widget contenedor principal
+            manifest_path: Si se indica, exporta el manifiesto de hashes del escaneo
         """
         self.progress_bar = progress_bar
         self.duplicates_view = duplicates_view
@@ -152,17 +186,85 @@ class NavigationController(QObject):
         # Configurar UI
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
+        self._cancel_prefetch()
 
         # Limpiar thread anterior
         if self.hash_scan_thread and self.hash_scan_thread.isRunning():
             self.hash_scan_thread.wait()
 
-        # Iniciar nuevo escaneo
-        self.hash_scan_thread = FileHashScanWorker(current_directory)
+        # Iniciar nuevo escaneo (carpeta actual y carpetas adicionales a la vez)
+        self.hash_scan_thread = FileHashScanWorker([current_directory] + self.extra_duplicate_roots,
+                                                   manifest_path)
         self.hash_scan_thread.progress.connect(self.progress_bar.setValue)
+        self.hash_scan_thread.status.connect(self._update_hash_status)
+        self.hash_scan_thread.metrics_updated.connect(self._update_metrics_panel)
         self.hash_scan_thread.finished.connect(self._populate_duplicate_view)
         self.hash_scan_thread.start()
 
+    def _update_hash_status(self, status):
+        """Muestra bajo la barra la velocidad, el tiempo restante y el archivo en curso"""
+        # En una etiqueta aparte: setFormat interpretaría los % de las rutas
+        details = ProgressTracker.format_status(status)
+        self.file_organizer.progress_status.setText(details)
+        self.file_organizer.progress_status.setVisible(bool(details))
+
+    def _update_metrics_panel(self, snapshot):
+        """Muestra el resumen de las métricas del escaneo en curso o del último"""
+        self.file_organizer.metrics_status.setText(ScanMetrics.format_summary(snapshot))
+        self.file_organizer.metrics_status.setVisible(True)
+
+    def _clear_hash_status(self):
+        self.file_organizer.progress_status.clear()
+        self.file_organizer.progress_status.setVisible(False)
+
+    def export_manifest(self, manifest_path):
+        """Escanea las carpetas actuales y exporta su manifiesto de hashes"""
+        self.show_duplicate_view(self.file_organizer.progress_bar,
+                                 self.file_organizer.duplicates_view,
+                                 self.file_organizer.stack_widget,
+                                 manifest_path)
+
+    def analyze_shared_chunks(self):
+        """Analiza por bloques los archivos grandes de las carpetas de la búsqueda de duplicados"""
+        if self.chunk_analysis_thread and self.chunk_analysis_thread.isRunning():
+            return
+        progress_bar = self.file_organizer.progress_bar
+        progress_bar.setVisible(True)
+        progress_bar.setValue(0)
+        self.progress_bar = progress_bar
+        self.file_organizer.duplicates_view.chunk_analysis_button.setEnabled(False)
+        self._cancel_prefetch()
+
+        current_directory = self.history_manager.history[self.history_manager.history_index]
+        self.chunk_analysis_thread = ChunkAnalysisWorker([current_directory] + self.extra_duplicate_roots)
+        self.chunk_analysis_thread.progress.connect(progress_bar.setValue)
+        self.chunk_analysis_thread.status.connect(self._update_hash_status)
+        self.chunk_analysis_thread.finished.connect(self._show_chunk_analysis)
+        self.chunk_analysis_thread.start()
+
+    def _show_chunk_analysis(self, result):
+        self.chunk_analysis_thread.metrics.dump_json('chunk_analysis')
+        self._clear_hash_status()
+        self.progress_bar.setVisible(False)
+        self.file_organizer.duplicates_view.show_chunk_report(result)
+
+    def add_duplicate_root(self):
+        """Añade otra carpeta (por ejemplo, de otro disco) a la búsqueda de duplicados"""
+        new_folder = self.navigation_bar.select_folder(self.current_path)
+        if new_folder and new_folder not in self.extra_duplicate_roots:
+            self.extra_duplicate_roots.append(new_folder)
+            self.show_duplicate_view(self.file_organizer.progress_bar,
+                                     self.file_organizer.duplicates_view,
+                                     self.file_organizer.stack_widget)
+
+    def clear_duplicate_roots(self):
+        """Vuelve a buscar duplicados solo en la carpeta actual"""
+        if self.extra_duplicate_roots:
+            self.extra_duplicate_roots = []
+            self.show_duplicate_view(self.file_organizer.progress_bar,
+                                     self.file_organizer.duplicates_view,
+                                     self.file_organizer.stack_widget)
+
     def _populate_duplicate_view(self, duplicate_files):
         """
         Callback privado para poblar la vista de duplicados cuando termina el escaneo.
@@ -170,7 +272,11 @@ class NavigationController(QObject):
         Args:
             duplicate_files: Lista de archivos duplicados encontrados
         """
-        self.duplicates_view.populate_table(duplicate_files)
+        metrics = self.hash_scan_thread.metrics
+        with metrics.phase('gui_populate'):
+            self.duplicates_view.populate_table(duplicate_files, self.hash_scan_thread.folder_duplicates)
+        metrics.dump_json('hash_scan')
+        self._clear_hash_status()
         self.progress_bar.setVisible(False)
         self.stack_widget.setCurrentWidget(self.duplicates_view)
 
@@ -179,6 +285,8 @@ class NavigationController(QObject):
         self.navigation_bar.update_view(view_mode=ViewMode.DATE)
         self.file_organizer.progress_bar.setVisible(True)
         self.file_organizer.progress_bar.setValue(0)
+        self._cancel_prefetch()
+        self._show_date_session(self.history_manager.history[self.history_manager.history_index])
 
                 # Limpiar thread anterior si existe
         if hasattr(self, 'scan_thread') and self.scan_thread is not None:
@@ -189,29 +297,94 @@ class NavigationController(QObject):
         self.scan_thread = scan_manager.scan_date_view(
             self.history_manager.history[self.history_manager.history_index],
             self.file_organizer.progress_bar.setValue, self.populate_date_view)
+        self.scan_thread.partial.connect(self._merge_date_partial)
+        self.scan_thread.metrics_updated.connect(self._update_metrics_panel)
+
+    def _show_date_session(self, path):
+        """Mientras dura el escaneo, muestra las fechas guardadas de esa carpeta si las hay"""
+        if self.file_organizer.date_view.load_last_session(path):
+            self.file_organizer.change_view(self.file_organizer.date_view)
+
+    def _merge_date_partial(self, root_path, files_by_date):
+        """Muestra en la vista por fechas las carpetas priorizadas sin esperar al final del escaneo"""
+        self.file_organizer.date_view.merge_partial(root_path, files_by_date)
+
+    def promote_directory(self, directory):
+        """Adelanta la carpeta visible o desplegada en los escaneos que siguen en curso"""
+        for thread in (getattr(self, 'scan_thread', None), self.file_organizer.file_view.scan_thread,
+                       self.hash_scan_thread):
+            if thread is not None and thread.isRunning():
+                thread.promote(directory)
+
+    def date_scan_running(self):
+        return any(thread is not None and thread.isRunning()
+                   for thread in (getattr(self, 'scan_thread', None), self.file_organizer.file_view.scan_thread))
+
+    def _scans_running(self):
+        return any(thread is not None and thread.isRunning()
+                   for thread in (getattr(self, 'scan_thread', None), self.file_organizer.file_view.scan_thread,
+                                  self.hash_scan_thread, self.chunk_analysis_thread))
+
+    def _start_prefetch(self):
+        """Precarga las carpetas de Atrás/Adelante y las subcarpetas de la actual"""
+        if self._scans_running() or (self.prefetch_thread and self.prefetch_thread.isRunning()):
+            self.prefetch_timer.start()  # Se vuelve a intentar cuando la interfaz esté ociosa
+            return
+        self.prefetch_thread = PrefetchWorker(self.prefetcher, self.current_path,
+                                              self.history_manager.neighbours())
+        self.prefetch_thread.finished.connect(self._prefetch_finished)
+        self.prefetch_thread.start()
+
+    def _prefetch_finished(self, result):
+        self.prefetch_thread.metrics.dump_json('prefetch')
+
+    def _cancel_prefetch(self):
+        """
+        El usuario vuelve a necesitar el disco: se pide a la precarga en curso
+        que pare. No se espera en el hilo de la interfaz; el hilo termina tras
+        la entrada que esté leyendo y prefetch_thread lo conserva hasta entonces.
+        """
+        self.prefetch_timer.stop()
+        if self.prefetch_thread and self.prefetch_thread.isRunning():
+            self.prefetch_thread.requestInterruption()
 
+    def _shutdown_prefetch(self):
+        """Al salir se espera un tiempo acotado, para no destruir el hilo en marcha"""
+        self._cancel_prefetch()
+        if self.prefetch_thread and self.prefetch_thread.isRunning():
+            self.prefetch_thread.wait(self.PREFETCH_QUIT_WAIT_MS)
 
     def populate_date_view(self, files_by_date):
-        self.file_organizer.date_view.populate_tree(files_by_date)
+        metrics = self.scan_thread.metrics
+        with metrics.phase('gui_populate'):
+            self.file_organizer.date_view.populate_tree(files_by_date)
+        self.file_organizer.date_view.root_path = self.scan_thread.path
+        metrics.dump_json('date_scan')
         self.file_organizer.progress_bar.setVisible(False)
         self.file_organizer.stack_widget.setCurrentWidget(
             self.file_organizer.date_view)
+        self.date_scan_finished.emit()
 
     def _on_view_changed(self, view_widget):
         """Manejar cambios en la vista actual"""
         if view_widget == self.file_organizer.file_view:
             self.navigation_bar.update_view(ViewMode.NORMAL)
-        elif view_widget == self.file_organizer.date_view:
+        elif getattr(view_widget, 'name', None) == "DateView":
             self.navigation_bar.update_view(ViewMode.DATE)
-        elif view_widget == self.file_organizer.duplicates_view:
+        elif getattr(view_widget, 'name', None) == "DuplicatesView":
             self.navigation_bar.update_view(ViewMode.DUPLICATES)
         else:
             self.navigation_bar.update_view(ViewMode.NORMAL)
 
     def _handle_scan_completed(self, files_by_date):
         """Manejar cuando el escaneo de archivos se completa"""
-        self.file_organizer.date_view.populate_tree(files_by_date)
+        metrics = self.file_organizer.file_view.scan_thread.metrics
+        with metrics.phase('gui_populate'):
+            self.file_organizer.date_view.populate_tree(files_by_date)
+        self.file_organizer.date_view.root_path = self.file_organizer.file_view.scan_thread.path
+        metrics.dump_json('date_scan')
         self.file_organizer.change_view(self.file_organizer.date_view)
+        self.date_scan_finished.emit()
 
 
     def select_folder(self):
@@ -240,6 +413,7 @@ class NavigationController(QObject):
         """Navegar a una nueva ruta y actualizar el historial"""
 
         if os.path.exists(path):
+            self._cancel_prefetch()
             self.current_path = path
             if update_history:
                 self.history_manager.update_history(path)
@@ -247,6 +421,7 @@ class NavigationController(QObject):
             # Actualizar la vista
             if self.actual_view.name == "FileView":
                 self.actual_view.update_root_index(path)
+                self.promote_directory(path)
             elif self.actual_view.name == "DateView":
 
                 self.file_organizer.file_view.start_date_scan(
@@ -257,7 +432,8 @@ class NavigationController(QObject):
                                          self.duplicates_view,
                                          self.stack_widget)
             else:
-                print("Vista no reconocida")
+                print("Vista no reconocida", file=sys.stderr)
+            self.prefetch_timer.start()
 
     def navigate_directory(self, index):
         """Navegar a un directorio basado en un índice del modelo"""
@@ -0,0 +1,23 @@
+import sys
+from PyQt5.QtCore import QThread, pyqtSignal
+from .scan_metrics import ScanMetrics
+
+class PrefetchWorker(QThread):
+    finished = pyqtSignal(dict)
+
+    def __init__(self, prefetcher, path, neighbours):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.path = path
+        self.neighbours = neighbours
+        self.metrics = ScanMetrics.from_environment()
+
+    def run(self):
+        self.prefetcher.governor.apply_priority()
+        try:
+            result = self.prefetcher.run(self.path, self.neighbours, self.metrics,
+                                         should_stop=self.isInterruptionRequested)
+        except OSError as e:
+            print(f"Error prefetching directories: {e}", file=sys.stderr)
+            result = {}
+        self.finished.emit(result)
@@ -0,0 +1,101 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+ProgressCallback = Optional[Callable[[int], None]]
+StatusCallback = Optional[Callable[[Dict], None]]
+
+
+class ProgressTracker:
+    """
+    Progreso ponderado por bytes. Se puede avanzar desde varios hilos y por
+    bloques dentro de un mismo archivo, pero solo se notifica como mucho una
+    vez cada interval segundos, con la velocidad, el tiempo restante estimado
+    y el archivo en curso.
+    """
+    DEFAULT_INTERVAL = 0.2  # Segundos entre notificaciones
+    SMOOTHING = 0.3         # Peso de la última medida en la media móvil de la velocidad
+
+    def __init__(self, total_bytes: int, total_files: int, progress_callback: ProgressCallback = None,
+                 status_callback: StatusCallback = None, interval: float = DEFAULT_INTERVAL):
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        self.interval = interval
+        self.done_bytes = 0
+        self.done_files = 0
+        self.current_file = None
+        self.bytes_per_second = 0.0
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._last_emit = self._start
+        self._last_bytes = 0
+
+    def start_file(self, path: str):
+        self.current_file = path
+
+    def advance(self, n_bytes: int):
+        """Suma bytes procesados; notifica si ha pasado el intervalo."""
+        with self._lock:
+            self.done_bytes += n_bytes
+            now = time.monotonic()
+            if now - self._last_emit < self.interval:
+                return
+            status = self._status(now)
+        self._emit(status)
+
+    def finish_file(self):
+        with self._lock:
+            self.done_files += 1
+
+    def finish(self):
+        """Notifica el estado final, sin esperar al intervalo."""
+        with self._lock:
+            self.current_file = None
+            status = self._status(time.monotonic())
+        self._emit(status)
+
+    def _status(self, now: float) -> Dict:
+        elapsed = now - self._last_emit
+        if elapsed > 0:
+            rate = (self.done_bytes - self._last_bytes) / elapsed
+            if self.bytes_per_second:
+                rate = self.SMOOTHING * rate + (1 - self.SMOOTHING) * self.bytes_per_second
+            self.bytes_per_second = rate
+        self._last_emit = now
+        self._last_bytes = self.done_bytes
+
+        remaining = max(self.total_bytes - self.done_bytes, 0)
+        eta = remaining / self.bytes_per_second if self.bytes_per_second > 0 else None
+        percent = int(self.done_bytes * 100 / self.total_bytes) if self.total_bytes else 100
+        return {
+            'percent': min(percent, 100),
+            'done_bytes': self.done_bytes,
+            'total_bytes': self.total_bytes,
+            'done_files': self.done_files,
+            'total_files': self.total_files,
+            'bytes_per_second': self.bytes_per_second,
+            'eta_seconds': eta,
+            'elapsed_seconds': now - self._start,
+            'current_file': self.current_file,
+        }
+
+    def _emit(self, status: Dict):
+        if self.progress_callback:
+            self.progress_callback(status['percent'])
+        if self.status_callback:
+            self.status_callback(status)
+
+    @staticmethod
+    def format_status(status: Dict) -> str:
+        """Texto breve para mostrar junto a la barra de progreso: velocidad, tiempo restante y archivo."""
+        parts = []
+        if status['bytes_per_second']:
+            parts.append(f"{status['bytes_per_second'] / (1024 * 1024):.1f} MB/s")
+        if status['eta_seconds'] is not None:
+            minutes, seconds = divmod(int(status['eta_seconds']), 60)
+            parts.append(f"quedan {minutes}:{seconds:02d}")
+        if status['current_file']:
+            parts.append(status['current_file'].replace('\\', '/').rsplit('/', 1)[-1])
+        return " · ".join(parts)
@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+import tempfile
+from typing import Dict, Optional
+from .archive_reader import ArchiveReader
+from .file_organizer import FileOrganizer
+
+
+class ReorganizationPlanner:
+    """
+    Simula "Ordenar por fecha" sin mover ningún archivo y estima su coste.
+    """
+    SAMPLE_BYTES = 8 * 1024 * 1024
+    RENAME_SECONDS = 0.0005  # Coste aproximado de un rename en el mismo dispositivo
+
+    @staticmethod
+    def plan(files_by_date: Dict, base_path: str, measure: bool = True) -> Dict:
+        """
+        Construye el plan de movimientos a partir de la estructura de
+        DateView.get_files_by_date y devuelve un resumen con el coste estimado.
+        """
+        renames = 0
+        copies = 0
+        bytes_to_copy = 0
+        collisions = []
+        errors = []
+        planned_targets = set()
+        copy_bytes_by_devices = {}
+        samples = {}
+        target_devices = {}
+
+        for year_month, directories in files_by_date.items():
+            for directory, files in directories.items():
+                files = [file_info for file_info in files
+                         if not ArchiveReader.is_virtual(file_info['path'])]
+                if not files:
+                    continue
+                target_folder = FileOrganizer.get_target_folder(
+                    base_path, year_month, directory)
+
+                if target_folder not in target_devices:
+                    target_devices[target_folder] = ReorganizationPlanner._get_device(target_folder)
+                target_dev = target_devices[target_folder]
+
+                for file_info in files:
+                    source = file_info['path']
+                    target = os.path.join(target_folder, os.path.basename(source))
+                    try:
+                        stat = os.stat(source)
+                    except OSError as e:
+                        errors.append({'path': source, 'error': str(e)})
+                        continue
+
+                    if os.path.normcase(os.path.abspath(source)) == os.path.normcase(os.path.abspath(target)):
+                        continue  # Ya está en su sitio
+
+                    target_key = os.path.normcase(os.path.abspath(target))
+                    if target_key in planned_targets or os.path.exists(target):
+                        collisions.append({'source': source, 'target': target})
+                        continue
+                    planned_targets.add(target_key)
+
+                    if stat.st_dev == target_dev:
+                        renames += 1
+                    else:
+                        copies += 1
+                        bytes_to_copy += stat.st_size
+                        devices = (stat.st_dev, target_dev)
+                        copy_bytes_by_devices[devices] = copy_bytes_by_devices.get(devices, 0) + stat.st_size
+                        # Guardar el archivo más grande como muestra para medir el rendimiento
+                        if devices not in samples or samples[devices][1] < stat.st_size:
+                            samples[devices] = (source, stat.st_size, target_folder)
+
+        throughput = {}
+        estimated_seconds = renames * ReorganizationPlanner.RENAME_SECONDS
+        for devices, total_bytes in copy_bytes_by_devices.items():
+            source, _, target_folder = samples[devices]
+            speed = ReorganizationPlanner.measure_throughput(source, target_folder) if measure else None
+            throughput[f"{devices[0]}->{devices[1]}"] = speed
+            if speed:
+                estimated_seconds += total_bytes / speed
+
+        return {
+            'renames': renames,
+            'copies': copies,
+            'bytes_to_copy': bytes_to_copy,
+            'collisions': collisions,
+            'errors': errors,
+            'throughput': throughput,
+            'estimated_seconds': estimated_seconds
+        }
+
+    @staticmethod
+    def measure_throughput(source: str, target_folder: str, sample_bytes: Optional[int] = None) -> Optional[float]:
+        """
+        Mide el rendimiento (bytes/s) leyendo una muestra del origen y
+        escribiéndola en un archivo temporal en el dispositivo de destino.
+        """
+        sample_bytes = sample_bytes or ReorganizationPlanner.SAMPLE_BYTES
+        target_dir = ReorganizationPlanner._existing_ancestor(target_folder)
+        try:
+            start = time.perf_counter()
+            with open(source, 'rb') as src:
+                data = src.read(sample_bytes)
+            if not data:
+                return None
+            with tempfile.NamedTemporaryFile(dir=target_dir) as tmp:
+                tmp.write(data)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            elapsed = time.perf_counter() - start
+            return len(data) / elapsed if elapsed > 0 else None
+        except OSError as e:
+            print(f"Error measuring throughput for {source}: {e}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def format_report(report: Dict) -> str:
+        """
+        Devuelve el resumen del plan en texto legible.
+        """
+        minutes, seconds = divmod(int(report['estimated_seconds']), 60)
+        hours, minutes = divmod(minutes, 60)
+        lines = [
+            f"Renombrados en el mismo dispositivo: {report['renames']}",
+            f"Copias entre dispositivos: {report['copies']}",
+            f"Datos a copiar: {report['bytes_to_copy'] / (1024 * 1024):.1f} MB",
+            f"Colisiones de nombre: {len(report['collisions'])}",
+            f"Tiempo estimado: {hours:02d}:{minutes:02d}:{seconds:02d}"
+        ]
+        if report['errors']:
+            lines.append(f"Archivos no accesibles: {len(report['errors'])}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _existing_ancestor(path: str) -> str:
+        path = os.path.abspath(path)
+        while not os.path.exists(path):
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+        return path
+
+    @staticmethod
+    def _get_device(path: str):
+        return os.stat(ReorganizationPlanner._existing_ancestor(path)).st_dev
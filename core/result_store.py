@@ -0,0 +1,265 @@
+import datetime
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from .app_paths import get_cache_dir
+
+MAGIC = b"ORGRES1\0"
+VERSION = 2  # 2: offsets de 64 bits en la tabla de cadenas
+KIND_DUPLICATES = 1
+KIND_DATES = 2
+
+# magic, versión, tipo, nº de registros, offset de registros, offset de cadenas,
+# offset y longitud de la raíz dentro de la tabla de cadenas
+HEADER = struct.Struct("<8sHHQQQII")
+# hash SHA-256 en binario, tamaño, fecha (timestamp), offset y longitud de la ruta;
+# el offset es de 64 bits: la tabla de cadenas de un árbol enorme puede pasar de 4 GiB
+RECORD = struct.Struct("<32sQdQI")
+
+LAST_DUPLICATES_FILE = "last_duplicates.orgres"
+LAST_DATES_FILE = "last_dates.orgres"
+
+# (hash hex, tamaño, fecha, ruta)
+Record = Tuple[str, int, datetime.datetime, str]
+
+
+def last_session_path(file_name: str) -> str:
+    return os.path.join(get_cache_dir(), file_name)
+
+
+class ResultStore:
+    """
+    Formato binario compacto para los resultados de escaneo: registros de
+    ancho fijo ordenados (por hash en duplicados, por fecha en la vista por
+    fechas) y una tabla de cadenas con las rutas. Se abre con mmap, de modo
+    que las consultas por búsqueda binaria no deserializan todo el archivo.
+
+    Cada escritura crea una generación nueva ("last_dates.<n>.orgres") en
+    lugar de sustituir la anterior, que puede seguir mapeada en una vista
+    (en Windows no se puede reemplazar ni borrar un archivo mapeado). Las
+    generaciones antiguas se borran cuando dejan de estar en uso.
+    """
+
+    @staticmethod
+    def write_duplicates(duplicates: Dict, store_path: str, root: str = '') -> int:
+        """Guarda el resultado de FileHashScanWorker ordenado por hash."""
+        records = []
+        for file_hash, data in duplicates.items():
+            key = bytes.fromhex(file_hash)
+            for file_info in data['files']:
+                records.append((key, file_info['size'], file_info['date'].timestamp(), file_info['path']))
+        records.sort(key=lambda record: record[0])
+        return ResultStore._write(records, store_path, KIND_DUPLICATES, root)
+
+    @staticmethod
+    def write_dates(files_by_date: Dict, store_path: str, root: str) -> int:
+        """Guarda el resultado de FileScanWorker ordenado por fecha."""
+        empty_key = bytes(32)
+        records = []
+        for directories in files_by_date.values():
+            for files in directories.values():
+                for file_info in files:
+                    records.append((empty_key, 0, file_info['date'].timestamp(), file_info['path']))
+        records.sort(key=lambda record: record[2])
+        return ResultStore._write(records, store_path, KIND_DATES, root)
+
+    @staticmethod
+    def generations(store_path: str) -> List[str]:
+        """Generaciones guardadas de store_path, de la más reciente a la más antigua."""
+        directory, name = os.path.split(store_path)
+        stem, extension = os.path.splitext(name)
+        pattern = re.compile(rf"{re.escape(stem)}\.(\d+){re.escape(extension)}")
+        try:
+            names = os.listdir(directory or '.')
+        except OSError:
+            return []
+        found = []
+        for file_name in names:
+            match = pattern.fullmatch(file_name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(directory, file_name)))
+        found.sort(reverse=True)
+        return [path for _, path in found]
+
+    @staticmethod
+    def _write(records: List[tuple], store_path: str, kind: int, root: str) -> int:
+        strings = bytearray()
+        root_bytes = root.encode('utf-8', 'surrogateescape')
+        strings += root_bytes
+
+        packed = bytearray(RECORD.size * len(records))
+        for index, (key, size, timestamp, path) in enumerate(records):
+            path_bytes = path.encode('utf-8', 'surrogateescape')
+            RECORD.pack_into(packed, index * RECORD.size, key, size, timestamp, len(strings), len(path_bytes))
+            strings += path_bytes
+
+        records_offset = HEADER.size
+        strings_offset = records_offset + len(packed)
+        previous = ResultStore.generations(store_path)
+        generation = time.time_ns()
+        if previous:
+            # El número solo crece, aunque el reloj retroceda
+            generation = max(generation, int(previous[0].rsplit('.', 2)[-2]) + 1)
+        stem, extension = os.path.splitext(store_path)
+        generation_path = f"{stem}.{generation}{extension}"
+        temp_path = generation_path + ".tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, kind, len(records), records_offset,
+                                    strings_offset, 0, len(root_bytes)))
+                f.write(packed)
+                f.write(strings)
+            os.replace(temp_path, generation_path)  # Nunca se deja un archivo a medio escribir
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        for old_path in previous + [store_path]:  # store_path: formato anterior, sin generación
+            try:
+                os.unlink(old_path)
+            except OSError:
+                pass  # Sigue mapeada (Windows): se borrará en la próxima escritura
+        return len(records)
+
+    @staticmethod
+    def open(store_path: str) -> Optional['ResultReader']:
+        """Abre la generación más reciente de store_path; None si no hay ninguna válida."""
+        for generation_path in ResultStore.generations(store_path):
+            try:
+                return ResultReader(generation_path)
+            except (OSError, ValueError) as e:
+                print(f"Error opening results {generation_path}: {e}", file=sys.stderr)
+        return None
+
+
+class ResultReader:
+    """Acceso de solo lectura, mapeado en memoria, a un archivo de ResultStore."""
+
+    def __init__(self, store_path: str):
+        with open(store_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError("archivo truncado")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.kind, self.count, self._records_offset,
+         self._strings_offset, root_offset, root_length) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError("formato de resultados desconocido")
+        self.root = self._string(root_offset, root_length)
+
+    def close(self):
+        self._mmap.close()
+
+    def __len__(self):
+        return self.count
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return self._mmap[start:start + length].decode('utf-8', 'surrogateescape')
+
+    def _raw(self, index: int):
+        return RECORD.unpack_from(self._mmap, self._records_offset + index * RECORD.size)
+
+    def record(self, index: int) -> Record:
+        key, size, timestamp, path_offset, path_length = self._raw(index)
+        return (key.hex(), size, datetime.datetime.fromtimestamp(timestamp),
+                self._string(path_offset, path_length))
+
+    def _bisect(self, value, field: int, right: bool = False) -> int:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            current = self._raw(middle)[field]
+            if current < value or (right and current == value):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find_hash(self, file_hash: str) -> List[Record]:
+        """Archivos con el hash indicado (búsqueda binaria)."""
+        key = bytes.fromhex(file_hash)
+        start = self._bisect(key, 0)
+        end = self._bisect(key, 0, right=True)
+        return [self.record(index) for index in range(start, end)]
+
+    def date_range(self, start: datetime.datetime, end: datetime.datetime) -> Iterator[Record]:
+        """Archivos con fecha en [start, end) (búsqueda binaria)."""
+        first = self._bisect(start.timestamp(), 2)
+        last = self._bisect(end.timestamp(), 2)
+        for index in range(first, last):
+            yield self.record(index)
+
+    def year_months(self) -> List[str]:
+        """Meses ("año/mes") con archivos, localizados saltando por búsqueda binaria."""
+        year_months = []
+        index = 0
+        while index < self.count:
+            date = self.record(index)[2]
+            year_months.append(f"{date.year}/{date.month:02d}")
+            index = self._bisect(ResultReader._next_month(date).timestamp(), 2)
+        return year_months
+
+    def month_files(self, year_month: str) -> Dict[str, List[Dict]]:
+        """Archivos de un mes agrupados por carpeta relativa, como en files_by_date."""
+        year, month = map(int, year_month.split('/'))
+        start = datetime.datetime(year, month, 1)
+        directories = {}
+        for _, _, date, path in self.date_range(start, ResultReader._next_month(start)):
+            rel_path = os.path.relpath(os.path.dirname(path), self.root)
+            if rel_path == '.':
+                rel_path = ''
+            directories.setdefault(rel_path, []).append({
+                'name': os.path.basename(path),
+                'path': path,
+                'date': date
+            })
+        return directories
+
+    def to_files_by_date(self) -> Dict:
+        return {year_month: self.month_files(year_month) for year_month in self.year_months()}
+
+    def group_stats(self) -> Dict[str, Dict]:
+        """
+        Estadísticas de cada grupo de duplicados, como DuplicateStats.group_stats,
+        leídas solo de los registros: no decodifica ninguna ruta.
+        """
+        groups = {}
+        current_key = None
+        for index in range(self.count):
+            key, size, timestamp, _, _ = self._raw(index)
+            if key != current_key:
+                current_key = key
+                group = groups[key.hex()] = {'size': size, 'copies': 0, 'oldest': timestamp, 'newest': timestamp}
+            group['copies'] += 1
+            group['oldest'] = min(group['oldest'], timestamp)
+            group['newest'] = max(group['newest'], timestamp)
+        for group in groups.values():
+            group['wasted'] = group['size'] * max(group['copies'] - 1, 0)
+            group['oldest'] = datetime.datetime.fromtimestamp(group['oldest'])
+            group['newest'] = datetime.datetime.fromtimestamp(group['newest'])
+        return groups
+
+    def to_duplicates(self) -> Dict:
+        """Reconstruye el diccionario de duplicados recorriendo los grupos en orden."""
+        duplicates = {}
+        for file_hash, size, date, path in (self.record(index) for index in range(self.count)):
+            group = duplicates.setdefault(file_hash, {'files': [], 'size': size})
+            group['files'].append({
+                'name': os.path.basename(path),
+                'path': path,
+                'size': size,
+                'date': date
+            })
+        return duplicates
+
+    @staticmethod
+    def _next_month(date: datetime.datetime) -> datetime.datetime:
+        if date.month == 12:
+            return datetime.datetime(date.year + 1, 1, 1)
+        return datetime.datetime(date.year, date.month + 1, 1)
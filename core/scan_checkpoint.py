@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .app_paths import get_cache_dir
+from .archive_reader import ArchiveReader
+from .scan_rules import ScanRules
+
+CHECKPOINT_VERSION = 1
+
+# (nombre, ruta, dispositivo, inodo, mtime, tamaño)
+FileRecord = List
+
+
+class ResumeState(NamedTuple):
+    listings: Dict[str, Dict]                  # Registros de las carpetas ya listadas y sin cambios
+    pending: List[str]                         # Carpetas descubiertas que faltan por listar
+    hashes: Dict[str, Tuple[int, float, str]]  # ruta -> (tamaño, mtime, hash) aún válidos
+
+
+class ScanCheckpoint:
+    """
+    Diario de un escaneo de duplicados para poder reanudarlo si la
+    aplicación se cierra a medias. Se añade una línea JSON por carpeta
+    listada y por hash calculado, y se vuelca a disco periódicamente. Al
+    reanudar, las carpetas cuyo mtime cambió se vuelven a listar y se
+    reutilizan los hashes de los archivos que conservan tamaño y mtime,
+    también los de esas carpetas.
+    """
+    FLUSH_INTERVAL = 10.0  # Segundos máximos de trabajo que se pueden perder
+
+    def __init__(self, roots: List[str], rules: ScanRules, path: Optional[str] = None):
+        self.roots = list(roots)
+        self.rules = rules.to_dict()
+        self.path = path or ScanCheckpoint.default_path(self.roots, self.rules)
+        self._file = None
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    @staticmethod
+    def default_path(roots: List[str], rules: Dict) -> str:
+        """Un diario por conjunto de raíces y reglas, en la carpeta de caché."""
+        key = json.dumps([sorted(roots), rules], sort_keys=True).encode('utf-8', 'surrogateescape')
+        return os.path.join(get_cache_dir(), f"hash_scan_{hashlib.sha1(key).hexdigest()[:16]}.ckpt")
+
+    def _header(self) -> Dict:
+        return {'version': CHECKPOINT_VERSION, 'roots': self.roots, 'rules': self.rules}
+
+    def load(self) -> Optional[ResumeState]:
+        """Estado del escaneo interrumpido, revalidado contra el disco, o None si no hay."""
+        if not os.path.exists(self.path):
+            return None
+        listings = {}
+        hashes = {}
+        try:
+            with open(self.path, encoding='utf-8', errors='surrogateescape') as f:
+                if json.loads(f.readline() or 'null') != self._header():
+                    return None
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Última línea a medio escribir cuando se cerró la aplicación
+                    if record['t'] == 'd':
+                        listings[record['dir']] = record
+                    elif record['t'] == 'h':
+                        hashes[record['path']] = (record['size'], record['mtime'], record['hash'])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading scan checkpoint {self.path}: {e}", file=sys.stderr)
+            return None
+        return self._revalidate(listings, hashes)
+
+    def _revalidate(self, listings: Dict[str, Dict], hashes: Dict) -> ResumeState:
+        valid = {}
+        for directory, record in listings.items():
+            try:
+                if os.stat(directory).st_mtime != record['mtime']:
+                    continue  # Se añadieron o quitaron entradas: se vuelve a listar
+            except OSError:
+                continue
+            files = ScanCheckpoint._revalidate_files(record['files'])
+            if files is not None:
+                valid[directory] = dict(record, files=files)
+
+        discovered = set(self.roots)
+        for record in valid.values():
+            discovered.update(record['subdirs'])
+        current = {file[1]: (file[5], file[4]) for record in valid.values() for file in record['files']}
+        recorded = {file[1]: (file[5], file[4]) for record in listings.values() for file in record['files']}
+        kept_hashes = {}
+        for path, entry in hashes.items():
+            if path in current:
+                unchanged = current[path] == (entry[0], entry[1])
+            else:
+                # Su carpeta se vuelve a listar, pero el archivo puede seguir igual
+                unchanged = ScanCheckpoint._unchanged(path, entry, recorded)
+            if unchanged:
+                kept_hashes[path] = entry
+        return ResumeState(valid, sorted(discovered - set(valid)), kept_hashes)
+
+    @staticmethod
+    def _unchanged(path: str, entry: Tuple[int, float, str], recorded: Dict[str, Tuple[int, float]]) -> bool:
+        """
+        True si el archivo conserva el tamaño y el mtime con que se calculó su
+        hash. De una entrada de un archivo comprimido solo se sabe si el propio
+        archivo comprimido sigue como estaba; el tamaño y el mtime de la entrada
+        se comparan al volver a listarlo.
+        """
+        if ArchiveReader.is_virtual(path):
+            path = ArchiveReader.split_virtual_path(path)[0]
+            expected = recorded.get(path)
+            if expected is None:
+                return False
+        else:
+            expected = (entry[0], entry[1])
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime) == expected
+
+    @staticmethod
+    def _revalidate_files(files: List[FileRecord]) -> Optional[List[FileRecord]]:
+        """Actualiza tamaño y mtime de los archivos; None si cambió algún archivo comprimido."""
+        revalidated = []
+        for name, path, device, inode, mtime, size in files:
+            if ArchiveReader.is_virtual(path):
+                revalidated.append([name, path, device, inode, mtime, size])
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Borrado desde el último escaneo
+            if stat.st_mtime != mtime or stat.st_size != size:
+                if ArchiveReader.is_archive(name):
+                    return None  # Sus entradas pueden haber cambiado: se lista la carpeta de nuevo
+                inode, mtime, size = stat.st_ino, stat.st_mtime, stat.st_size
+            revalidated.append([name, path, device, inode, mtime, size])
+        return revalidated
+
+    def start(self, state: Optional[ResumeState] = None):
+        """Abre un diario nuevo que incluye, compactado, lo reutilizado del anterior."""
+        # Se escribe aparte y se sustituye, para no perder el diario anterior si se cierra ahora
+        tmp_path = f"{self.path}.tmp"
+        self._file = open(tmp_path, 'w', encoding='utf-8', errors='surrogateescape')
+        self._write(self._header())
+        if state is not None:
+            for record in state.listings.values():
+                self._write(record)
+            for path, (size, mtime, file_hash) in state.hashes.items():
+                self._write({'t': 'h', 'path': path, 'size': size, 'mtime': mtime, 'hash': file_hash})
+        self._flush()
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8', errors='surrogateescape')
+
+    def record_directory(self, directory: str, mtime: float, files: List[FileRecord], subdirectories: List[str]):
+        self._record({'t': 'd', 'dir': directory, 'mtime': mtime, 'files': files, 'subdirs': subdirectories})
+
+    def record_hash(self, path: str, size: int, mtime: float, file_hash: str):
+        self._record({'t': 'h', 'path': path, 'size': size, 'mtime': mtime, 'hash': file_hash})
+
+    def _record(self, record: Dict):
+        with self._lock:
+            if self._file is None:
+                return
+            self._write(record)
+            if time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+                self._flush()
+
+    def _write(self, record: Dict):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def _flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Vuelca y cierra el diario, que queda para reanudar el escaneo."""
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.close()
+                self._file = None
+
+    def discard(self):
+        """El escaneo terminó: el diario ya no hace falta."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,621 @@
+import functools
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .archive_reader import ARCHIVE_SEPARATOR, ArchiveMember, ArchiveReader
+from .file_metadata import FileMetadata
+from .scan_metrics import ScanMetrics
+from .scan_rules import ScanRules
+from .folder_hasher import FolderHasher
+from .hash_reader import HashReader
+from .progress import ProgressCallback, ProgressTracker, StatusCallback
+from .io_governor import IOGovernor
+from .scan_checkpoint import ResumeState, ScanCheckpoint
+from .scan_scheduler import DirectoryQueue, ScanScheduler
+from .device_profile import DeviceProfile
+
+# Recibe resultados parciales con la misma estructura que DateScanner.run
+PartialCallback = Optional[Callable[[Dict], None]]
+
+
+class DateScanner:
+    """
+    Agrupa los archivos de un directorio por año/mes y carpeta relativa.
+    Las carpetas se procesan según las prioridades del ScanScheduler; los
+    resultados de las promovidas se entregan por partial_callback sin
+    esperar al final del escaneo. Las fechas de cada carpeta se leen con los
+    hilos que admita el dispositivo (DeviceProfile): en un disco mecánico,
+    de una en una y en orden de inodo.
+    No depende de Qt, por lo que puede usarse sin interfaz gráfica.
+    """
+    PARTIAL_INTERVAL = 0.25  # Segundos mínimos entre dos entregas parciales
+
+    def __init__(self, path: str, progress_callback: ProgressCallback = None,
+                 metrics: Optional[ScanMetrics] = None, rules: Optional[ScanRules] = None,
+                 scheduler: Optional[ScanScheduler] = None, partial_callback: PartialCallback = None,
+                 governor: Optional[IOGovernor] = None):
+        self.path = path
+        self.progress_callback = progress_callback
+        self.partial_callback = partial_callback
+        self.scheduler = scheduler or ScanScheduler()
+        self.metrics = metrics or ScanMetrics()
+        self.io = (governor or IOGovernor.default()).session(self.metrics)
+        rules = rules or ScanRules.load()
+        self.scan_archives = rules.scan_archives
+        self.matcher = rules.compile()
+        self.skip_counts = self.matcher.skip_counts  # Elementos descartados por cada regla
+
+    def iter_files(self) -> Iterator[Tuple[str, str, Dict]]:
+        """
+        Recorre el directorio y devuelve (año/mes, carpeta relativa, info) por archivo.
+        """
+        try:
+            profile = DeviceProfile.get(os.stat(self.path).st_dev)
+        except OSError as e:
+            print(f"Error accessing {self.path}: {e}", file=sys.stderr)
+            return
+        self.metrics.count(f'device_{profile.kind}')
+
+        # Un solo recorrido, podado por las reglas; el listado sirve también para el total
+        with self.metrics.phase('list'):
+            listing = {root: [entry.name for entry in
+                              (sorted(files, key=os.DirEntry.inode) if profile.rotational else files)]
+                       for root, files in self.matcher.walk(self.path, self.scheduler, self.io)}
+        self.metrics.count('listdir', len(listing))
+        self.matcher.record_metrics(self.metrics)
+        total_files = sum(len(files) for files in listing.values())
+        processed_files = 0
+
+        # Sin promociones, las carpetas salen en el orden del recorrido
+        pending = self.scheduler.queue()
+        for root in reversed(list(listing)):
+            pending.push(root)
+        partial = {}
+        last_partial = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=profile.workers) if profile.workers > 1 else None
+
+        try:
+            while pending:
+                root = pending.pop()
+                rel_path = os.path.relpath(root, self.path)
+                if rel_path == '.':
+                    rel_path = ''
+                promoted = self.partial_callback is not None and self.scheduler.is_promoted(root)
+                if partial and (not promoted or time.monotonic() - last_partial >= self.PARTIAL_INTERVAL):
+                    self.partial_callback(partial)
+                    partial = {}
+                    last_partial = time.monotonic()
+
+                files = listing[root]
+                if executor is not None:
+                    dated = executor.map(functools.partial(self.process_file, root, rel_path), files)
+                else:
+                    dated = (self.process_file(root, rel_path, file) for file in files)
+                for file, entry in zip(files, dated):
+                    entries = [entry]
+                    if self.scan_archives and ArchiveReader.is_archive(file):
+                        entries.extend(self.process_archive(os.path.join(root, file)))
+                    for entry in entries:
+                        if entry:
+                            if promoted:
+                                year_month, entry_rel_path, file_info = entry
+                                partial.setdefault(year_month, {}).setdefault(entry_rel_path, []).append(file_info)
+                            yield entry
+                    processed_files += 1
+                    if self.progress_callback and processed_files % 100 == 0:
+                        self.progress_callback(int(processed_files * 100 / total_files))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        if partial:
+            self.partial_callback(partial)
+        self.io.record_metrics()
+
+    def process_file(self, root: str, rel_path: str, file: str):
+        full_path = os.path.join(root, file)
+        try:
+            self.io.acquire()
+            date_start = time.perf_counter()
+            with self.metrics.phase('date'):
+                date = FileMetadata.get_file_date(full_path, self.metrics)
+            self.io.observe(time.perf_counter() - date_start)
+            self.metrics.count('stat')
+            self.metrics.count('files')
+            year_month = f"{date.year}/{date.month:02d}"
+            return year_month, rel_path, {
+                'name': file,
+                'path': full_path,
+                'date': date
+            }
+        except Exception as e:
+            print(f"Error processing {full_path}: {e}", file=sys.stderr)
+            return None
+
+    def process_archive(self, archive_path: str) -> Iterator[Tuple[str, str, Dict]]:
+        """Entradas de un archivo comprimido, leídas en una pasada y sin extraerlas."""
+        try:
+            for member, stream in ArchiveReader.iter_streams(archive_path):
+                if not self.matcher.allow_member(member.path, member.name, member.size):
+                    continue
+                with self.metrics.phase('date'):
+                    date = FileMetadata.get_stream_date(member.name, stream, member.mtime)
+                self.metrics.count('archive_members')
+                year_month = f"{date.year}/{date.month:02d}"
+                yield year_month, os.path.relpath(os.path.dirname(member.path), self.path), {
+                    'name': member.name,
+                    'path': member.path,
+                    'date': date
+                }
+        except Exception as e:
+            print(f"Error reading archive {archive_path}: {e}", file=sys.stderr)
+
+    def run(self) -> Dict:
+        """
+        Devuelve la estructura files_by_date: {año/mes: {carpeta: [archivos]}}.
+        """
+        files_by_date = {}
+        for year_month, rel_path, file_info in self.iter_files():
+            files_by_date.setdefault(year_month, {}).setdefault(rel_path, []).append(file_info)
+        return files_by_date
+
+
+class DuplicateFinder:
+    """
+    Busca archivos duplicados comparando su hash SHA-256.
+    Acepta una o varias raíces: cada dispositivo se recorre y se lee con sus
+    propios hilos, según su DeviceProfile (uno solo y en orden de inodo en un
+    disco mecánico), y todas comparten un único índice por tamaño, de modo que
+    solo se calcula el hash de los archivos cuyo tamaño coincide con el de otro. Si las
+    reglas lo activan, las entradas de ZIP y TAR participan con rutas
+    virtuales (archivo.zip!/carpeta/foto.jpg) y se leen sin extraerlas.
+    Las carpetas promovidas en el ScanScheduler se recorren y se leen antes.
+    Con resumable, el progreso se guarda en un ScanCheckpoint y un escaneo
+    interrumpido de las mismas raíces continúa donde se quedó.
+    No depende de Qt, por lo que puede usarse sin interfaz gráfica.
+    """
+
+    def __init__(self, path: Union[str, Iterable[str]], progress_callback: ProgressCallback = None,
+                 metrics: Optional[ScanMetrics] = None, hash_all: bool = False,
+                 rules: Optional[ScanRules] = None, status_callback: StatusCallback = None,
+                 use_mmap: bool = False, scheduler: Optional[ScanScheduler] = None,
+                 resumable: bool = False, governor: Optional[IOGovernor] = None):
+        self.roots = DuplicateFinder.normalize_roots([path] if isinstance(path, str) else path)
+        self.path = self.roots[0] if self.roots else path
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback  # Recibe velocidad, tiempo restante y archivo actual
+        self.metrics = metrics or ScanMetrics()
+        # Con hash_all se calcula el hash de todos los archivos, para exportar un manifiesto
+        self.hash_all = hash_all
+        self.manifest_records = []  # (tamaño, hash, mtime, ruta) si hash_all
+        self.folder_duplicates = []  # Grupos de carpetas idénticas (FolderHasher)
+        self.io = (governor or IOGovernor.default()).session(self.metrics)  # Presupuesto de E/S
+        self.reader = HashReader(use_mmap=use_mmap, io=self.io)
+        self.scheduler = scheduler or ScanScheduler()  # Prioridades de recorrido y de cálculo de hashes
+        rules = rules or ScanRules.load()
+        self.scan_archives = rules.scan_archives
+        self.matcher = rules.compile()
+        self.skip_counts = self.matcher.skip_counts  # Elementos descartados por cada regla
+        self.checkpoint = ScanCheckpoint(self.roots, rules) if resumable else None
+        self._restored_dirs = set()  # Carpetas recuperadas del checkpoint, que no se vuelven a listar
+        self._restored_hashes = {}
+        self.resumed = False  # True si el último run continuó un escaneo interrumpido
+        self._member_dates = {}  # Fechas de las entradas de archivos comprimidos, leídas al calcular el hash
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_roots(paths: Iterable[str]) -> List[str]:
+        """
+        Resuelve las rutas y descarta las raíces contenidas en otra raíz,
+        para no contar dos veces los mismos archivos.
+        """
+        resolved = {}
+        for path in paths:
+            real_path = os.path.realpath(path)
+            resolved.setdefault(os.path.normcase(real_path), real_path)
+
+        roots = []
+        for key in sorted(resolved):
+            if not any(key == root or key.startswith(root.rstrip(os.sep) + os.sep) for root in roots):
+                roots.append(key)
+        return [resolved[key] for key in roots]
+
+    @staticmethod
+    def calculate_file_hash(filepath: str, block_size: Optional[int] = None,
+                            on_block: Optional[Callable[[int], None]] = None,
+                            reader: Optional[HashReader] = None) -> str:
+        """Calcula SHA-256 hash de los archivos. on_block recibe los bytes de cada bloque leído."""
+        try:
+            return (reader or HashReader.default()).hash_file(filepath, on_block, block_size)
+        except Exception as e:
+            print(f"Error al calcular el hash del archivo {filepath}: {e}", file=sys.stderr)
+            return None
+
+    def _roots_by_device(self, roots: Optional[List[str]] = None) -> Dict[int, List[str]]:
+        roots_by_device = {}
+        for root in self.roots if roots is None else roots:
+            try:
+                device = os.stat(root).st_dev
+            except OSError as e:
+                print(f"Error accessing {root}: {e}", file=sys.stderr)
+                continue
+            roots_by_device.setdefault(device, []).append(root)
+        return roots_by_device
+
+    def _walk_device(self, device: int, roots: List[str], files_by_size: Dict, seen_inodes: set):
+        """
+        Recorre las raíces de un dispositivo y añade cada archivo al índice por
+        tamaño, con tantos hilos como admita el dispositivo. Los hilos comparten
+        una cola de carpetas; el recorrido termina cuando está vacía y ningún
+        hilo sigue listando (y, por tanto, puede añadir subcarpetas).
+        """
+        profile = DeviceProfile.get(device)
+        pending = self.scheduler.queue()
+        for root in roots:
+            pending.push(root)
+        condition = threading.Condition()
+        listing = 0  # Hilos con una carpeta en curso
+
+        def worker():
+            nonlocal listing
+            while True:
+                with condition:
+                    while not pending and listing:
+                        condition.wait()
+                    directory = pending.pop()
+                    if directory is None:
+                        condition.notify_all()
+                        return
+                    listing += 1
+                try:
+                    for subdirectory in self._list_directory(directory, files_by_size, seen_inodes,
+                                                             profile.rotational):
+                        with condition:
+                            pending.push(subdirectory)
+                            condition.notify()
+                finally:
+                    with condition:
+                        listing -= 1
+                        condition.notify_all()
+
+        self._run_workers(worker, profile.workers)
+
+    @staticmethod
+    def _run_workers(worker: Callable[[], None], workers: int):
+        """Ejecuta worker en varios hilos a la vez, o en el actual si basta con uno."""
+        if workers <= 1:
+            worker()
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(worker) for _ in range(workers)]:
+                future.result()
+
+    def _list_directory(self, directory: str, files_by_size: Dict, seen_inodes: set,
+                        by_inode: bool) -> List[str]:
+        """Añade los archivos de la carpeta al índice y devuelve las subcarpetas pendientes."""
+        self.io.acquire()
+        list_start = time.perf_counter()
+        try:
+            with self.metrics.phase('list'):
+                # El mtime se toma antes de listar: un cambio durante el listado obliga a repetirlo
+                directory_mtime = os.stat(directory).st_mtime if self.checkpoint else None
+                entries = list(os.scandir(directory))
+            self.metrics.count('listdir')
+        except OSError as e:
+            print(f"Error listing {directory}: {e}", file=sys.stderr)
+            return []
+        self.io.observe(time.perf_counter() - list_start)
+        if by_inode:
+            # En un disco mecánico, los stat en orden de inodo recorren la tabla de inodos sin saltar
+            entries.sort(key=os.DirEntry.inode)
+
+        listed_files = []
+        subdirectories = []
+        pending = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # Las carpetas excluidas se podan sin llegar a abrirlas
+                    if self.matcher.allow_directory(entry):
+                        subdirectories.append(entry.path)
+                        if entry.path not in self._restored_dirs:
+                            pending.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+                self.io.acquire()
+                stat = entry.stat()
+            except OSError as e:
+                print(f"Error accessing {entry.path}: {e}", file=sys.stderr)
+                continue
+            self.metrics.count('stat')
+            if not self.matcher.allow_file(entry, stat.st_size):
+                continue
+
+            with self._lock:
+                # El mismo inodo (enlace duro, symlink o montaje solapado) solo cuenta una vez
+                inode = (stat.st_dev, stat.st_ino)
+                if inode in seen_inodes:
+                    continue
+                seen_inodes.add(inode)
+                files_by_size.setdefault(stat.st_size, []).append(
+                    (entry.name, entry.path, stat.st_dev, stat.st_mtime, stat.st_ino))
+            listed_files.append([entry.name, entry.path, stat.st_dev, stat.st_ino,
+                                 stat.st_mtime, stat.st_size])
+            if self.scan_archives and ArchiveReader.is_archive(entry.name):
+                for member in self._list_archive(entry.path, stat.st_dev, stat.st_ino, files_by_size):
+                    listed_files.append([member.name, member.path, stat.st_dev, 0,
+                                         member.mtime, member.size])
+
+        if self.checkpoint:
+            self.checkpoint.record_directory(directory, directory_mtime, listed_files, subdirectories)
+        return pending
+
+    def _list_archive(self, archive_path: str, device: int, inode: int,
+                      files_by_size: Dict) -> List[ArchiveMember]:
+        """Añade al índice por tamaño las entradas del archivo comprimido."""
+        try:
+            with self.metrics.phase('archive'):
+                members = [member for member in ArchiveReader.iter_members(archive_path)
+                           if self.matcher.allow_member(member.path, member.name, member.size)]
+        except Exception as e:
+            print(f"Error reading archive {archive_path}: {e}", file=sys.stderr)
+            return []
+        self.metrics.count('archive_members', len(members))
+        with self._lock:
+            for member in members:
+                # Las entradas se leen junto a su archivo: para ordenar, cuentan con su inodo
+                files_by_size.setdefault(member.size, []).append(
+                    (member.name, member.path, device, member.mtime, inode))
+        return members
+
+    def _restore(self, state: ResumeState, files_by_size: Dict, seen_inodes: set):
+        """Añade al índice las carpetas ya listadas en el escaneo interrumpido."""
+        self._restored_dirs = set(state.listings)
+        self._restored_hashes = state.hashes
+        for record in state.listings.values():
+            for name, full_path, device, inode, mtime, size in record['files']:
+                if inode:
+                    seen_inodes.add((device, inode))
+                files_by_size.setdefault(size, []).append((name, full_path, device, mtime, inode))
+        self.metrics.count('resumed_dirs', len(state.listings))
+
+    def _hash_files(self, device: int, candidates: List[tuple], files_by_hash: Dict,
+                    tracker: ProgressTracker):
+        """
+        Calcula el hash de los candidatos de un dispositivo con tantos hilos
+        como admita (uno solo en un disco mecánico), carpeta a carpeta y
+        empezando por las que la interfaz haya promovido.
+        """
+        profile = DeviceProfile.get(device)
+        self.metrics.count(f'device_{profile.kind}')
+        work = self._iter_work(candidates, profile.rotational)
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    item = next(work, None)
+                if item is None:
+                    return
+                archive_path, item_candidates = item
+                if archive_path is None:
+                    self._hash_candidate(item_candidates[0], files_by_hash, tracker)
+                else:
+                    self._hash_archive_members(archive_path, item_candidates, files_by_hash, tracker)
+
+        self._run_workers(worker, min(profile.workers, len(candidates)))
+
+    def _iter_work(self, candidates: List[tuple], by_inode: bool) -> Iterator[Tuple[Optional[str], List[tuple]]]:
+        """
+        Reparte los candidatos en trabajos (None, [archivo]) o (archivo comprimido,
+        [entradas]). Las carpetas se toman de la cola a medida que se piden, para
+        atender las promociones hechas durante el cálculo. En un disco mecánico
+        los archivos se leen en orden de inodo, que suele seguir el orden en el
+        disco, y las carpetas según su primer inodo.
+        """
+        candidates_by_folder = {}
+        for candidate in candidates:
+            full_path = candidate[1]
+            if ArchiveReader.is_virtual(full_path):
+                # Las entradas se leen junto a su archivo comprimido
+                full_path = ArchiveReader.split_virtual_path(full_path)[0]
+            candidates_by_folder.setdefault(os.path.dirname(full_path), []).append(candidate)
+
+        if by_inode:
+            for folder_candidates in candidates_by_folder.values():
+                folder_candidates.sort(key=lambda candidate: candidate[4])
+            folders = sorted(candidates_by_folder, key=lambda folder: candidates_by_folder[folder][0][4],
+                             reverse=True)
+        else:
+            folders = sorted(candidates_by_folder, reverse=True)
+        pending: DirectoryQueue = self.scheduler.queue()
+        for folder in folders:
+            pending.push(folder)
+
+        while pending:
+            members_by_archive = {}
+            for candidate in candidates_by_folder.pop(pending.pop()):
+                full_path = candidate[1]
+                if ArchiveReader.is_virtual(full_path) and self._restored_hash(candidate) is None:
+                    archive_path = ArchiveReader.split_virtual_path(full_path)[0]
+                    members_by_archive.setdefault(archive_path, []).append(candidate)
+                    continue
+                yield None, [candidate]
+            yield from members_by_archive.items()
+
+    def _restored_hash(self, candidate: tuple) -> Optional[str]:
+        """Hash calculado antes de que se interrumpiera el escaneo, si el archivo no ha cambiado."""
+        restored = self._restored_hashes.get(candidate[1])
+        if restored is not None and restored[:2] == (candidate[2], candidate[3]):
+            return restored[2]
+        return None
+
+    def _hash_candidate(self, candidate: tuple, files_by_hash: Dict, tracker: ProgressTracker):
+        name, full_path, size, mtime, _ = candidate
+        restored = self._restored_hash(candidate)
+        if restored is not None:
+            tracker.start_file(full_path)
+            tracker.advance(size)
+            tracker.finish_file()
+            self.metrics.count('resumed_hashes')
+            self._add_hash(name, full_path, size, mtime, restored, files_by_hash, record=False)
+            return
+        tracker.start_file(full_path)
+        read_bytes = 0
+
+        def on_block(n_bytes):
+            nonlocal read_bytes
+            read_bytes += n_bytes
+            tracker.advance(n_bytes)
+
+        with self.metrics.phase('hash'):
+            file_hash = self.calculate_file_hash(full_path, on_block=on_block, reader=self.reader)
+        # Si el archivo cambió o falló la lectura, el progreso cuenta el tamaño previsto
+        if read_bytes < size:
+            tracker.advance(size - read_bytes)
+        tracker.finish_file()
+
+        if file_hash:
+            self._add_hash(name, full_path, size, mtime, file_hash, files_by_hash)
+
+    def _add_hash(self, name: str, full_path: str, size: int, mtime: float, file_hash: str,
+                  files_by_hash: Dict, record: bool = True):
+        if record:
+            self.metrics.count('bytes_read', size)
+            if self.checkpoint:
+                self.checkpoint.record_hash(full_path, size, mtime, file_hash)
+        self.metrics.count('files')
+        with self._lock:
+            files_by_hash.setdefault((size, file_hash), []).append((name, full_path, mtime))
+            # El manifiesto solo recoge archivos reales, que se pueden verificar y copiar
+            if self.hash_all and not ArchiveReader.is_virtual(full_path):
+                self.manifest_records.append((size, file_hash, mtime, full_path))
+
+    def _hash_archive_members(self, archive_path: str, members: List[tuple], files_by_hash: Dict,
+                              tracker: ProgressTracker):
+        """
+        Calcula el hash de las entradas candidatas de un archivo comprimido en
+        una sola pasada. De la cabecera leída se obtiene también la fecha EXIF.
+        """
+        pending = {candidate[1]: candidate for candidate in members}
+        # Todas son de archive_path: el nombre de la entrada es lo que sigue al separador
+        wanted = [full_path[len(archive_path) + len(ARCHIVE_SEPARATOR):] for full_path in pending]
+        try:
+            for member, stream in ArchiveReader.iter_streams(archive_path, wanted):
+                candidate = pending.pop(member.path, None)
+                if candidate is None:
+                    continue  # Entrada repetida dentro del archivo
+                name, full_path, size, mtime, _ = candidate
+                tracker.start_file(full_path)
+                with self.metrics.phase('hash'):
+                    head = stream.read(FileMetadata.EXIF_HEADER_BYTES)
+                    file_hash = self.reader.hash_stream(stream, tracker.advance, prefix=head)
+                with self.metrics.phase('date'):
+                    self._member_dates[full_path] = FileMetadata.get_stream_date(name, io.BytesIO(head), mtime)
+                tracker.finish_file()
+                self._add_hash(name, full_path, size, mtime, file_hash, files_by_hash)
+        except Exception as e:
+            print(f"Error reading archive {archive_path}: {e}", file=sys.stderr)
+        # Lo que no se pudo leer cuenta igualmente para el progreso
+        for _, full_path, size, _, _ in pending.values():
+            tracker.start_file(full_path)
+            tracker.advance(size)
+            tracker.finish_file()
+
+    def run(self) -> Dict:
+        """
+        Devuelve {hash: {'files': [...], 'size': bytes}} solo con los grupos duplicados.
+        """
+        if self.checkpoint is None:
+            return self._run(None)
+        state = self.checkpoint.load()
+        self.resumed = state is not None
+        self.checkpoint.start(state)
+        try:
+            duplicates = self._run(state)
+        except BaseException:
+            self.checkpoint.close()  # Queda el diario para reanudar
+            raise
+        self.checkpoint.discard()
+        return duplicates
+
+    def _run(self, state: Optional[ResumeState]) -> Dict:
+        self.manifest_records = []
+        self._member_dates = {}
+        files_by_size = {}   # Índice compartido por tamaño
+        seen_inodes = set()
+        if state is not None:
+            self._restore(state, files_by_size, seen_inodes)
+            # Solo se recorren las carpetas pendientes o que han cambiado
+            roots_by_device = self._roots_by_device(state.pending)
+        else:
+            self._restored_dirs = set()
+            self._restored_hashes = {}
+            roots_by_device = self._roots_by_device()
+
+        # Un recorrido por dispositivo, en paralelo; cada uno con sus propios hilos
+        with ThreadPoolExecutor(max_workers=max(len(roots_by_device), 1)) as executor:
+            for future in [executor.submit(self._walk_device, device, roots, files_by_size, seen_inodes)
+                           for device, roots in roots_by_device.items()]:
+                future.result()
+        self.matcher.record_metrics(self.metrics)
+
+        # Solo se calcula el hash de los archivos cuyo tamaño no es único
+        candidates_by_device = {}
+        for size, entries in files_by_size.items():
+            if len(entries) < 2 and not self.hash_all:
+                continue
+            for name, full_path, device, mtime, inode in entries:
+                candidates_by_device.setdefault(device, []).append((name, full_path, size, mtime, inode))
+        total_candidates = sum(len(candidates) for candidates in candidates_by_device.values())
+        self.metrics.count('size_candidates', total_candidates)
+
+        # El progreso se mide en bytes: un vídeo grande avanza la barra mientras se lee
+        tracker = ProgressTracker(
+            sum(candidate[2] for candidates in candidates_by_device.values() for candidate in candidates),
+            total_candidates, self.progress_callback, self.status_callback)
+        files_by_hash = {}
+        with ThreadPoolExecutor(max_workers=max(len(candidates_by_device), 1)) as executor:
+            for future in [executor.submit(self._hash_files, device, candidates, files_by_hash, tracker)
+                           for device, candidates in candidates_by_device.items()]:
+                future.result()
+        tracker.finish()
+
+        # Hashes de Merkle por carpeta a partir de los hashes de los archivos
+        with self.metrics.phase('folders'):
+            hash_by_path = {full_path: file_hash for (_, file_hash), files in files_by_hash.items()
+                            for _, full_path, _ in files}
+            self.folder_duplicates = FolderHasher.find_duplicate_folders(
+                ((full_path, size, hash_by_path.get(full_path))
+                 for size, entries in files_by_size.items() for _, full_path, _, _, _ in entries),
+                self.roots)
+
+        duplicates = {}  # Diccionario para guardar solo los archivos duplicados
+        for (size, file_hash), files in files_by_hash.items():
+            if len(files) < 2:
+                continue
+            file_infos = []
+            for name, full_path, mtime in files:
+                try:
+                    date = self._member_dates.get(full_path)
+                    if date is None:
+                        with self.metrics.phase('date'):
+                            date = FileMetadata.get_file_date(full_path, self.metrics)
+                except OSError as e:
+                    print(f"Error processing {full_path}: {e}", file=sys.stderr)
+                    continue
+                file_infos.append({
+                    'name': name,
+                    'path': full_path,
+                    'size': size,
+                    'date': date,
+                    'mtime': mtime  # El del archivo al calcular su hash
+                })
+            if len(file_infos) >= 2:
+                duplicates[file_hash] = {'files': file_infos, 'size': size}
+        self.io.record_metrics()
+        return duplicates
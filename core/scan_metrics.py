@@ -0,0 +1,134 @@
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+from .app_paths import get_logs_dir
+
+METRICS_ENV_VAR = "ORGANIZADOR_METRICS"
+
+
+class _NullPhase:
+    """Contexto vacío que se usa cuando las métricas están desactivadas."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class ScanMetrics:
+    """
+    Temporizadores por fase, contadores e histogramas de latencia para
+    escaneos y movimientos. Desactivado, cada llamada retorna de inmediato.
+    """
+    UPDATE_INTERVAL = 1.0  # Segundos mínimos entre instantáneas para la interfaz
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.phases = {}      # nombre -> {'count', 'seconds'}
+        self.counters = {}    # nombre -> valor
+        self.histograms = {}  # nombre -> {cota superior en µs (potencia de 2): cuenta}
+        self._last_update = None  # Instante de la última snapshot_if_due
+
+    @classmethod
+    def from_environment(cls):
+        """Activa las métricas si ORGANIZADOR_METRICS está definida."""
+        return cls(enabled=os.environ.get(METRICS_ENV_VAR, "") not in ("", "0"))
+
+    def phase(self, name: str):
+        """Contexto que mide la duración de una fase."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def count(self, name: str, value: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        """Acumula una duración en la fase y en su histograma de latencias."""
+        if not self.enabled:
+            return
+        bucket = 1 << max(int(seconds * 1_000_000), 1).bit_length()
+        with self._lock:
+            phase = self.phases.setdefault(name, {'count': 0, 'seconds': 0.0})
+            phase['count'] += 1
+            phase['seconds'] += seconds
+            histogram = self.histograms.setdefault(name, {})
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'elapsed_seconds': time.perf_counter() - self._start,
+                'phases': {name: dict(phase) for name, phase in self.phases.items()},
+                'counters': dict(self.counters),
+                'histograms_us': {
+                    name: {str(bucket): count for bucket, count in sorted(histogram.items())}
+                    for name, histogram in self.histograms.items()
+                },
+            }
+
+    def snapshot_if_due(self, interval: float = UPDATE_INTERVAL) -> Optional[Dict]:
+        """Instantánea si han pasado interval segundos desde la anterior; None si no, o si están desactivadas."""
+        if not self.enabled:
+            return None
+        now = time.perf_counter()
+        if self._last_update is not None and now - self._last_update < interval:
+            return None
+        self._last_update = now
+        return self.snapshot()
+
+    @staticmethod
+    def format_summary(snapshot: Dict) -> str:
+        """Resumen de una línea: archivos, bytes leídos, tiempo y las fases más costosas."""
+        counters = snapshot['counters']
+        parts = [f"{counters.get('files', 0)} archivos"]
+        if counters.get('bytes_read'):
+            parts.append(f"{counters['bytes_read'] / (1024 * 1024):.1f} MB leídos")
+        parts.append(f"{snapshot['elapsed_seconds']:.1f} s")
+        slowest = sorted(snapshot['phases'].items(), key=lambda item: item[1]['seconds'], reverse=True)
+        parts.extend(f"{name} {phase['seconds']:.1f} s" for name, phase in slowest[:3])
+        return " · ".join(parts)
+
+    def dump_json(self, run_name: str, path: Optional[str] = None) -> Optional[str]:
+        """Guarda las métricas del run en JSON (por defecto en la carpeta de logs)."""
+        if not self.enabled:
+            return None
+        if path is None:
+            timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(get_logs_dir(), f"metrics-{run_name}-{timestamp}.json")
+        try:
+            with open(path, 'w') as f:
+                json.dump({'run': run_name, **self.snapshot()}, f, indent=2)
+            return path
+        except OSError as e:
+            print(f"Error writing metrics {path}: {e}", file=sys.stderr)
+            return None
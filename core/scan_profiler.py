@@ -0,0 +1,170 @@
+import cProfile
+import datetime
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from .app_paths import get_logs_dir
+
+PROFILE_ENV_VAR = "ORGANIZADOR_PROFILE"
+
+# Funciones de las que siempre se informa el número de llamadas
+HOT_FUNCTIONS = (
+    'get_file_date',
+    'calculate_file_hash',
+    'process_file',
+    'populate_table',
+    'populate_tree',
+    'move',
+)
+
+
+class _NullProfiler:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class ScanProfiler:
+    """
+    Perfila un bloque con cProfile y tracemalloc y deja en la carpeta de logs
+    un .prof, un informe de asignaciones y el número de llamadas de las
+    funciones críticas. Solo puede haber un bloque perfilado a la vez (desde
+    Python 3.12 cProfile admite un único perfilador activo en el proceso);
+    los que empiezan mientras otro está activo no se perfilan. Se incluyen
+    los hilos creados dentro del bloque, como los de los ThreadPoolExecutor
+    del escaneo.
+    """
+    TOP_ALLOCATIONS = 25
+
+    _active = None
+    _active_lock = threading.Lock()
+
+    def __init__(self, run_name: str, snapshot_interval: float = 10.0, output_dir: str = None):
+        self.run_name = run_name
+        self.snapshot_interval = snapshot_interval
+        self.output_dir = output_dir
+        self.profile = cProfile.Profile()
+        self._thread_profiles = []  # Un perfil por cada hilo creado dentro del bloque (Python < 3.12)
+        self._lock = threading.Lock()
+        self._enabled = False
+        self._stop = threading.Event()
+        self._snapshot_thread = None
+        self._started_tracemalloc = False
+        self._snapshots = []  # (segundo, informe) de cada instantánea periódica
+
+    @classmethod
+    def from_environment(cls, run_name: str):
+        """Devuelve un perfilador activo solo si ORGANIZADOR_PROFILE está definida."""
+        if os.environ.get(PROFILE_ENV_VAR, "") in ("", "0"):
+            return _NullProfiler()
+        return cls(run_name)
+
+    def __enter__(self):
+        with ScanProfiler._active_lock:
+            if ScanProfiler._active is not None:
+                return self  # Ya hay otro bloque perfilado: este se ejecuta sin perfilar
+            try:
+                self.profile.enable()
+            except ValueError as e:  # Otro perfilador (un depurador, por ejemplo) ocupa cProfile
+                print(f"Error starting profiler for {self.run_name}: {e}", file=sys.stderr)
+                return self
+            ScanProfiler._active = self
+        self._enabled = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start = datetime.datetime.now()
+        self._snapshot_thread = threading.Thread(target=self._take_snapshots, daemon=True)
+        self._snapshot_thread.start()
+        if sys.version_info < (3, 12):
+            # Hasta 3.12 cada hilo se perfila por separado; desde 3.12 un perfil cubre todos
+            threading.setprofile(self._profile_thread)
+        return self
+
+    def __exit__(self, *exc):
+        if not self._enabled:
+            return False
+        self.profile.disable()
+        if sys.version_info < (3, 12):
+            threading.setprofile(None)
+        with ScanProfiler._active_lock:
+            ScanProfiler._active = None
+        self._stop.set()
+        self._snapshot_thread.join()
+        final_snapshot = self._format_snapshot(tracemalloc.take_snapshot())
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        try:
+            self._write_reports(final_snapshot)
+        except OSError as e:
+            print(f"Error writing profile for {self.run_name}: {e}", file=sys.stderr)
+        return False
+
+    def _profile_thread(self, frame, event, arg):
+        """Primer evento de un hilo nuevo: a partir de aquí lo perfila su propio cProfile."""
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._thread_profiles.append(profile)
+        profile.enable()
+
+    def stats(self) -> pstats.Stats:
+        """Estadísticas del bloque junto con las de los hilos creados en él."""
+        stats = pstats.Stats(self.profile)
+        with self._lock:
+            thread_profiles = list(self._thread_profiles)
+        for profile in thread_profiles:
+            stats.add(profile)
+        return stats
+
+    def _take_snapshots(self):
+        while not self._stop.wait(self.snapshot_interval):
+            elapsed = (datetime.datetime.now() - self._start).total_seconds()
+            self._snapshots.append((elapsed, self._format_snapshot(tracemalloc.take_snapshot())))
+
+    def _format_snapshot(self, snapshot) -> str:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Memoria actual: {current / 1024:.1f} KB, pico: {peak / 1024:.1f} KB"]
+        for stat in snapshot.statistics('lineno')[:self.TOP_ALLOCATIONS]:
+            lines.append(f"  {stat}")
+        return "\n".join(lines)
+
+    def hot_path_calls(self) -> dict:
+        """Número de llamadas y tiempo acumulado de las funciones críticas."""
+        stats = self.stats()
+        calls = {}
+        for (filename, line, function), (_, ncalls, _, cumtime, _) in stats.stats.items():
+            if function in HOT_FUNCTIONS:
+                key = f"{function} ({os.path.basename(filename)}:{line})"
+                calls[key] = {'calls': ncalls, 'cumulative_seconds': cumtime}
+        return calls
+
+    def _write_reports(self, final_snapshot: str):
+        output_dir = self.output_dir or get_logs_dir()
+        base_name = os.path.join(
+            output_dir, f"profile-{self.run_name}-{self._start.strftime('%Y%m%d-%H%M%S')}")
+
+        stats = self.stats()
+        stats.dump_stats(base_name + ".prof")
+
+        with open(base_name + "-report.txt", "w", encoding="utf-8") as f:
+            f.write(f"Perfil de {self.run_name} ({self._start.isoformat()})\n\n")
+            f.write("Llamadas a funciones críticas:\n")
+            for name, data in sorted(self.hot_path_calls().items()):
+                f.write(f"  {name}: {data['calls']} llamadas, {data['cumulative_seconds']:.3f} s\n")
+
+            for elapsed, report in self._snapshots:
+                f.write(f"\nInstantánea de memoria a los {elapsed:.0f} s:\n{report}\n")
+            f.write(f"\nInstantánea final de memoria:\n{final_snapshot}\n")
+
+            f.write("\nFunciones con más tiempo acumulado:\n")
+            stats.stream = f
+            stats.sort_stats('cumulative').print_stats(30)
@@ -0,0 +1,245 @@
+import fnmatch
+import json
+import os
+import re
+import stat as stat_module
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .app_paths import get_app_dir
+from .scan_scheduler import ScanScheduler
+
+RULES_FILE = "scan_rules.json"
+
+# Carpetas que casi nunca contienen nada que le interese al usuario; solo se
+# excluyen si se pide (exclude_common), por defecto se escanea todo
+COMMON_EXCLUDE = [
+    '.git', '.hg', '.svn', 'node_modules', '__pycache__', '.cache', '.thumbnails',
+    '.Trash*', '$RECYCLE.BIN', 'System Volume Information', '@eaDir', 'Thumbs.db',
+    '.DS_Store',
+]
+
+_HIDDEN = getattr(stat_module, 'FILE_ATTRIBUTE_HIDDEN', 2)
+_SYSTEM = getattr(stat_module, 'FILE_ATTRIBUTE_SYSTEM', 4)
+
+
+class ScanRules:
+    """
+    Reglas de exclusión e inclusión para los escaneos: patrones glob,
+    tamaño mínimo/máximo, extensiones permitidas y archivos ocultos o de sistema.
+    Los patrones con separador (fotos/*.jpg) se comparan con el final de la
+    ruta; el resto, con el nombre. Con scan_archives también se recorren las
+    entradas de los ZIP y TAR. Por defecto no se descarta nada: cada regla
+    se activa explícitamente, como exclude_common para COMMON_EXCLUDE.
+    """
+
+    def __init__(self, exclude: Optional[List[str]] = None, include: Optional[List[str]] = None,
+                 min_size: Optional[int] = None, max_size: Optional[int] = None,
+                 extensions: Optional[List[str]] = None, skip_hidden: bool = False,
+                 skip_system: bool = False, scan_archives: bool = False,
+                 exclude_common: bool = False):
+        self.exclude = list(exclude or [])
+        self.exclude_common = exclude_common
+        self.include = list(include or [])
+        self.min_size = min_size
+        self.max_size = max_size
+        self.extensions = [ext.lower() if ext.startswith('.') else f".{ext.lower()}"
+                           for ext in (extensions or [])]
+        self.skip_hidden = skip_hidden
+        self.skip_system = skip_system
+        self.scan_archives = scan_archives
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'ScanRules':
+        """Carga las reglas del usuario; si no hay archivo, usa las de por defecto."""
+        path = path or os.path.join(get_app_dir(), RULES_FILE)
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, encoding='utf-8') as f:
+                return cls(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error loading scan rules {path}: {e}", file=sys.stderr)
+            return cls()
+
+    def save(self, path: Optional[str] = None):
+        path = path or os.path.join(get_app_dir(), RULES_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_dict(self) -> Dict:
+        return {
+            'exclude': self.exclude,
+            'exclude_common': self.exclude_common,
+            'include': self.include,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'extensions': self.extensions,
+            'skip_hidden': self.skip_hidden,
+            'skip_system': self.skip_system,
+            'scan_archives': self.scan_archives,
+        }
+
+    def compile(self) -> 'RuleMatcher':
+        return RuleMatcher(self)
+
+
+def _is_path_pattern(pattern: str) -> bool:
+    return '/' in pattern or '\\' in pattern
+
+
+def _compile_globs(patterns: Iterable[str], paths: bool = False) -> Optional[re.Pattern]:
+    """
+    Une todos los globs en una sola expresión regular. Con paths, cada
+    patrón puede ir precedido de cualquier carpeta, y se compara con rutas
+    separadas por '/'.
+    """
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    flags = re.IGNORECASE if os.name == 'nt' else 0
+    if paths:
+        patterns = [pattern.replace('\\', '/') for pattern in patterns]
+    prefix = "(?:.*/)?" if paths else ""
+    return re.compile("|".join(f"(?:{prefix}{fnmatch.translate(pattern)})" for pattern in patterns), flags)
+
+
+class RuleMatcher:
+    """
+    Reglas compiladas una sola vez. Se aplican durante el recorrido: las
+    carpetas excluidas se podan y nunca se abren. Lleva la cuenta de los
+    elementos descartados por cada regla.
+    """
+
+    def __init__(self, rules: ScanRules):
+        self.rules = rules
+        # Los patrones con separador se comparan con el final de la ruta; el resto, con el nombre
+        exclude = rules.exclude + (COMMON_EXCLUDE if rules.exclude_common else [])
+        self._exclude_names = _compile_globs(p for p in exclude if not _is_path_pattern(p))
+        self._exclude_paths = _compile_globs((p for p in exclude if _is_path_pattern(p)), paths=True)
+        self._include_names = _compile_globs(p for p in rules.include if not _is_path_pattern(p))
+        self._include_paths = _compile_globs((p for p in rules.include if _is_path_pattern(p)), paths=True)
+        self._include = bool(rules.include)
+        self._extensions = tuple(rules.extensions)
+        self._lock = threading.Lock()
+        self.skip_counts = {}
+
+    def _skip(self, rule: str) -> bool:
+        with self._lock:
+            self.skip_counts[rule] = self.skip_counts.get(rule, 0) + 1
+        return False
+
+    def record_metrics(self, metrics):
+        """Añade los descartes por regla a los contadores de ScanMetrics."""
+        for rule, count in self.skip_counts.items():
+            metrics.count(f'skipped_{rule}', count)
+
+    def _excluded(self, name: str, path: str) -> bool:
+        return bool((self._exclude_names and self._exclude_names.match(name)) or
+                    (self._exclude_paths and self._exclude_paths.match(path.replace('\\', '/'))))
+
+    def _included(self, name: str, path: str) -> bool:
+        return bool((self._include_names and self._include_names.match(name)) or
+                    (self._include_paths and self._include_paths.match(path.replace('\\', '/'))))
+
+    def _hidden_or_system(self, entry: os.DirEntry) -> Optional[str]:
+        if self.rules.skip_hidden and entry.name.startswith('.'):
+            return 'hidden'
+        if os.name == 'nt' and (self.rules.skip_hidden or self.rules.skip_system):
+            try:
+                attributes = entry.stat(follow_symlinks=False).st_file_attributes
+            except OSError:
+                return None
+            if self.rules.skip_system and attributes & _SYSTEM:
+                return 'system'
+            if self.rules.skip_hidden and attributes & _HIDDEN:
+                return 'hidden'
+        return None
+
+    def allow_directory(self, entry: os.DirEntry) -> bool:
+        if self._excluded(entry.name, entry.path):
+            return self._skip('exclude')
+        rule = self._hidden_or_system(entry)
+        if rule:
+            return self._skip(rule)
+        return True
+
+    def allow_file(self, entry: os.DirEntry, size: Optional[int] = None) -> bool:
+        name = entry.name
+        if self._excluded(name, entry.path):
+            return self._skip('exclude')
+        if self._include and not self._included(name, entry.path):
+            return self._skip('include')
+        if self._extensions and not name.lower().endswith(self._extensions):
+            return self._skip('extension')
+        rule = self._hidden_or_system(entry)
+        if rule:
+            return self._skip(rule)
+        if self.rules.min_size is not None or self.rules.max_size is not None:
+            if size is None:
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    return self._skip('error')
+            if self.rules.min_size is not None and size < self.rules.min_size:
+                return self._skip('min_size')
+            if self.rules.max_size is not None and size > self.rules.max_size:
+                return self._skip('max_size')
+        return True
+
+    def allow_member(self, path: str, name: str, size: int) -> bool:
+        """Las mismas reglas para una entrada de un archivo comprimido (sin atributos de sistema)."""
+        if self._excluded(name, path):
+            return self._skip('exclude')
+        if self._include and not self._included(name, path):
+            return self._skip('include')
+        if self._extensions and not name.lower().endswith(self._extensions):
+            return self._skip('extension')
+        if self.rules.skip_hidden and name.startswith('.'):
+            return self._skip('hidden')
+        if self.rules.min_size is not None and size < self.rules.min_size:
+            return self._skip('min_size')
+        if self.rules.max_size is not None and size > self.rules.max_size:
+            return self._skip('max_size')
+        return True
+
+    def walk(self, root: str, scheduler: Optional[ScanScheduler] = None,
+             io=None) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+        """
+        Recorre root en orden descendente devolviendo (carpeta, archivos admitidos).
+        Las carpetas excluidas no se abren. Con un ScanScheduler, las carpetas
+        promovidas por la interfaz se recorren antes; con una IOSession, cada
+        listado respeta el presupuesto de E/S.
+        """
+        pending = (scheduler or ScanScheduler()).queue()
+        pending.push(root)
+        while pending:
+            directory = pending.pop()
+            if io is not None:
+                io.acquire()
+            list_start = time.perf_counter()
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = list(iterator)
+            except OSError as e:
+                print(f"Error listing {directory}: {e}", file=sys.stderr)
+                continue
+            if io is not None:
+                io.observe(time.perf_counter() - list_start)
+
+            files = []
+            subdirectories = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.allow_directory(entry):
+                            subdirectories.append(entry.path)
+                    elif entry.is_file() and self.allow_file(entry):
+                        files.append(entry)
+                except OSError as e:
+                    print(f"Error accessing {entry.path}: {e}", file=sys.stderr)
+            # Orden inverso para que la cola recorra las subcarpetas en orden alfabético
+            for subdirectory in sorted(subdirectories, reverse=True):
+                pending.push(subdirectory)
+            yield directory, sorted(files, key=lambda entry: entry.name)
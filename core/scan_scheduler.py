@@ -0,0 +1,97 @@
+import heapq
+import itertools
+import os
+import threading
+import weakref
+from typing import List, Optional
+
+
+class ScanScheduler:
+    """
+    Prioridades compartidas por las colas de carpetas de un escaneo. La
+    interfaz promueve la carpeta que se está mostrando o los nodos que el
+    usuario despliega; sus subcarpetas (y las carpetas que llevan hasta
+    ellas) pasan delante del resto, que se sigue procesando en segundo
+    plano. La promoción más reciente es la más prioritaria.
+    """
+    MAX_PROMOTED = 8
+    BACKGROUND = MAX_PROMOTED  # Prioridad de las carpetas no promovidas
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._promoted: List[str] = []  # La más reciente primero
+        self._queues = weakref.WeakSet()
+
+    def queue(self) -> 'DirectoryQueue':
+        """Nueva cola de carpetas ordenada según las promociones de este planificador."""
+        queue = DirectoryQueue(self)
+        with self._lock:
+            self._queues.add(queue)
+        return queue
+
+    def promote(self, directory: str):
+        """Adelanta la carpeta, sus subcarpetas y el camino hasta ella. Se puede llamar desde otro hilo."""
+        directory = os.path.normpath(directory)
+        with self._lock:
+            if directory in self._promoted:
+                self._promoted.remove(directory)
+            self._promoted.insert(0, directory)
+            del self._promoted[self.MAX_PROMOTED:]
+            for queue in list(self._queues):
+                queue._reprioritize()
+
+    def _priority(self, directory: str) -> int:
+        for rank, promoted in enumerate(self._promoted):
+            if (directory == promoted or directory.startswith(os.path.join(promoted, '')) or
+                    promoted.startswith(os.path.join(directory, ''))):
+                return rank
+        return self.BACKGROUND
+
+    def is_promoted(self, directory: str) -> bool:
+        with self._lock:
+            return self._priority(directory) < self.BACKGROUND
+
+
+class DirectoryQueue:
+    """
+    Cola de prioridad de carpetas pendientes. A igual prioridad sale la
+    última añadida, como en la pila de un recorrido en profundidad.
+    """
+
+    def __init__(self, scheduler: ScanScheduler):
+        self._scheduler = scheduler
+        self._heap = []
+        self._pending = {}  # carpeta -> prioridad vigente; las entradas del heap que no coinciden están obsoletas
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def push(self, directory: str):
+        with self._scheduler._lock:
+            self._push(directory, self._scheduler._priority(directory))
+
+    def _push(self, directory: str, priority: int):
+        self._pending[directory] = priority
+        heapq.heappush(self._heap, (priority, -next(self._counter), directory))
+
+    def pop(self) -> Optional[str]:
+        """Carpeta más prioritaria, o None si no queda ninguna."""
+        with self._scheduler._lock:
+            while self._heap:
+                priority, _, directory = heapq.heappop(self._heap)
+                if self._pending.get(directory) == priority:
+                    del self._pending[directory]
+                    return directory
+            return None
+
+    def _reprioritize(self):
+        # Se llama con el lock del planificador tomado
+        for directory, priority in list(self._pending.items()):
+            new_priority = self._scheduler._priority(directory)
+            if new_priority != priority:
+                self._push(directory, new_priority)
+        if len(self._heap) > 4 * len(self._pending) + 64:
+            # Demasiadas entradas obsoletas: se reconstruye el heap
+            self._heap = [entry for entry in self._heap if self._pending.get(entry[2]) == entry[0]]
+            heapq.heapify(self._heap)
@@ -1,8 +1,9 @@
 from PyQt5.QtWidgets import QApplication
-import qdarkstyle
-from qdarkstyle import LightPalette
 
 class ThemeManager:
+    # Hojas de estilo ya compiladas por qdarkstyle, por modo (oscuro/claro)
+    _stylesheet_cache = {}
+
     def __init__(self):
         self.dark_mode = True
         self._app = QApplication.instance()
@@ -12,12 +13,22 @@ class ThemeManager:
         self._update_theme()
     
     def _update_theme(self):
-        if self.dark_mode:
-            self._app.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt5'))
-        else:
-            self._app.setStyleSheet(qdarkstyle.load_stylesheet(palette=LightPalette,qt_api='pyqt5'))  # Estilo claro por defecto
+        self._app.setStyleSheet(ThemeManager.load_stylesheet(self.dark_mode))
+
+    @staticmethod
+    def load_stylesheet(dark_mode=True):
+        """Devuelve la hoja de estilo de qdarkstyle, compilándola solo la primera vez."""
+        if dark_mode not in ThemeManager._stylesheet_cache:
+            import qdarkstyle
+            if dark_mode:
+                stylesheet = qdarkstyle.load_stylesheet(qt_api='pyqt5')
+            else:
+                from qdarkstyle import LightPalette
+                stylesheet = qdarkstyle.load_stylesheet(palette=LightPalette, qt_api='pyqt5')  # Estilo claro por defecto
+            ThemeManager._stylesheet_cache[dark_mode] = stylesheet
+        return ThemeManager._stylesheet_cache[dark_mode]
 
 
     @property
     def is_dark_mode(self):
-        return self.dark_mode
\ No newline at end of file
+        return self.dark_mode
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import sys
+import uuid
+from typing import Optional, Tuple
+from .app_paths import get_cache_dir
+from .archive_reader import ArchiveReader
+from .io_governor import IOSession
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tif', '.tiff')
+
+
+class ThumbnailCache:
+    """
+    Miniaturas en disco, direccionadas por contenido: si se conoce el hash
+    del archivo y el archivo conserva el tamaño y el mtime con que se
+    calculó, la clave es el hash y el tamaño, así que las copias de un grupo
+    de duplicados comparten miniatura aunque tengan distinto mtime; si no, la
+    ruta y el mtime, y un archivo modificado genera otra. Se decodifican con draft() de PIL, que en los
+    JPEG escala al decodificar (DCT), y thumbnail() con reducing_gap, que
+    reduce por bloques antes de remuestrear.
+    No depende de Qt.
+    """
+    SIZE = 96           # Lado máximo en píxeles
+    QUALITY = 80
+    FOLDER = "thumbnails"
+
+    def __init__(self, directory: Optional[str] = None, size: int = SIZE):
+        self.directory = directory or os.path.join(get_cache_dir(), ThumbnailCache.FOLDER)
+        self.size = size
+
+    @staticmethod
+    def is_image(path: str) -> bool:
+        # Las entradas de archivos comprimidos no tienen miniatura
+        return path.lower().endswith(IMAGE_EXTENSIONS) and not ArchiveReader.is_virtual(path)
+
+    def key(self, source_path: str, stat: os.stat_result, file_hash: Optional[str] = None) -> str:
+        if file_hash:
+            identity = f"{file_hash}\0{stat.st_size}"
+        else:
+            identity = f"{source_path}\0{stat.st_mtime_ns}"
+        data = f"{identity}\0{self.size}".encode('utf-8', 'surrogateescape')
+        return hashlib.sha256(data).hexdigest()[:32]
+
+    def path_for(self, key: str) -> str:
+        # Dos niveles de carpetas para no acumular cientos de miles de archivos en una
+        return os.path.join(self.directory, key[:2], f"{key}.jpg")
+
+    def get(self, source_path: str, file_hash: Optional[str] = None,
+            io: Optional[IOSession] = None, hashed_stat: Optional[Tuple[int, float]] = None) -> Optional[str]:
+        """
+        Ruta de la miniatura de source_path, generándola si no está en caché.
+        file_hash solo se usa como clave con hashed_stat, el (tamaño, mtime)
+        del archivo cuando se calculó, y si el archivo sigue igual: una
+        miniatura del contenido actual guardada con un hash antiguo se
+        mostraría en todas las copias de ese hash.
+        Devuelve None si el archivo no existe o no es una imagen legible.
+        """
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        if hashed_stat is None or (stat.st_size, stat.st_mtime) != tuple(hashed_stat):
+            file_hash = None
+        thumbnail_path = self.path_for(self.key(source_path, stat, file_hash))
+        if os.path.exists(thumbnail_path):
+            return thumbnail_path
+        if io is not None:
+            io.acquire(stat.st_size)
+        try:
+            self._generate(source_path, thumbnail_path, stat if file_hash else None)
+        except Exception as e:
+            print(f"Error generating thumbnail for {source_path}: {e}", file=sys.stderr)
+            return None
+        return thumbnail_path
+
+    def _generate(self, source_path: str, thumbnail_path: str, expected: Optional[os.stat_result] = None):
+        from PIL import Image, ImageOps  # Import diferido, como en FileMetadata
+
+        with Image.open(source_path) as img:
+            # En JPEG decodifica directamente a 1/2, 1/4 u 1/8 sin pasar por el tamaño completo
+            img.draft('RGB', (self.size, self.size))
+            img.thumbnail((self.size, self.size), Image.BICUBIC, reducing_gap=2.0)
+            img = ImageOps.exif_transpose(img)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+
+            os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+            # Se escribe aparte y se renombra: otro hilo nunca ve una miniatura a medias
+            temp_path = f"{thumbnail_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                img.save(temp_path, 'JPEG', quality=self.QUALITY)
+                if expected is not None:
+                    # Si el archivo cambió mientras se leía, la miniatura ya no corresponde al hash
+                    stat = os.stat(source_path)
+                    if (stat.st_size, stat.st_mtime_ns) != (expected.st_size, expected.st_mtime_ns):
+                        raise OSError("file changed while generating its thumbnail")
+                os.replace(temp_path, thumbnail_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
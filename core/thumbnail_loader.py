@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QCoreApplication, QObject, pyqtSignal
+from PyQt5.QtGui import QIcon, QPixmap, QPixmapCache
+from .io_governor import IOGovernor
+from .thumbnail_cache import ThumbnailCache
+
+class ThumbnailLoader(QObject):
+    """
+    Genera miniaturas en un grupo de hilos en segundo plano. Las vistas piden
+    solo las de las filas visibles y cancelan las pendientes al desplazarse;
+    las que ya se están generando terminan y quedan en la caché de disco.
+    """
+    thumbnail_ready = pyqtSignal(str, str)  # Ruta del archivo, ruta de la miniatura ('' si no hay)
+    MAX_WORKERS = 4
+
+    def __init__(self, parent=None, cache=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        governor = IOGovernor.default()
+        self.io = governor.session()
+        self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS,
+                                            initializer=governor.apply_priority)
+        self._pending = {}  # Ruta -> future aún no terminado
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self.shutdown)
+
+    def request(self, source_path, file_hash=None, hashed_stat=None):
+        """
+        Pide la miniatura de source_path; file_hash es el hash del archivo si
+        se conoce y hashed_stat, el (tamaño, mtime) que tenía al calcularlo.
+        """
+        if source_path in self._pending or self._executor is None:
+            return
+        future = self._executor.submit(self._load, source_path, file_hash, hashed_stat)
+        self._pending[source_path] = future
+        future.add_done_callback(lambda _, path=source_path: self._pending.pop(path, None))
+
+    def cancel_pending(self):
+        """Descarta las miniaturas que aún no se han empezado a generar"""
+        for future in list(self._pending.values()):
+            future.cancel()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def icon(thumbnail_path):
+        """Icono de la miniatura; QPixmapCache conserva las decodificadas más recientes"""
+        pixmap = QPixmapCache.find(thumbnail_path)
+        if pixmap is None:
+            pixmap = QPixmap(thumbnail_path)
+            QPixmapCache.insert(thumbnail_path, pixmap)
+        return QIcon(pixmap)
+
+    def _load(self, source_path, file_hash, hashed_stat):
+        thumbnail_path = self.cache.get(source_path, file_hash, self.io, hashed_stat)
+        self.thumbnail_ready.emit(source_path, thumbnail_path or '')
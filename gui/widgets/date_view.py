@@ -1,36 +1,186 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTreeWidget, QTreeWidgetItem
-from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtCore import Qt, QSize, QTimer, pyqtSignal
+import os
+from core.result_store import LAST_DATES_FILE, ResultStore, last_session_path
+from core.thumbnail_cache import ThumbnailCache
+from core.thumbnail_loader import ThumbnailLoader
 
 class DateView(QWidget):
     name = "DateView"
-    
+    directory_expanded = pyqtSignal(str)  # Carpeta desplegada, para priorizarla en el escaneo en curso
+    THUMBNAIL_SIZE = 32
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._thumbnails = {}  # Ruta -> miniatura en disco ('' si no se pudo generar)
+        self.thumbnail_loader = ThumbnailLoader(self)
+        self.thumbnail_loader.thumbnail_ready.connect(self._set_thumbnail)
+        self._thumbnail_timer = QTimer(self)
+        self._thumbnail_timer.setSingleShot(True)
+        self._thumbnail_timer.setInterval(50)
+        self._thumbnail_timer.timeout.connect(self._load_visible_thumbnails)
         self.setup_ui()
         self.files_by_date = {}
-        
+        self.root_path = None  # Carpeta escaneada; las carpetas del árbol son relativas a ella
+        self._store = None  # Resultados de la sesión anterior, mapeados en memoria
+
     def setup_ui(self):
         layout = QVBoxLayout(self)
         self.tree = QTreeWidget()
         self.tree.setHeaderLabels(["Fecha", "Directorio/Archivo"])
         self.tree.setColumnWidth(0, 200)
+        self.tree.itemExpanded.connect(self._on_item_expanded)
+        # Miniaturas solo para los archivos visibles, cuando el desplazamiento se detiene
+        self.tree.setIconSize(QSize(self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE))
+        self.tree.itemCollapsed.connect(self._thumbnail_timer.start)
+        self.tree.verticalScrollBar().valueChanged.connect(self._thumbnail_timer.start)
+        self.tree.verticalScrollBar().rangeChanged.connect(self._thumbnail_timer.start)
         layout.addWidget(self.tree)
 
     def populate_tree(self, files_by_date):
+        self._close_store()
         self.files_by_date = files_by_date
         self.tree.clear()
+        self._reset_thumbnails()
 
         for year_month, directories in sorted(files_by_date.items()):
             year_month_item = QTreeWidgetItem([year_month])
             self.tree.addTopLevelItem(year_month_item)
+            self._add_directories(year_month_item, directories)
+
+    def merge_partial(self, root_path, files_by_date):
+        """
+        Añade los resultados de las carpetas priorizadas mientras el escaneo
+        continúa. Cada carpeta recibida sustituye a la que hubiera en ese mes.
+        """
+        if self._store is not None or root_path != self.root_path:
+            self._close_store()
+            self.files_by_date = {}
+            self.tree.clear()
+            self._reset_thumbnails()
+        self.root_path = root_path
+
+        for year_month, directories in files_by_date.items():
+            self.files_by_date.setdefault(year_month, {}).update(directories)
+            year_month_item = self._month_item(year_month)
+            for index in reversed(range(year_month_item.childCount())):
+                if year_month_item.child(index).text(0) in directories:
+                    year_month_item.takeChild(index)
+            self._add_directories(year_month_item, directories)
+        self._thumbnail_timer.start()
+
+    def _month_item(self, year_month):
+        """Nodo del mes, creado en su posición si aún no existe"""
+        position = self.tree.topLevelItemCount()
+        for index in range(self.tree.topLevelItemCount()):
+            text = self.tree.topLevelItem(index).text(0)
+            if text == year_month:
+                return self.tree.topLevelItem(index)
+            if text > year_month:
+                position = index
+                break
+        year_month_item = QTreeWidgetItem([year_month])
+        self.tree.insertTopLevelItem(position, year_month_item)
+        return year_month_item
+
+    def _add_directories(self, year_month_item, directories):
+        for directory, files in directories.items():
+            dir_item = QTreeWidgetItem([directory])
+            year_month_item.addChild(dir_item)
+
+            for file_info in files:
+                file_item = QTreeWidgetItem(["", file_info['name']])
+                file_item.setData(1, Qt.UserRole, file_info['path'])
+                if ThumbnailCache.is_image(file_info['path']):
+                    # Altura reservada: la fila no crece al llegar la miniatura
+                    file_item.setSizeHint(1, QSize(-1, self.THUMBNAIL_SIZE + 4))
+                dir_item.addChild(file_item)
+
+    def load_last_session(self, root_path):
+        """
+        Muestra los resultados guardados del último escaneo de root_path sin
+        deserializarlos, mientras se escanea de nuevo. Devuelve False si no
+        hay resultados de esa carpeta; si el árbol ya la muestra, lo deja igual.
+        """
+        if self.root_path and self.tree.topLevelItemCount() and self._same_path(self.root_path, root_path):
+            return True
+        store = ResultStore.open(last_session_path(LAST_DATES_FILE))
+        if store is None:
+            return False
+        if not store.root or not self._same_path(store.root, root_path):
+            store.close()
+            return False
+
+        self._close_store()
+        self.files_by_date = {}
+        self.tree.clear()
+        self._reset_thumbnails()
+        self._store = store
+        self.root_path = store.root
+        # Solo se crean los meses; sus archivos se consultan al expandirlos
+        for year_month in store.year_months():
+            year_month_item = QTreeWidgetItem([year_month])
+            year_month_item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+            self.tree.addTopLevelItem(year_month_item)
+        return True
+
+    @staticmethod
+    def _same_path(first, second):
+        return os.path.normcase(os.path.abspath(first)) == os.path.normcase(os.path.abspath(second))
+
+    def _on_item_expanded(self, item):
+        if self._store is not None and item.parent() is None and item.childCount() == 0:
+            self._add_directories(item, self._store.month_files(item.text(0)))
+        elif item.parent() is not None and item.parent().parent() is None and self.root_path:
+            self.directory_expanded.emit(os.path.join(self.root_path, item.text(0)))
+        self._thumbnail_timer.start()
+
+    def _visible_file_items(self):
+        item = self.tree.itemAt(0, 0)
+        bottom = self.tree.viewport().height()
+        while item is not None and self.tree.visualItemRect(item).top() < bottom:
+            if item.data(1, Qt.UserRole):
+                yield item
+            item = self.tree.itemBelow(item)
+
+    def _load_visible_thumbnails(self):
+        """Muestra las miniaturas ya generadas de los archivos visibles y pide las que faltan"""
+        self.thumbnail_loader.cancel_pending()
+        for item in self._visible_file_items():
+            file_path = item.data(1, Qt.UserRole)
+            if not ThumbnailCache.is_image(file_path):
+                continue
+            thumbnail_path = self._thumbnails.get(file_path)
+            if thumbnail_path is None:
+                # Sin hash, la miniatura se identifica por la ruta (y el mtime)
+                self.thumbnail_loader.request(file_path)
+            elif thumbnail_path and item.icon(1).isNull():
+                item.setIcon(1, ThumbnailLoader.icon(thumbnail_path))
+
+    def _reset_thumbnails(self):
+        """Resultado nuevo: las miniaturas recordadas pueden ser de archivos que ya cambiaron"""
+        self._thumbnails = {}
+        self.thumbnail_loader.cancel_pending()
 
-            for directory, files in directories.items():
-                dir_item = QTreeWidgetItem([directory])
-                year_month_item.addChild(dir_item)
+    def _set_thumbnail(self, file_path, thumbnail_path):
+        self._thumbnails[file_path] = thumbnail_path
+        if not thumbnail_path:
+            return
+        for item in self._visible_file_items():
+            if item.data(1, Qt.UserRole) == file_path:
+                item.setIcon(1, ThumbnailLoader.icon(thumbnail_path))
 
-                for file_info in files:
-                    file_item = QTreeWidgetItem(["", file_info['name']])
-                    dir_item.addChild(file_item)
+    def _close_store(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
 
-    def get_files_by_date(self):
+    def get_files_by_date(self, root_path):
+        """
+        Resultado del escaneo de root_path, para reorganizar o simular. Si lo que
+        se muestra es de otra carpeta o de la sesión anterior, devuelve un
+        diccionario vacío: esos datos nunca deben usarse para mover archivos.
+        """
+        if self._store is not None or not self.root_path or not self._same_path(self.root_path, root_path):
+            return {}
         return self.files_by_date
@@ -1,45 +1,102 @@
-from PyQt5.QtWidgets import QWidget, QTableWidget, QTableWidgetItem, QVBoxLayout, QPushButton, QMessageBox, QHeaderView
-from PyQt5.QtCore import Qt
-import datetime
+from PyQt5.QtWidgets import QWidget, QTableWidget, QTableWidgetItem, QVBoxLayout, QHBoxLayout, QPushButton, QMessageBox, QHeaderView, QFileDialog, QTreeWidget, QTreeWidgetItem, QAbstractItemView, QProgressBar
+from PyQt5.QtCore import Qt, QSize, QTimer, pyqtSignal
 import os
 import platform
 import subprocess
-from send2trash import send2trash
-
-class SizeTableWidgetItem(QTableWidgetItem):
-    def __init__(self, size_in_bytes):
-        size_text = f"{int(size_in_bytes/1024)} KB"  # Convert to KB
-        super().__init__(size_text)
-        self.size_in_bytes = size_in_bytes
-
-    def __lt__(self, other):
-        return self.size_in_bytes < other.size_in_bytes
-    
-class DateTableWidgetItem(QTableWidgetItem):
-    def __init__(self, date: datetime.datetime):
-        date_text = date.strftime('%Y-%m-%d %H:%M:%S')
-        super().__init__(date_text)
-        self.timestamp = date.timestamp()
-
-    def __lt__(self, other):
-        return self.timestamp < other.timestamp
+from core.archive_reader import ArchiveReader
+from core.chunk_analyzer import ChunkAnalyzer
+from core.consolidate_worker import ConsolidateWorker
+from core.delete_worker import DeleteWorker
+from core.duplicate_stats import DuplicateStats
+from core.folder_hasher import FolderHasher
+from core.manifest_merge_worker import ManifestMergeWorker
+from core.result_store import LAST_DUPLICATES_FILE, ResultStore, last_session_path
+from core.thumbnail_cache import ThumbnailCache
+from core.thumbnail_loader import ThumbnailLoader
+
+class GroupSortKeys:
+    """
+    Claves de orden por columna: primero un valor del grupo y después el de
+    la fila, para que los archivos de un mismo grupo queden siempre juntos.
+    """
+    @staticmethod
+    def group_key(row, column):
+        stats = row['stats']
+        return (
+            (row['group_id'],),
+            (row['first_name'], row['group_id']),
+            (row['first_path'], row['group_id']),
+            (stats['size'], row['group_id']),
+            (stats['oldest'], row['group_id']),
+            (stats['wasted'], row['group_id']),
+        )[column]
+
+    @staticmethod
+    def row_key(row, column):
+        file = row['file']
+        if column == 1:
+            return file['name']
+        if column == 2:
+            return file['path']
+        return file['date']
 
 class DuplicatesView(QWidget):
     name = "DuplicatesView"
+    THUMBNAIL_SIZE = 40  # Lado de las miniaturas en la columna Nombre
+    SESSION_BATCH = 200  # Grupos de la sesión anterior que se cargan cada vez
+    # Origen de los resultados mostrados: solo los de un escaneo recién hecho se pueden modificar
+    RESULTS_SCAN = 'scan'
+    RESULTS_SESSION = 'session'      # Sesión anterior: los archivos pueden haber cambiado desde entonces
+    RESULTS_MANIFESTS = 'manifests'  # Manifiestos combinados: las rutas pueden ser de otras máquinas
+    READ_ONLY_REASONS = {
+        RESULTS_SESSION: 'Resultados de la sesión anterior: vuelva a buscar duplicados para eliminar o consolidar',
+        RESULTS_MANIFESTS: 'No disponible para duplicados combinados de manifiestos',
+    }
+    export_manifest_requested = pyqtSignal(str)  # Ruta del manifiesto a exportar
+    chunk_analysis_requested = pyqtSignal()  # Analizar contenido compartido entre archivos grandes
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.duplicate_files = {}
+        self.folder_duplicates = []  # Grupos de carpetas idénticas
+        self.consolidate_thread = None
+        self.delete_thread = None
+        self.merge_thread = None
+        self.results_origin = self.RESULTS_SCAN
+        self._path_index = {}  # Ruta -> hash del grupo
+        self.group_stats = {}  # Hash -> copias, espacio recuperable y fechas del grupo
+        self._rows = []  # Datos de cada fila, en el orden de la tabla
+        self._store = None  # Resultados de la sesión anterior, mapeados en memoria
+        self._pending_groups = []  # (hash, estadísticas) de la sesión anterior aún sin cargar
+        self._group_count = 0  # Grupos mostrados; da el ID del siguiente
+        self._thumbnails = {}  # Ruta -> miniatura en disco ('' si no se pudo generar)
+        self.thumbnail_loader = ThumbnailLoader(self)
+        self.thumbnail_loader.thumbnail_ready.connect(self._set_thumbnail)
+        # Las miniaturas se piden cuando el desplazamiento se detiene un instante
+        self._thumbnail_timer = QTimer(self)
+        self._thumbnail_timer.setSingleShot(True)
+        self._thumbnail_timer.setInterval(50)
+        self._thumbnail_timer.timeout.connect(self._load_visible_thumbnails)
         self.setup_ui()
         
     def setup_ui(self):
 
         self.setWindowTitle('Archivos Duplicados')
 
-        # Crear un QTableWidget con 4 columnas
+        # Carpetas idénticas enteras, que se muestran antes que los archivos sueltos
+        self.folder_tree = QTreeWidget(self)
+        self.folder_tree.setHeaderLabels(['Carpetas duplicadas', 'Archivos', 'Recuperable'])
+        self.folder_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.folder_tree.header().setStretchLastSection(False)
+        self.folder_tree.itemDoubleClicked.connect(self.handle_folder_double_click)
+        self.folder_tree.setVisible(False)
+
+        # Crear un QTableWidget con 6 columnas
         self.table_widget = QTableWidget(self)
         self.table_widget.setRowCount(0)  # Inicialmente no hay filas
-        self.table_widget.setColumnCount(5)  # Cuatro columnas: Nombre, Ruta, Tamaño, Fecha
-        self.table_widget.setHorizontalHeaderLabels(['ID','Nombre', 'Ruta', 'Tamaño', 'Fecha'])
+        self.table_widget.setColumnCount(6)  # ID, Nombre, Ruta, Tamaño, Fecha y espacio recuperable del grupo
+        self.table_widget.setHorizontalHeaderLabels(['ID','Nombre', 'Ruta', 'Tamaño', 'Fecha', 'Recuperable'])
+        self.table_widget.setEditTriggers(QAbstractItemView.NoEditTriggers)  # Celdas no editables
 
         # Ajustar el tamaño de las columnas
         header = self.table_widget.horizontalHeader()
@@ -50,106 +107,275 @@ class DuplicatesView(QWidget):
         header.setSectionResizeMode(2, QHeaderView.Stretch)  
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents) 
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents) 
+        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
+
+        # El orden lo gestiona sort_table (por grupos); se conecta una sola vez
+        header.setSortIndicatorShown(True)
+        header.setSectionsClickable(True)
+        header.sectionClicked.connect(self.sort_table)
 
         # Conectar doble clic en las celdas
         self.table_widget.cellDoubleClicked.connect(self.handle_double_click)
-        
 
-        # Llenar la tabla con los archivos duplicados
-        self.populate_table(self.duplicate_files)
+        # Miniaturas solo para las filas visibles; filas de altura fija para que el desplazamiento no salte
+        self.table_widget.setIconSize(QSize(self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE))
+        self.table_widget.verticalHeader().setDefaultSectionSize(self.THUMBNAIL_SIZE + 4)
+        self.table_widget.verticalScrollBar().valueChanged.connect(self._thumbnail_timer.start)
+        self.table_widget.verticalScrollBar().rangeChanged.connect(self._thumbnail_timer.start)
+        self.table_widget.verticalScrollBar().valueChanged.connect(self._load_groups_near_end)
+        
 
         # Botón para eliminar los archivos seleccionados
         self.delete_button = QPushButton('Eliminar Seleccionados', self)
         self.delete_button.clicked.connect(self.delete_selected_files)
+
+        # Botón para sustituir los duplicados por enlaces a una única copia
+        self.consolidate_button = QPushButton('Consolidar con enlaces', self)
+        self.consolidate_button.clicked.connect(self.consolidate_selected_groups)
+        self.consolidate_progress = QProgressBar(self)
+        self.consolidate_progress.setVisible(False)
+
+        # Llenar la tabla con los archivos duplicados
+        self.populate_table(self.duplicate_files)
         
         # Layout
         layout = QVBoxLayout(self)
+        layout.addWidget(self.folder_tree)
         layout.addWidget(self.table_widget)
         layout.addWidget(self.delete_button)
+        layout.addWidget(self.consolidate_button)
+        layout.addWidget(self.consolidate_progress)
+
+        # Manifiestos de hashes para combinar escaneos de varias máquinas
+        manifest_layout = QHBoxLayout()
+        self.export_manifest_button = QPushButton('Exportar manifiesto...', self)
+        self.export_manifest_button.clicked.connect(self.request_manifest_export)
+        self.load_manifests_button = QPushButton('Cargar manifiestos...', self)
+        self.load_manifests_button.clicked.connect(self.load_manifests)
+        manifest_layout.addWidget(self.export_manifest_button)
+        manifest_layout.addWidget(self.load_manifests_button)
+        self.chunk_analysis_button = QPushButton('Analizar bloques compartidos', self)
+        self.chunk_analysis_button.clicked.connect(self.chunk_analysis_requested.emit)
+        manifest_layout.addWidget(self.chunk_analysis_button)
+        layout.addLayout(manifest_layout)
 
         self.setLayout(layout)
         self.show()
 
-    def populate_table(self, duplicate_files):
-
-        # Establecer el orden inicial por tamaño de archivo (de mayor a menor)
-        self.table_widget.setSortingEnabled(False)  # Deshabilitar temporalmente para evitar que el QTableWidget ordene de inmediato.
+    def populate_table(self, duplicate_files, folder_duplicates=None, origin=RESULTS_SCAN):
+        """
+        Muestra los grupos de duplicados. Si no vienen de un escaneo recién
+        hecho (origin), la tabla es de solo lectura: no se puede eliminar ni consolidar.
+        """
+        self.results_origin = origin
+        self._close_store()
+        self._update_action_buttons()
+        self.populate_folders(folder_duplicates or [])
+        # Los archivos que están dentro de carpetas duplicadas ya se cuentan en su carpeta
+        shown_files = FolderHasher.outside_folders(duplicate_files, self.folder_duplicates)
 
-        # Agregar los archivos duplicados al QTableWidget
         self.duplicate_files = duplicate_files
-        self.table_widget.setRowCount(0) #Limpia la tabla
-
-        # Asignar un ID único a cada grupo de duplicados
-        group_id = 1
-        for hash_val, data in self.duplicate_files.items():
-            files = data['files']
-            if len(files) < 2:  # Omitir grupos con menos de 2 archivos
-                continue
-
+        self._path_index = {}
+        # Las rutas sin miniatura del resultado anterior pueden tenerla ahora, y al revés
+        self._thumbnails = {}
+        self.thumbnail_loader.cancel_pending()
+        # Agregados por grupo, una sola vez por resultado; los grupos con más espacio recuperable, primero
+        groups = DuplicateStats.by_reclaimable(shown_files)
+        for _, stats in groups:
+            self._add_display_texts(stats)
+        self.group_stats = dict(groups)
+        self._group_count = len(groups)
+
+        self._rows = []
+        for group_id, (hash_val, stats) in enumerate(groups, start=1):  # ID único por grupo
+            files = sorted(shown_files[hash_val]['files'], key=lambda file: file['date'])
+            first_name = min(file['name'] for file in files)
             for file in files:
-                row_position = self.table_widget.rowCount()
-                self.table_widget.insertRow(row_position)
-
-                # Insertar los datos del archivo en las celdas correspondientes
-                id_item = QTableWidgetItem(str(group_id))
-                id_item.setFlags(id_item.flags() & ~Qt.ItemIsEditable)  # Hacer la celda no editable
-                self.table_widget.setItem(row_position, 0, id_item)  # ID de duplicado
-                name_item = QTableWidgetItem(file['name'])
-                name_item.setFlags(name_item.flags() & ~Qt.ItemIsEditable)  # Hacer la celda no editable
-                self.table_widget.setItem(row_position, 1, name_item)
-                path_item  = QTableWidgetItem(file['path'])
-                path_item.setFlags(path_item.flags() & ~Qt.ItemIsEditable)
-                self.table_widget.setItem(row_position, 2, path_item)
-                size_item = SizeTableWidgetItem(file['size'])
-                size_item.setFlags(size_item.flags() & ~Qt.ItemIsEditable)  # Hacer la celda no editable
-                self.table_widget.setItem(row_position, 3, size_item)
-
-                date_item = DateTableWidgetItem(file['date'])
-                date_item.setFlags(date_item.flags() & ~Qt.ItemIsEditable)  # Hacer la celda no editable
-                self.table_widget.setItem(row_position, 4, date_item)
-            
-            group_id += 1
-        
-        self.table_widget.setSortingEnabled(True)
-        self.table_widget.sortItems(3, Qt.DescendingOrder)  # 3 es la columna "size", y ordenamos de mayor a menor
+                self._path_index[file['path']] = hash_val
+                self._rows.append({'hash': hash_val, 'group_id': group_id, 'stats': stats, 'file': file,
+                                   'first_name': first_name, 'first_path': files[0]['path']})
+
+        self.table_widget.setUpdatesEnabled(False)
+        self.table_widget.setRowCount(0)  # Limpia la tabla
+        self.table_widget.setRowCount(len(self._rows))
+        for row_position, row in enumerate(self._rows):
+            self._set_row(row_position, row)
+        self.table_widget.horizontalHeader().setSortIndicator(5, Qt.DescendingOrder)
+        self.table_widget.setUpdatesEnabled(True)
+        self._thumbnail_timer.start()
+
+    @property
+    def read_only(self):
+        return self.results_origin != self.RESULTS_SCAN
+
+    def _update_action_buttons(self):
+        """Eliminar y consolidar, solo con resultados de un escaneo y si no hay otra operación en curso"""
+        editable = not self.read_only
+        self.delete_button.setEnabled(editable and not (self.delete_thread and self.delete_thread.isRunning()))
+        self.consolidate_button.setEnabled(
+            editable and not (self.consolidate_thread and self.consolidate_thread.isRunning()))
+        tooltip = self.READ_ONLY_REASONS.get(self.results_origin, '')
+        self.delete_button.setToolTip(tooltip)
+        self.consolidate_button.setToolTip(tooltip)
+
+    @staticmethod
+    def _add_display_texts(stats):
+        """Textos del grupo que se repiten en todas sus filas, calculados una vez"""
+        stats['wasted_text'] = DuplicatesView._size_text(stats['wasted'])
+        stats['summary'] = (f"{stats['copies']} copias · más antigua {stats['oldest']:%Y-%m-%d} · "
+                            f"más reciente {stats['newest']:%Y-%m-%d}")
+
+    @staticmethod
+    def _size_text(size_in_bytes):
+        return f"{int(size_in_bytes/1024)} KB"  # Convert to KB
+
+    def _set_row(self, row_position, row):
+        stats = row['stats']
+        file = row['file']
+        id_item = QTableWidgetItem(str(row['group_id']))
+        id_item.setData(Qt.UserRole, row['hash'])  # Hash del grupo
+        id_item.setToolTip(stats['summary'])
+        self.table_widget.setItem(row_position, 0, id_item)  # ID de duplicado
+        name_item = QTableWidgetItem(file['name'])
+        if file.get('linked'):
+            name_item.setToolTip('Consolidado: enlace al archivo conservado del grupo')
+        self.table_widget.setItem(row_position, 1, name_item)
+        path_item = QTableWidgetItem(self._path_text(file))
+        path_item.setData(Qt.UserRole, file['path'])
+        self.table_widget.setItem(row_position, 2, path_item)
+        self.table_widget.setItem(row_position, 3, QTableWidgetItem(self._size_text(file['size'])))
+        self.table_widget.setItem(row_position, 4, QTableWidgetItem(file['date'].strftime('%Y-%m-%d %H:%M:%S')))
+        self.table_widget.setItem(row_position, 5, QTableWidgetItem(stats['wasted_text']))
+
+    @staticmethod
+    def _path_text(file):
+        """Ruta de la fila; en los duplicados combinados, precedida del origen de su manifiesto"""
+        if 'source' in file:
+            return f"{file['source']}: {file['path']}"
+        return file['path']
+
+    def populate_folders(self, folder_duplicates):
+        """Muestra los grupos de carpetas idénticas, de más a menos espacio recuperable"""
+        self.folder_duplicates = folder_duplicates
+        self.folder_tree.clear()
+        for group in folder_duplicates:
+            group_item = QTreeWidgetItem([
+                f"{len(group['folders'])} carpetas idénticas",
+                str(group['files']),
+                f"{group['reclaimable'] / (1024 * 1024):.1f} MB"
+            ])
+            self.folder_tree.addTopLevelItem(group_item)
+            for path in group['folders']:
+                folder_item = QTreeWidgetItem([path])
+                folder_item.setData(0, Qt.UserRole, path)
+                group_item.addChild(folder_item)
+            group_item.setExpanded(True)
+        self.folder_tree.resizeColumnToContents(1)
+        self.folder_tree.resizeColumnToContents(2)
+        self.folder_tree.setVisible(bool(folder_duplicates))
+
+    def handle_folder_double_click(self, item, column):
+        """Abre la carpeta duplicada en el explorador del sistema"""
+        folder_path = item.data(0, Qt.UserRole)
+        if folder_path:
+            self._open_path(folder_path)
 
-        # Agregar comportamiento al hacer clic en las cabeceras de las columnas
-        self.table_widget.setHorizontalHeaderLabels(["ID","Nombre", "Ruta", "Tamaño", "Fecha"])
-        self.table_widget.horizontalHeader().sectionClicked.connect(self.sort_table)
-    
     def handle_double_click(self, row, column):
         """Abrir el archivo si se hace doble clic en la columna de Ruta."""
         if column == 2:  # Columna de Ruta
-            file_path = self.table_widget.item(row, column).text()
-            if os.path.exists(file_path):
-                try:
-                    if platform.system() == "Windows":
-                        os.startfile(file_path)
-                    elif platform.system() == "Darwin":  # macOS
-                        subprocess.run(["open", file_path])
-                    else:  # Linux y otros
-                        subprocess.run(["xdg-open", file_path])
-                except Exception as e:
-                    QMessageBox.warning(self, 'Error', f'No se pudo abrir el archivo: {e}')
-            else:
-                QMessageBox.warning(self, 'Error', 'El archivo no existe.')
+            self._open_path(self.table_widget.item(row, column).data(Qt.UserRole))
+
+    def _open_path(self, file_path):
+        if ArchiveReader.is_virtual(file_path):
+            # Las entradas de un archivo comprimido se abren a través del propio archivo
+            file_path = ArchiveReader.split_virtual_path(file_path)[0]
+        if os.path.exists(file_path):
+            try:
+                if platform.system() == "Windows":
+                    os.startfile(file_path)
+                elif platform.system() == "Darwin":  # macOS
+                    subprocess.run(["open", file_path])
+                else:  # Linux y otros
+                    subprocess.run(["xdg-open", file_path])
+            except Exception as e:
+                QMessageBox.warning(self, 'Error', f'No se pudo abrir el archivo: {e}')
+        else:
+            QMessageBox.warning(self, 'Error', 'El archivo no existe.')
 
     def sort_table(self, index):
         """
-        Ordena la tabla de acuerdo a la columna seleccionada.
-        Si ya está ordenada en ese sentido, se invierte el orden.
+        Ordena los grupos de acuerdo a la columna seleccionada, sin separar
+        sus archivos. Si ya está ordenada por esa columna, se invierte el orden.
         """
-        current_order = self.table_widget.horizontalHeader().sortIndicatorOrder()
-
-        if current_order == Qt.AscendingOrder:
-            new_order = Qt.DescendingOrder
+        header = self.table_widget.horizontalHeader()
+        if header.sortIndicatorSection() == index:
+            new_order = Qt.AscendingOrder if header.sortIndicatorOrder() == Qt.DescendingOrder else Qt.DescendingOrder
         else:
-            new_order = Qt.AscendingOrder
-        
-        self.table_widget.sortItems(index, new_order)
-
+            # Tamaño y espacio recuperable, de mayor a menor; el resto, ascendente
+            new_order = Qt.DescendingOrder if index in (3, 5) else Qt.AscendingOrder
+
+        header.setSortIndicator(index, new_order)
+        self._load_pending_groups()  # El orden afecta a todos los grupos, también a los no cargados
+
+        # Orden estable: primero dentro del grupo y después por el valor del grupo
+        order = sorted(range(len(self._rows)), key=lambda row: GroupSortKeys.row_key(self._rows[row], index))
+        order.sort(key=lambda row: GroupSortKeys.group_key(self._rows[row], index),
+                   reverse=new_order == Qt.DescendingOrder)
+
+        self._rows = [self._rows[row] for row in order]
+        self.table_widget.setUpdatesEnabled(False)
+        # Rellenar filas vacías es mucho más rápido que sustituir celdas existentes
+        self.table_widget.setRowCount(0)
+        self.table_widget.setRowCount(len(self._rows))
+        for row_position, row in enumerate(self._rows):
+            self._set_row(row_position, row)
+        self.table_widget.setUpdatesEnabled(True)
+        self._thumbnail_timer.start()
+
+    def _visible_rows(self):
+        first = self.table_widget.rowAt(0)
+        if first < 0:
+            return range(0)
+        last = self.table_widget.rowAt(self.table_widget.viewport().height() - 1)
+        if last < 0:
+            last = self.table_widget.rowCount() - 1
+        return range(first, last + 1)
+
+    def _load_visible_thumbnails(self):
+        """Muestra las miniaturas ya generadas de las filas visibles y pide las que faltan"""
+        self.thumbnail_loader.cancel_pending()  # Las de filas que ya no se ven dejan de interesar
+        for row_position in self._visible_rows():
+            file_path = self._rows[row_position]['file']['path']
+            if not ThumbnailCache.is_image(file_path):
+                continue
+            thumbnail_path = self._thumbnails.get(file_path)
+            if thumbnail_path is None:
+                # El hash del grupo identifica el contenido y las copias comparten miniatura, pero
+                # solo el de un escaneo recién hecho: los de la sesión anterior o de los manifiestos
+                # pueden no corresponder ya al archivo
+                file = self._rows[row_position]['file']
+                if self.results_origin == self.RESULTS_SCAN and 'mtime' in file:
+                    self.thumbnail_loader.request(file_path, self._rows[row_position]['hash'],
+                                                  (file['size'], file['mtime']))
+                else:
+                    self.thumbnail_loader.request(file_path)
+            elif thumbnail_path:
+                item = self.table_widget.item(row_position, 1)
+                if item.icon().isNull():
+                    item.setIcon(ThumbnailLoader.icon(thumbnail_path))
+
+    def _set_thumbnail(self, file_path, thumbnail_path):
+        self._thumbnails[file_path] = thumbnail_path
+        if not thumbnail_path:
+            return
+        for row_position in self._visible_rows():
+            if self._rows[row_position]['file']['path'] == file_path:
+                self.table_widget.item(row_position, 1).setIcon(ThumbnailLoader.icon(thumbnail_path))
 
     def delete_selected_files(self):
+        if self.read_only:
+            return  # Sesión anterior o manifiestos: nada garantiza que sigan siendo duplicados
+
         # Obtener las filas seleccionadas
         selected_rows = self.table_widget.selectionModel().selectedRows()
 
@@ -168,60 +394,282 @@ class DuplicatesView(QWidget):
         if confirmation != QMessageBox.Yes:
             return
         
-        file_paths = [self.table_widget.item(row.row(), 2).text() for row in selected_rows]
-
-        # Intentar eliminar los archivos
-        for file_path in file_paths:
-            if os.path.exists(file_path):
-                try:
-                    # Normalizar la ruta
-                    normalized_path = os.path.abspath(os.path.normpath(file_path))
-                    # print(platform.system())
-
-                    # Agregar prefijo para rutas largas en Windows
-                    if platform.system() == "Windows" and len(normalized_path) > 260:
-                        normalized_path = f"\\\\?\\{normalized_path}"
-
-                    # os.remove(file_path)
-                    send2trash(file_path.replace('/','\\'))  # Mover a la papelera
-                except Exception as e:
-                    QMessageBox.warning(self, 'Error', f'No se pudo eliminar el archivo: {e}')
+        if self.delete_thread and self.delete_thread.isRunning():
+            QMessageBox.warning(self, 'Advertencia', 'Ya hay una eliminación en curso.')
+            return
+
+        file_paths = [self.table_widget.item(row.row(), 2).data(Qt.UserRole) for row in selected_rows]
+        # Las entradas de archivos comprimidos no se pueden borrar por separado
+        file_paths = [path for path in file_paths if not ArchiveReader.is_virtual(path)]
+        if not file_paths:
+            QMessageBox.warning(self, 'Advertencia', 'Los archivos seleccionados están dentro de archivos comprimidos.')
+            return
+
+        # Eliminar los archivos por lotes en segundo plano
+        self.delete_button.setEnabled(False)
+        self.delete_thread = DeleteWorker(file_paths)
+        self.delete_thread.finished.connect(self._handle_delete_finished)
+        self.delete_thread.start()
+
+    def _handle_delete_finished(self, result):
+        """Quita de la tabla solo las filas afectadas por la eliminación"""
+        self.delete_button.setEnabled(not self.read_only)
+
+        # Los archivos que ya no existen también se quitan de la lista
+        removed_paths = set(result['deleted'])
+        removed_paths.update(path for path in result['errors'] if not os.path.lexists(path))
+
+        affected_hashes = set()
+        for file_path in removed_paths:
+            hash_val = self._path_index.get(file_path)
+            self.remove_file_from_duplicates(file_path)
+            if hash_val is not None:
+                affected_hashes.add(hash_val)
+
+        # Grupos que ya no tienen duplicados
+        dissolved_hashes = {
+            hash_val for hash_val in affected_hashes
+            if len(self.duplicate_files.get(hash_val, {}).get('files', [])) < 2
+        }
+        for hash_val in affected_hashes - dissolved_hashes:
+            self.group_stats[hash_val] = DuplicateStats.group_stats(self.duplicate_files[hash_val])
+            self._add_display_texts(self.group_stats[hash_val])
+        for hash_val in dissolved_hashes:
+            self.group_stats.pop(hash_val, None)
+        self._remove_rows(removed_paths, dissolved_hashes, affected_hashes - dissolved_hashes)
+
+        failed = {path: error for path, error in result['errors'].items() if path not in removed_paths}
+        if failed:
+            details = "\n".join(f"{path}: {error}" for path, error in list(failed.items())[:10])
+            QMessageBox.warning(self, 'Error', f'No se pudieron eliminar {len(failed)} archivos:\n{details}')
+
+    def _remove_rows(self, removed_paths, dissolved_hashes, changed_hashes=()):
+        """
+        Elimina las filas de los archivos borrados y de los grupos sin duplicados,
+        y actualiza el espacio recuperable de los grupos que han perdido copias.
+        """
+        self.table_widget.setUpdatesEnabled(False)
+
+        # Las filas eliminadas se agrupan en tramos consecutivos: un removeRows por tramo,
+        # de abajo arriba para que no se desplacen los índices de los tramos pendientes
+        ranges = []
+        kept_rows = []
+        for row_position, row in enumerate(self._rows):
+            if row['file']['path'] in removed_paths or row['hash'] in dissolved_hashes:
+                if ranges and ranges[-1][1] == row_position:
+                    ranges[-1][1] = row_position + 1
+                else:
+                    ranges.append([row_position, row_position + 1])
             else:
-                QMessageBox.warning(self, 'Error', f'El archivo no existe: {file_path}')
+                kept_rows.append(row)
+        model = self.table_widget.model()
+        for start, end in reversed(ranges):
+            model.removeRows(start, end - start)
+        self._rows = kept_rows
 
-            # Eliminar los archivos de la lista de duplicados
-        for file_path in file_paths:
-            self.duplicate_files = self.remove_file_from_duplicates(file_path)
-        
-        self.populate_table(self.duplicate_files)
+        for row_position, row in enumerate(self._rows):
+            if row['hash'] in changed_hashes:
+                row['stats'] = self.group_stats[row['hash']]
+                self._set_row(row_position, row)
+
+        self.table_widget.setUpdatesEnabled(True)
+        self._thumbnail_timer.start()
+
+    def consolidate_selected_groups(self):
+        """
+        Sustituye los duplicados de los grupos seleccionados por enlaces
+        (reflink o hardlink) al archivo más antiguo de cada grupo.
+        """
+        selected_rows = self.table_widget.selectionModel().selectedRows()
+
+        if self.read_only:
+            return  # Sesión anterior o manifiestos: nada garantiza que sigan siendo duplicados
+
+        if not selected_rows:
+            QMessageBox.warning(self, 'Advertencia', 'No se ha seleccionado ningún grupo para consolidar.')
+            return
+
+        if self.consolidate_thread and self.consolidate_thread.isRunning():
+            QMessageBox.warning(self, 'Advertencia', 'Ya hay una consolidación en curso.')
+            return
+
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle('Confirmar consolidación')
+        msg_box.setText('Los duplicados de los grupos seleccionados se sustituirán por enlaces al archivo más antiguo. ¿Desea continuar?')
+        msg_box.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+        msg_box.button(QMessageBox.Yes).setText('Sí')
+
+        if msg_box.exec() != QMessageBox.Yes:
+            return
+
+        hashes = {self.table_widget.item(row.row(), 0).data(Qt.UserRole) for row in selected_rows}
+        groups = []
+        for hash_val in hashes:
+            files = sorted((file for file in self.duplicate_files[hash_val]['files']
+                            if not ArchiveReader.is_virtual(file['path'])), key=lambda file: file['date'])
+            if len(files) < 2:
+                continue  # Solo se pueden enlazar las copias que no están dentro de un archivo comprimido
+            groups.append({
+                'keep': files[0]['path'],
+                'duplicates': [file['path'] for file in files[1:]],
+                'hash': hash_val
+            })
+
+        if not groups:
+            QMessageBox.warning(self, 'Advertencia', 'Los grupos seleccionados no tienen copias fuera de archivos comprimidos.')
+            return
 
+        self.consolidate_button.setEnabled(False)
+        self.consolidate_progress.setValue(0)
+        self.consolidate_progress.setVisible(True)
+        self.consolidate_thread = ConsolidateWorker(groups)
+        self.consolidate_thread.progress.connect(self.consolidate_progress.setValue)
+        self.consolidate_thread.finished.connect(self._handle_consolidate_finished)
+        self.consolidate_thread.start()
+
+    def _handle_consolidate_finished(self, result):
+        """Actualiza el espacio recuperable de los grupos consolidados e informa del resultado"""
+        self.consolidate_button.setEnabled(not self.read_only)
+        self.consolidate_progress.setVisible(False)
+
+        # Los enlazados siguen en su grupo, pero ya no ocupan espacio propio
+        linked_paths = set(result['linked'])
+        affected_hashes = set()
+        for hash_val in {self._path_index.get(path) for path in linked_paths} - {None}:
+            for file in self.duplicate_files[hash_val]['files']:
+                if file['path'] in linked_paths:
+                    file['linked'] = True
+            self.group_stats[hash_val] = DuplicateStats.group_stats(self.duplicate_files[hash_val])
+            self._add_display_texts(self.group_stats[hash_val])
+            affected_hashes.add(hash_val)
+        if affected_hashes:
+            self._remove_rows(set(), set(), affected_hashes)
+
+        message = (f"Archivos enlazados: {len(result['linked'])}\n"
+                   f"Espacio recuperado: {result['reclaimed_bytes'] / (1024 * 1024):.1f} MB")
+        if result['changed']:
+            message += f"\nOmitidos por haber cambiado desde el escaneo: {len(result['changed'])}"
+        if result['cross_device']:
+            message += ("\nSin otra copia en su mismo disco (no se pueden enlazar entre discos): "
+                        f"{len(result['cross_device'])}")
+        if result['errors']:
+            message += f"\nErrores: {len(result['errors'])}"
+        QMessageBox.information(self, 'Consolidación completa', message)
            
+    def load_last_session(self):
+        """
+        Muestra los duplicados guardados del último escaneo. Los grupos se
+        ordenan con las estadísticas de los registros, sin leer las rutas, y
+        los archivos de cada grupo se consultan con find_hash a medida que la
+        tabla se desplaza hasta ellos.
+        """
+        store = ResultStore.open(last_session_path(LAST_DUPLICATES_FILE))
+        if store is None:
+            return
+        # Solo lectura hasta que un escaneo nuevo los sustituya: los archivos pueden haber cambiado
+        self.populate_table({}, origin=self.RESULTS_SESSION)
+        groups = sorted(store.group_stats().items(), key=lambda item: item[1]['wasted'], reverse=True)
+        self._store = store
+        self._pending_groups = [(hash_val, stats) for hash_val, stats in groups if stats['copies'] > 1]
+        self._load_pending_groups(self.SESSION_BATCH)
+
+    def _load_groups_near_end(self, value):
+        if self._pending_groups and value >= self.table_widget.verticalScrollBar().maximum() - 1:
+            self._load_pending_groups(self.SESSION_BATCH)
+
+    def _load_pending_groups(self, limit=None):
+        """Añade al final de la tabla los siguientes grupos de la sesión anterior (todos sin limit)"""
+        if not self._pending_groups:
+            return
+        batch = self._pending_groups[:limit] if limit else self._pending_groups
+        self._pending_groups = self._pending_groups[len(batch):]
+
+        first_row = len(self._rows)
+        for hash_val, stats in batch:
+            files = sorted(({
+                'name': os.path.basename(path),
+                'path': path,
+                'size': size,
+                'date': date
+            } for _, size, date, path in self._store.find_hash(hash_val)), key=lambda file: file['date'])
+            self.duplicate_files[hash_val] = {'files': files, 'size': stats['size']}
+            self._add_display_texts(stats)
+            self.group_stats[hash_val] = stats
+            self._group_count += 1
+            group_id = self._group_count
+            first_name = min(file['name'] for file in files)
+            for file in files:
+                self._path_index[file['path']] = hash_val
+                self._rows.append({'hash': hash_val, 'group_id': group_id, 'stats': stats, 'file': file,
+                                   'first_name': first_name, 'first_path': files[0]['path']})
+        if not self._pending_groups:
+            self._close_store()
+
+        self.table_widget.setUpdatesEnabled(False)
+        self.table_widget.setRowCount(len(self._rows))
+        for row_position in range(first_row, len(self._rows)):
+            self._set_row(row_position, self._rows[row_position])
+        self.table_widget.setUpdatesEnabled(True)
+        self._thumbnail_timer.start()
+
+    def _close_store(self):
+        self._pending_groups = []
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def request_manifest_export(self):
+        """Pide un escaneo completo que exporte el manifiesto de hashes"""
+        manifest_path, _ = QFileDialog.getSaveFileName(
+            self, 'Exportar manifiesto', 'manifiesto.tsv', 'Manifiestos (*.tsv)')
+        if manifest_path:
+            self.export_manifest_requested.emit(manifest_path)
+
+    def load_manifests(self):
+        """Combina varios manifiestos y muestra los duplicados sin releer los archivos"""
+        manifest_paths, _ = QFileDialog.getOpenFileNames(
+            self, 'Cargar manifiestos', '', 'Manifiestos (*.tsv)')
+        if not manifest_paths:
+            return
+        if self.merge_thread and self.merge_thread.isRunning():
+            QMessageBox.warning(self, 'Advertencia', 'Ya se están combinando manifiestos.')
+            return
+
+        self.load_manifests_button.setEnabled(False)
+        self.merge_thread = ManifestMergeWorker(manifest_paths)
+        self.merge_thread.finished.connect(self._handle_manifests_merged)
+        self.merge_thread.start()
+
+    def _handle_manifests_merged(self, duplicate_files):
+        self.load_manifests_button.setEnabled(True)
+        self.populate_table(duplicate_files, origin=self.RESULTS_MANIFESTS)
+
+    def show_chunk_report(self, result):
+        """Muestra cuánto contenido comparten los archivos grandes aunque no sean idénticos"""
+        self.chunk_analysis_button.setEnabled(True)
+        if not result:
+            QMessageBox.warning(self, 'Error', 'No se pudo completar el análisis de bloques.')
+            return
+        QMessageBox.information(self, 'Bloques compartidos', ChunkAnalyzer.format_report(result))
+
     def remove_file_from_duplicates(self, file_path):
-            """Elimina un archivo de la lista de duplicados."""
-            new_duplicate_files = self.duplicate_files.copy()
-
-            for hash_val, data in new_duplicate_files.items():
-                seen_paths = set()
-                unique_files = []
-
-                for file in data['files']:
-                    if file['path'] not in seen_paths:
-                        # Si no hemos visto este path, lo agregamos a la lista y al conjunto
-                        seen_paths.add(file['path'])
-                        if file['path'] != file_path:
-                            unique_files.append(file)
-
-                if unique_files:
-                    data['files'] = unique_files
-                else:
-                    # Si no quedan archivos con ese hash, eliminar la entrada
-                    del new_duplicate_files[hash_val]
+        """Elimina un archivo de la lista de duplicados."""
+        hash_val = self._path_index.pop(file_path, None)
+        if hash_val is None or hash_val not in self.duplicate_files:
+            return self.duplicate_files
+
+        data = self.duplicate_files[hash_val]
+        data['files'] = [file for file in data['files'] if file['path'] != file_path]
+        if not data['files']:
+            # Si no quedan archivos con ese hash, eliminar la entrada
+            del self.duplicate_files[hash_val]
 
-            return new_duplicate_files
+        return self.duplicate_files
     
     def update_root_index(self):
         """Actualiza la vista cuando se cambia el directorio."""
-        self.populate_table(self.duplicate_files)
+        self._load_pending_groups()
+        self.populate_table(self.duplicate_files, self.folder_duplicates, self.results_origin)
     
     def get_duplicate_files(self):
         return self.duplicate_files
@@ -1,14 +1,14 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QStackedWidget, 
-    QProgressBar, QMessageBox
+    QProgressBar, QMessageBox, QLabel, QSizePolicy
 )
 from PyQt5.QtCore import QDir, pyqtSignal
 from .navigation_bar import NavigationBar
 from .file_view import FileView
-from .date_view import DateView
-from .duplicates_view import DuplicatesView
 from .sidebar import Sidebar
 from core.file_organizer import FileOrganizer
+from core.reorganization_planner import ReorganizationPlanner
+from core.scan_metrics import ScanMetrics
 from core.theme_manager import ThemeManager
 from core.navigation_controller import NavigationController
 
@@ -20,6 +20,9 @@ class FileOrganizerWidget(QWidget):
         super().__init__(parent)
         self.current_directory = QDir.homePath()
         self.actual_view = None
+        self._date_view = None
+        self._duplicates_view = None
+        self._pending_reorganization = None  # Carpeta que se ordenará cuando termine su escaneo por fechas
         self.theme_manager = ThemeManager()
         self.setup_ui()
         self.setup_connections()
@@ -36,22 +39,29 @@ class FileOrganizerWidget(QWidget):
         
         
         # Stack widget for views
+        # Solo la vista de archivos se crea al inicio; el resto, al usarse por primera vez
         self.stack_widget = QStackedWidget()
         self.file_view = FileView(self)
-        self.date_view = DateView(self)
-        self.duplicates_view = DuplicatesView(self)
 
         self.actual_view = self.file_view
         
         self.stack_widget.addWidget(self.file_view)
-        self.stack_widget.addWidget(self.date_view)
-        self.stack_widget.addWidget(self.duplicates_view)
         
         
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         self.content_layout.addWidget(self.progress_bar)
+        # Velocidad, tiempo restante y archivo en curso del escaneo de hashes
+        self.progress_status = QLabel()
+        self.progress_status.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Preferred)  # Un nombre largo no ensancha la ventana
+        self.progress_status.setVisible(False)
+        self.content_layout.addWidget(self.progress_status)
+        # Panel de métricas del escaneo (solo con ORGANIZADOR_METRICS)
+        self.metrics_status = QLabel()
+        self.metrics_status.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Preferred)
+        self.metrics_status.setVisible(False)
+        self.content_layout.addWidget(self.metrics_status)
         
         # Navigation bar
         self.navigation_bar = NavigationBar(self)
@@ -64,10 +74,37 @@ class FileOrganizerWidget(QWidget):
 
         self.main_layout.addLayout(self.content_layout)
 
+    @property
+    def date_view(self):
+        """Vista por fechas, creada la primera vez que se necesita"""
+        if self._date_view is None:
+            from .date_view import DateView
+            self._date_view = DateView(self)
+            self._date_view.directory_expanded.connect(
+                self.navigation_controller.promote_directory)
+            self.stack_widget.addWidget(self._date_view)
+        return self._date_view
+
+    @property
+    def duplicates_view(self):
+        """Vista de duplicados, creada la primera vez que se necesita"""
+        if self._duplicates_view is None:
+            from .duplicates_view import DuplicatesView
+            self._duplicates_view = DuplicatesView(self)
+            self._duplicates_view.export_manifest_requested.connect(
+                self.navigation_controller.export_manifest)
+            self._duplicates_view.chunk_analysis_requested.connect(
+                self.navigation_controller.analyze_shared_chunks)
+            self._duplicates_view.load_last_session()
+            self.stack_widget.addWidget(self._duplicates_view)
+        return self._duplicates_view
+
     def setup_connections(self):
         # Navigation connections
         self.navigation_bar.to_original_button.clicked.connect(self.reorganize_to_original)
         self.navigation_bar.order_by_date_button.clicked.connect(self.reorganize_files)
+        self.navigation_bar.simulate_order_button.clicked.connect(self.simulate_reorganization)
+        self.navigation_controller.date_scan_finished.connect(self._run_pending_reorganization)
         
         # Sidebar connections
 
@@ -83,11 +120,30 @@ class FileOrganizerWidget(QWidget):
 
 
     def reorganize_files(self):
-        
+        # Desde la vista de archivos primero hay que escanear la carpeta: la reorganización
+        # se confirma y se hace cuando termine el escaneo, con las fechas ya leídas
         if self.stack_widget.currentWidget() == self.file_view:
             self.navigation_controller.toggle_date_view()
- 
-
+            self._pending_reorganization = self.navigation_controller.current_path
+            return
+        if self.navigation_controller.date_scan_running():
+            self._pending_reorganization = self.navigation_controller.current_path
+            return
+
+        files_by_date = self._scanned_files_by_date()
+        if files_by_date is not None:
+            self._confirm_reorganization(files_by_date)
+
+    def _run_pending_reorganization(self):
+        """Continúa la reorganización pedida durante el escaneo, si se sigue en la misma carpeta"""
+        path, self._pending_reorganization = self._pending_reorganization, None
+        if path is None or path != self.navigation_controller.current_path:
+            return
+        files_by_date = self.date_view.get_files_by_date(path)
+        if files_by_date:
+            self._confirm_reorganization(files_by_date)
+
+    def _confirm_reorganization(self, files_by_date):
         if FileOrganizer.contains_date(self.navigation_controller.current_path):
             msg_box_warning = QMessageBox(self)
             msg_box_warning.setWindowTitle("Advertencia")
@@ -107,16 +163,39 @@ class FileOrganizerWidget(QWidget):
 
             
         if msg_box.exec() == QMessageBox.Yes:
-            # Limpiar thread anterior si existe
-            if hasattr(self, 'scan_thread') and self.scan_thread is not None:
-                if self.scan_thread.isRunning():
-                    self.scan_thread.quit()  # Esperar a que termine
+            metrics = ScanMetrics.from_environment()
             FileOrganizer.reorganize_by_date(
-                self.date_view.get_files_by_date(),
-                self.navigation_controller.current_path
+                files_by_date,
+                self.navigation_controller.current_path,
+                metrics=metrics
             )
+            metrics.dump_json('reorganize')
             self.navigation_controller.show_date_view()  # Actualizar la vista
 
+    def _scanned_files_by_date(self):
+        """
+        Archivos por fecha del escaneo terminado de la carpeta actual, o None
+        (avisando al usuario) si el escaneo sigue en curso o aún no se ha hecho.
+        """
+        files_by_date = self.date_view.get_files_by_date(self.navigation_controller.current_path)
+        if self.navigation_controller.date_scan_running() or not files_by_date:
+            QMessageBox.information(self, "Escaneo en curso",
+                                    "Espere a que termine el escaneo por fechas de la carpeta actual.")
+            return None
+        return files_by_date
+
+    def simulate_reorganization(self):
+        """Muestra el coste estimado de ordenar por fecha sin mover ningún archivo"""
+        files_by_date = self._scanned_files_by_date()
+        if files_by_date is None:
+            return
+        report = ReorganizationPlanner.plan(
+            files_by_date,
+            self.navigation_controller.current_path
+        )
+        QMessageBox.information(self, "Simulación de reorganización",
+                                ReorganizationPlanner.format_report(report))
+
     def reorganize_to_original(self):
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle("Confirmar deshacer reorganización")
@@ -125,7 +204,10 @@ class FileOrganizerWidget(QWidget):
         msg_box.button(QMessageBox.Yes).setText("Sí")
         
         if msg_box.exec() == QMessageBox.Yes:
-            FileOrganizer.restore_original_structure(self.navigation_controller.current_path)
+            metrics = ScanMetrics.from_environment()
+            FileOrganizer.restore_original_structure(self.navigation_controller.current_path,
+                                                     metrics=metrics)
+            metrics.dump_json('restore')
             QMessageBox.information(self, "Proceso Completo", 
                                   "Los archivos han sido reorganizados a sus carpetas originales.")
             self.stack_widget.setCurrentWidget(self.file_view)  # Actualizar la vista
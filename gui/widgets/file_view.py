@@ -1,5 +1,5 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QListView, QProgressBar
-from PyQt5.QtCore import QDir, pyqtSignal
+from PyQt5.QtCore import QDir, QEvent, QTimer, pyqtSignal
 from PyQt5.QtWidgets import QFileSystemModel
 from core.file_scanner import FileScanWorker
 
@@ -8,11 +8,14 @@ class FileView(QWidget):
     directory_changed = pyqtSignal(str)  # Nueva señal para notificar cambios
     directory_selected = pyqtSignal(str)  # Para la selección de carpeta
     scan_completed = pyqtSignal(dict)  # Nueva señal para notificar cuando el escaneo termina
+    scan_partial = pyqtSignal(str, dict)  # Resultados de las carpetas priorizadas durante el escaneo
+    scan_metrics = pyqtSignal(dict)  # Métricas del escaneo en curso (si están activadas)
 
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.scan_thread = None
+        self._root_set = False
         self.setup_ui()
         self.initialize_model()
 
@@ -29,9 +32,20 @@ class FileView(QWidget):
 
     def initialize_model(self):
         self.fs_model = QFileSystemModel()
-        self.fs_model.setRootPath(QDir.homePath())
         self.file_list.setModel(self.fs_model)
-        self.file_list.setRootIndex(self.fs_model.index(QDir.homePath()))
+        # El listado del home arranca después del primer pintado de la lista, no antes
+        self.file_list.viewport().installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint and watched is self.file_list.viewport():
+            watched.removeEventFilter(self)
+            QTimer.singleShot(0, self._load_home_directory)  # Cuando termine este pintado
+        return super().eventFilter(watched, event)
+
+    def _load_home_directory(self):
+        self.fs_model.setRootPath(QDir.homePath())
+        if not self._root_set:
+            self.file_list.setRootIndex(self.fs_model.index(QDir.homePath()))
 
 
     def setup_connections(self):
@@ -57,6 +71,8 @@ class FileView(QWidget):
         self.scan_thread = FileScanWorker(directory)
         self.scan_thread.progress.connect(self.progress_bar.setValue)
         self.scan_thread.finished.connect(self._handle_scan_completed)
+        self.scan_thread.partial.connect(self.scan_partial)
+        self.scan_thread.metrics_updated.connect(self.scan_metrics)
         self.scan_thread.start()
 
     def _handle_scan_completed(self, files_by_date):
@@ -66,6 +82,7 @@ class FileView(QWidget):
     
     def update_root_index(self, directory):
         """Método público para actualizar el directorio mostrado"""
+        self._root_set = True
         self.file_list.setRootIndex(self.fs_model.index(directory))
         
 
@@ -109,10 +109,13 @@ class NavigationBar(QWidget):
             },
             ViewMode.DATE: {
                 'order_by_date_button': QPushButton("Ordenar por fecha"),
+                'simulate_order_button': QPushButton("Simular ordenación"),
                 'file_view_button': QPushButton("Vista de carpetas")
             },
             ViewMode.DUPLICATES: {
-                'duplicates_button': QPushButton("Buscar Duplicados")
+                'duplicates_button': QPushButton("Buscar Duplicados"),
+                'add_root_button': QPushButton("Añadir carpeta a la búsqueda"),
+                'clear_roots_button': QPushButton("Solo carpeta actual")
             }
         }
         # Añadir todos los botones específicos al layout inmediatamente
@@ -126,7 +129,10 @@ class NavigationBar(QWidget):
         self.to_original_button = self.view_buttons[ViewMode.NORMAL]['to_original_button']
         self.file_view_button = self.view_buttons[ViewMode.DATE]['file_view_button']
         self.order_by_date_button = self.view_buttons[ViewMode.DATE]['order_by_date_button']
+        self.simulate_order_button = self.view_buttons[ViewMode.DATE]['simulate_order_button']
         self.duplicates_button = self.view_buttons[ViewMode.DUPLICATES]['duplicates_button']
+        self.add_root_button = self.view_buttons[ViewMode.DUPLICATES]['add_root_button']
+        self.clear_roots_button = self.view_buttons[ViewMode.DUPLICATES]['clear_roots_button']
 
     def _on_path_entered(self):
         """Slot interno para manejar cuando se presiona Enter en el path_entry"""
@@ -1,13 +1,11 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QAction
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
-from core.theme_manager import ThemeManager
 
 class Sidebar(QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.theme = ThemeManager()
         self.setup_ui()
         
     def setup_ui(self):
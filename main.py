@@ -1,14 +1,49 @@
+import time
+STARTUP_START = time.perf_counter()
+
+import os
 import sys
 from PyQt5.QtWidgets import QApplication
-import qdarkstyle
+from PyQt5.QtCore import QObject, QEvent
 from gui.main_window import MainWindow
+from core.theme_manager import ThemeManager
+from core.scan_profiler import PROFILE_ENV_VAR
+
+STARTUP_TARGET_MS = 300
+
+
+class FirstPaintTimer(QObject):
+    """Informa del tiempo desde el arranque del proceso hasta el primer pintado."""
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint:
+            elapsed_ms = (time.perf_counter() - STARTUP_START) * 1000
+            status = "OK" if elapsed_ms <= STARTUP_TARGET_MS else "lento"
+            print(f"Primer pintado en {elapsed_ms:.0f} ms (objetivo {STARTUP_TARGET_MS} ms: {status})")
+            watched.removeEventFilter(self)
+        return False
+
 
 def main():
+    # --profile perfila cada escaneo (cProfile + tracemalloc)
+    if "--profile" in sys.argv:
+        sys.argv.remove("--profile")
+        os.environ[PROFILE_ENV_VAR] = "1"
+
+    # --startup-time mide el tiempo hasta el primer pintado de la ventana
+    measure_startup = "--startup-time" in sys.argv
+    if measure_startup:
+        sys.argv.remove("--startup-time")
+
     app = QApplication(sys.argv)
-    app.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt5'))
+    app.setStyleSheet(ThemeManager.load_stylesheet(dark_mode=True))
     window = MainWindow()
+    if measure_startup:
+        first_paint_timer = FirstPaintTimer()
+        window.installEventFilter(first_paint_timer)
     window.show()
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos se importan como en la aplicación (core.*), desde la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch):
+    """Home temporal: ninguna prueba lee ni escribe la configuración o la caché del usuario."""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("USERPROFILE", str(home))
+    return home
+
+
+@pytest.fixture
+def make_file(tmp_path):
+    """Crea un archivo con el contenido indicado, con sus carpetas, y devuelve su ruta."""
+    def make(relative_path, content=b"x"):
+        path = tmp_path / "tree" / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return str(path)
+    return make
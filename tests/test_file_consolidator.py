@@ -0,0 +1,96 @@
+import hashlib
+import os
+import types
+
+import pytest
+
+from core import file_consolidator
+from core.file_consolidator import FileChangedError, FileConsolidator
+from core.hash_reader import HashReader
+
+CONTENT = b'duplicate content'
+CONTENT_HASH = hashlib.sha256(CONTENT).hexdigest()
+
+
+def group(keep, *duplicates):
+    return {'keep': keep, 'duplicates': list(duplicates), 'hash': CONTENT_HASH}
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_links_verified_duplicates(make_file):
+    keep = make_file('keep', CONTENT)
+    duplicate = make_file('copy', CONTENT)
+
+    result = FileConsolidator.consolidate([group(keep, duplicate)], mode='hardlink')
+    assert result['linked'] == [duplicate]
+    assert result['reclaimed_bytes'] == len(CONTENT)
+    assert result['changed'] == [] and result['errors'] == {}
+    assert os.path.samefile(keep, duplicate)
+
+
+def test_skips_duplicate_changed_since_scan(make_file):
+    keep = make_file('keep', CONTENT)
+    duplicate = make_file('copy', b'edited content!!!')  # Mismo tamaño, otro contenido
+
+    result = FileConsolidator.consolidate([group(keep, duplicate)], mode='hardlink')
+    assert result['linked'] == [] and result['changed'] == [duplicate]
+    assert not os.path.samefile(keep, duplicate)
+    assert read(duplicate) == b'edited content!!!'
+
+
+def test_skips_group_when_kept_file_changed(make_file):
+    keep = make_file('keep', b'edited content!!!')
+    duplicates = [make_file('copy1', CONTENT), make_file('copy2', CONTENT)]
+
+    result = FileConsolidator.consolidate([group(keep, *duplicates)], mode='hardlink')
+    assert result['linked'] == [] and result['changed'] == duplicates
+    assert all(read(path) == CONTENT for path in duplicates)
+
+
+def test_skips_file_modified_while_hashing(make_file):
+    keep = make_file('keep', CONTENT)
+    duplicate = make_file('copy', CONTENT)
+
+    class TouchingReader(HashReader):
+        """Modifica el duplicado mientras se calcula su hash, como otro programa."""
+
+        def hash_file(self, filepath, on_block=None, block_size=None):
+            file_hash = super().hash_file(filepath, on_block, block_size)
+            if filepath == duplicate:
+                stat = os.stat(filepath)
+                os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            return file_hash
+
+    result = FileConsolidator.consolidate([group(keep, duplicate)], mode='hardlink', reader=TouchingReader())
+    assert result['linked'] == [] and result['changed'] == [duplicate]
+    assert not os.path.samefile(keep, duplicate)
+
+
+def test_link_file_checks_signatures_before_replacing(make_file, tmp_path):
+    keep = make_file('keep', CONTENT)
+    duplicate = make_file('copy', CONTENT)
+    stale = FileConsolidator.signature(duplicate)
+    with open(duplicate, 'ab') as f:
+        f.write(b'!')
+
+    with pytest.raises(FileChangedError):
+        FileConsolidator.link_file(keep, duplicate, 'hardlink', {duplicate: stale})
+    assert read(duplicate) == CONTENT + b'!'
+    assert sorted(os.listdir(tmp_path / 'tree')) == ['copy', 'keep']  # Sin enlaces temporales
+
+
+def test_split_by_device(make_file, monkeypatch):
+    paths = [make_file(name, CONTENT) for name in ('a', 'b', 'c', 'd')]
+    devices = {paths[0]: 1, paths[1]: 2, paths[2]: 1, paths[3]: 3}
+    monkeypatch.setattr(file_consolidator.os, 'stat',
+                        lambda path, *args, **kwargs: types.SimpleNamespace(st_dev=devices[path]))
+
+    errors = {}
+    groups, alone = FileConsolidator.split_by_device([group(*paths)], errors)
+    assert groups == [group(paths[0], paths[2])]
+    assert sorted(alone) == sorted([paths[1], paths[3]])
+    assert errors == {}
@@ -0,0 +1,59 @@
+import pytest
+
+from core.hash_manifest import HashManifest
+
+
+def write_manifest(tmp_path, name, records, source):
+    path = str(tmp_path / name)
+    HashManifest.write(records, path, source)
+    return path
+
+
+def test_write_sorts_records_and_keeps_source(tmp_path, monkeypatch):
+    # Tramos de dos registros: se ordena en disco y se mezclan los tramos
+    monkeypatch.setattr(HashManifest, 'SORT_CHUNK_SIZE', 2)
+    records = [(30, 'c' * 64, 3.0, '/m/c'), (10, 'b' * 64, 2.0, '/m/ñ'), (10, 'a' * 64, 1.5, '/m/a'),
+               (20, 'a' * 64, 1.0, '/m/tab\tname')]
+    path = write_manifest(tmp_path, 'm.manifest', records, 'server-1')
+
+    assert list(HashManifest.read(path)) == sorted(records)
+    assert HashManifest.read_source(path) == 'server-1'
+
+
+def test_merge_groups_across_manifests(tmp_path):
+    first = write_manifest(tmp_path, 'one.manifest', [
+        (10, 'a' * 64, 1.0, '/data/a'),
+        (10, 'b' * 64, 1.0, '/data/only-here'),
+        (20, 'c' * 64, 1.0, '/data/c1'),
+        (20, 'c' * 64, 2.0, '/data/c2'),
+    ], 'laptop')
+    second = write_manifest(tmp_path, 'two.manifest', [
+        (10, 'a' * 64, 5.0, '/data/a'),  # Misma ruta en otra máquina
+        (15, 'b' * 64, 1.0, '/data/same-hash-other-size'),
+        (30, 'd' * 64, 1.0, '/data/only-there'),
+    ], 'nas')
+
+    merged = list(HashManifest.merge_duplicates([first, second]))
+    assert [[(record[3], record[4]) for record in group] for group in merged] == [
+        [('/data/a', 'laptop'), ('/data/a', 'nas')],
+        [('/data/c1', 'laptop'), ('/data/c2', 'laptop')],
+    ]
+
+    duplicates = HashManifest.to_duplicates(merged)
+    assert set(duplicates) == {'a' * 64, 'c' * 64}
+    assert duplicates['a' * 64]['size'] == 10
+    assert sorted(file['source'] for file in duplicates['a' * 64]['files']) == ['laptop', 'nas']
+
+
+def test_merge_of_a_single_manifest_finds_its_duplicates(tmp_path):
+    path = write_manifest(tmp_path, 'm.manifest', [
+        (10, 'a' * 64, 1.0, '/x/1'), (10, 'a' * 64, 1.0, '/x/2'), (10, 'a' * 64, 1.0, '/x/3'),
+    ], 'host')
+    assert [len(group) for group in HashManifest.merge_duplicates([path])] == [3]
+
+
+def test_read_rejects_other_files(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text('hello\n')
+    with pytest.raises(ValueError):
+        list(HashManifest.read(str(path)))
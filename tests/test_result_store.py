@@ -0,0 +1,95 @@
+import datetime
+import os
+
+from core.result_store import RECORD, ResultStore
+
+
+def duplicates_fixture():
+    return {
+        'a' * 64: {'size': 10, 'files': [
+            {'name': 'a1', 'path': '/data/a1', 'size': 10, 'date': datetime.datetime(2020, 1, 2)},
+            {'name': 'a2', 'path': '/data/sub/a2', 'size': 10, 'date': datetime.datetime(2021, 3, 4)},
+        ]},
+        '0' * 63 + '1': {'size': 7, 'files': [
+            {'name': 'ñ', 'path': '/data/ñ', 'size': 7, 'date': datetime.datetime(2019, 5, 6)},
+            {'name': 'b', 'path': '/data/b', 'size': 7, 'date': datetime.datetime(2019, 5, 7)},
+            {'name': 'c', 'path': '/data/c', 'size': 7, 'date': datetime.datetime(2019, 5, 8)},
+        ]},
+    }
+
+
+def normalized(duplicates):
+    return {file_hash: sorted((file['path'], file['size'], file['date']) for file in data['files'])
+            for file_hash, data in duplicates.items()}
+
+
+def test_duplicates_round_trip(tmp_path):
+    store_path = str(tmp_path / 'dups.orgres')
+    duplicates = duplicates_fixture()
+    assert ResultStore.write_duplicates(duplicates, store_path, '/data') == 5
+
+    reader = ResultStore.open(store_path)
+    try:
+        assert reader.root == '/data'
+        assert normalized(reader.to_duplicates()) == normalized(duplicates)
+        assert sorted(record[3] for record in reader.find_hash('a' * 64)) == ['/data/a1', '/data/sub/a2']
+        assert reader.find_hash('f' * 64) == []
+        stats = reader.group_stats()
+        assert stats['0' * 63 + '1']['copies'] == 3
+        assert stats['0' * 63 + '1']['wasted'] == 14
+        assert stats['a' * 64]['oldest'] == datetime.datetime(2020, 1, 2)
+    finally:
+        reader.close()
+
+
+def test_dates_round_trip(tmp_path):
+    store_path = str(tmp_path / 'dates.orgres')
+    files_by_date = {
+        '2020/01': {'': [{'name': 'x', 'path': '/root/x', 'date': datetime.datetime(2020, 1, 31, 23, 59)}]},
+        '2020/02': {'sub': [{'name': 'y', 'path': '/root/sub/y', 'date': datetime.datetime(2020, 2, 1)}]},
+        '2019/12': {'sub': [{'name': 'z', 'path': '/root/sub/z', 'date': datetime.datetime(2019, 12, 15)}]},
+    }
+    ResultStore.write_dates(files_by_date, store_path, '/root')
+
+    reader = ResultStore.open(store_path)
+    try:
+        assert reader.year_months() == ['2019/12', '2020/01', '2020/02']
+        assert reader.to_files_by_date() == files_by_date
+    finally:
+        reader.close()
+
+
+def test_each_write_is_a_new_generation(tmp_path):
+    store_path = str(tmp_path / 'dups.orgres')
+    ResultStore.write_duplicates(duplicates_fixture(), store_path)
+    first = ResultStore.generations(store_path)
+    ResultStore.write_duplicates({}, store_path)
+    second = ResultStore.generations(store_path)
+    assert len(first) == len(second) == 1 and first != second
+
+    reader = ResultStore.open(store_path)
+    try:
+        assert len(reader) == 0
+    finally:
+        reader.close()
+
+
+def test_invalid_generation_is_skipped(tmp_path):
+    store_path = str(tmp_path / 'dups.orgres')
+    ResultStore.write_duplicates(duplicates_fixture(), store_path)
+    valid = ResultStore.generations(store_path)[0]
+    stem, extension = os.path.splitext(store_path)
+    newer = f"{stem}.{int(valid.rsplit('.', 2)[-2]) + 1}{extension}"
+    with open(newer, 'wb') as f:
+        f.write(b'not a result store' * 10)
+
+    reader = ResultStore.open(store_path)
+    try:
+        assert len(reader) == 5
+    finally:
+        reader.close()
+
+
+def test_path_offsets_past_4_gib():
+    record = RECORD.pack(b'\0' * 32, 1, 0.0, 5 * 1024 ** 3, 10)
+    assert RECORD.unpack(record)[3] == 5 * 1024 ** 3
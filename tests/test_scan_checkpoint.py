@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from core.folder_hasher import FolderHasher
+from core.scan_checkpoint import ScanCheckpoint
+from core.scan_engine import DuplicateFinder
+from core.scan_metrics import ScanMetrics
+from core.scan_rules import ScanRules
+
+
+def groups(duplicates):
+    return sorted(sorted(os.path.basename(file['path']) for file in data['files'])
+                  for data in duplicates.values())
+
+
+def finder(root, rules=None):
+    return DuplicateFinder(root, metrics=ScanMetrics(enabled=True), rules=rules or ScanRules(),
+                           resumable=True)
+
+
+def interrupted_scan(root, monkeypatch, rules=None):
+    """Escaneo que se corta después de calcular los hashes, como si se cerrara la aplicación."""
+    def interrupt(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    scan = finder(root, rules)
+    with monkeypatch.context() as patch:
+        patch.setattr(FolderHasher, 'find_duplicate_folders', staticmethod(interrupt))
+        with pytest.raises(KeyboardInterrupt):
+            scan.run()
+    assert os.path.exists(scan.checkpoint.path)
+    return scan
+
+
+@pytest.fixture
+def tree(make_file, tmp_path):
+    make_file('a/one.bin', b'same-content')
+    make_file('b/two.bin', b'same-content')
+    make_file('b/three.bin', b'diff-content')
+    make_file('c/alone.bin', b'only')
+    return str(tmp_path / 'tree')
+
+
+def test_resume_reuses_listings_and_hashes(tree, monkeypatch):
+    interrupted_scan(tree, monkeypatch)
+
+    resumed = finder(tree)
+    duplicates = resumed.run()
+    assert resumed.resumed
+    assert groups(duplicates) == [['one.bin', 'two.bin']]
+    counters = resumed.metrics.counters
+    assert counters['resumed_hashes'] == 3
+    assert counters['resumed_dirs'] > 0
+    assert counters.get('bytes_read', 0) == 0
+    # Terminado el escaneo, el diario ya no hace falta
+    assert not os.path.exists(resumed.checkpoint.path)
+
+
+def test_resume_rehashes_changed_files(tree, monkeypatch):
+    interrupted_scan(tree, monkeypatch)
+    changed = os.path.join(tree, 'b', 'three.bin')
+    with open(changed, 'wb') as f:
+        f.write(b'same-content')
+    stat = os.stat(changed)
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+    resumed = finder(tree)
+    duplicates = resumed.run()
+    assert resumed.resumed
+    assert groups(duplicates) == [['one.bin', 'three.bin', 'two.bin']]
+    assert resumed.metrics.counters['resumed_hashes'] == 2
+    assert resumed.metrics.counters['bytes_read'] == len(b'same-content')
+
+
+def test_resume_lists_new_files(tree, monkeypatch, make_file):
+    interrupted_scan(tree, monkeypatch)
+    make_file('d/four.bin', b'same-content')
+
+    duplicates = finder(tree).run()
+    assert groups(duplicates) == [['four.bin', 'one.bin', 'two.bin']]
+
+
+def test_checkpoint_is_per_rules(tree, monkeypatch):
+    interrupted_scan(tree, monkeypatch)
+
+    other_rules = finder(tree, ScanRules(exclude=['c']))
+    assert groups(other_rules.run()) == [['one.bin', 'two.bin']]
+    assert not other_rules.resumed
+
+
+def test_torn_last_line_is_ignored(tree, monkeypatch):
+    scan = interrupted_scan(tree, monkeypatch)
+    with open(scan.checkpoint.path, 'a', encoding='utf-8') as f:
+        f.write('{"t": "h", "path": ')
+
+    state = ScanCheckpoint(scan.roots, ScanRules(), scan.checkpoint.path).load()
+    assert state is not None and len(state.hashes) == 3
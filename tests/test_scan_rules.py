@@ -0,0 +1,74 @@
+import os
+
+from core.scan_rules import COMMON_EXCLUDE, ScanRules
+
+
+def walked(rules, root):
+    """Rutas relativas de los archivos admitidos al recorrer root."""
+    return sorted(os.path.relpath(entry.path, root).replace(os.sep, '/')
+                  for _, files in rules.compile().walk(root) for entry in files)
+
+
+def test_defaults_skip_nothing(make_file, tmp_path):
+    for path in ('photos/a.jpg', '.hidden/b.jpg', 'node_modules/c.js', '.d.txt'):
+        make_file(path)
+    rules = ScanRules()
+    assert rules.exclude == [] and not rules.exclude_common and not rules.skip_hidden
+    assert walked(rules, str(tmp_path / 'tree')) == ['.d.txt', '.hidden/b.jpg', 'node_modules/c.js', 'photos/a.jpg']
+
+
+def test_common_excludes_and_hidden_are_opt_in(make_file, tmp_path):
+    for path in ('photos/a.jpg', '.hidden/b.jpg', 'node_modules/c.js', '.d.txt'):
+        make_file(path)
+    assert 'node_modules' in COMMON_EXCLUDE
+    rules = ScanRules(exclude_common=True, skip_hidden=True)
+    assert walked(rules, str(tmp_path / 'tree')) == ['photos/a.jpg']
+
+
+def test_include_name_and_path_patterns(make_file, tmp_path):
+    for path in ('photos/a.jpg', 'photos/b.png', 'other/c.jpg'):
+        make_file(path)
+    root = str(tmp_path / 'tree')
+    assert walked(ScanRules(include=['*.jpg']), root) == ['other/c.jpg', 'photos/a.jpg']
+    # Con separador, el patrón se compara con el final de la ruta, detrás de cualquier carpeta
+    assert walked(ScanRules(include=['photos/*.jpg']), root) == ['photos/a.jpg']
+    assert walked(ScanRules(include=['*.png', 'photos/*.jpg']), root) == ['photos/a.jpg', 'photos/b.png']
+
+
+def test_exclude_path_pattern_prunes_directory(make_file, tmp_path):
+    for path in ('keep/a.txt', 'skip/deep/b.txt'):
+        make_file(path)
+    matcher = ScanRules(exclude=['tree/skip']).compile()
+    assert sorted(os.path.relpath(entry.path, str(tmp_path / 'tree')).replace(os.sep, '/')
+                  for _, files in matcher.walk(str(tmp_path / 'tree')) for entry in files) == ['keep/a.txt']
+    assert matcher.skip_counts == {'exclude': 1}
+
+
+def test_size_and_extension_rules(make_file, tmp_path):
+    make_file('small.jpg', b'x')
+    make_file('big.jpg', b'x' * 100)
+    make_file('big.txt', b'x' * 100)
+    rules = ScanRules(min_size=10, max_size=1000, extensions=['JPG'])
+    assert rules.extensions == ['.jpg']
+    assert walked(rules, str(tmp_path / 'tree')) == ['big.jpg']
+
+
+def test_archive_members_follow_the_same_rules():
+    matcher = ScanRules(include=['photos/*.jpg'], skip_hidden=True).compile()
+    assert matcher.allow_member('/x/a.zip!/photos/q.jpg', 'q.jpg', 3)
+    assert not matcher.allow_member('/x/a.zip!/q.jpg', 'q.jpg', 3)
+    assert not matcher.allow_member('/x/a.zip!/photos/.q.jpg', '.q.jpg', 3)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'rules.json')
+    rules = ScanRules(exclude=['*.tmp'], include=['photos/*'], min_size=1, extensions=['.jpg'],
+                      skip_hidden=True, exclude_common=True, scan_archives=True)
+    rules.save(path)
+    assert ScanRules.load(path).to_dict() == rules.to_dict()
+
+
+def test_invalid_rules_file_falls_back_to_defaults(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text('{"unknown": 1}')
+    assert ScanRules.load(str(path)).to_dict() == ScanRules().to_dict()